@@ -13,6 +13,7 @@ from api.models import (
     KnowledgeBaseArticle, SupportSLA, CustomerSatisfactionSurvey,
     SupportAnalytics, SupportQueue
 )
+from api.crud.deal_relations import for_deals, tags_by_deal, watchers_by_deal
 
 class CRMDataAccess:
     """Comprehensive data access for AI sales assistant"""
@@ -22,6 +23,13 @@ class CRMDataAccess:
         self.user_id = user_id
         self.organization_id = organization_id
     
+    def _tag_labels(self, deals) -> Dict[int, List[str]]:
+        """Tag labels per deal id, one query for all of ``deals``"""
+        if not deals:
+            return {}
+        tags = tags_by_deal(self.db, for_deals(deal.id for deal in deals))
+        return {deal_id: [tag["label"] for tag in deal_tags] for deal_id, deal_tags in tags.items()}
+    
     def get_user_context(self) -> Dict[str, Any]:
         """Get comprehensive user context"""
         user = self.db.query(User).filter(User.id == self.user_id).first()
@@ -118,9 +126,10 @@ class CRMDataAccess:
             return {}
         
         # Get related deals
-        related_deals = self.db.query(Deal).filter(
+        related_deals = self.db.query(Deal).options(joinedload(Deal.stage)).filter(
             and_(Deal.contact_id == lead.contact_id, Deal.organization_id == self.organization_id)
         ).all()
+        related_tags = self._tag_labels(related_deals)
         
         # Get lead activities
         activities = self.db.query(Activity).filter(
@@ -156,7 +165,8 @@ class CRMDataAccess:
                     "title": deal.title,
                     "value": deal.value,
                     "stage": deal.stage.name if deal.stage else None,
-                    "status": "closed" if deal.closed_at else "open"
+                    "status": "closed" if deal.closed_at else "open",
+                    "tags": related_tags.get(deal.id, [])
                 }
                 for deal in related_deals
             ],
@@ -195,6 +205,9 @@ class CRMDataAccess:
             )
         ).limit(5).all()
         
+        tags = self._tag_labels([deal] + similar_deals)
+        watchers = watchers_by_deal(self.db, Deal.id == deal.id)
+        
         return {
             "deal": {
                 "id": deal.id,
@@ -203,7 +216,9 @@ class CRMDataAccess:
                 "description": deal.description,
                 "created_at": deal.created_at.isoformat() if deal.created_at else None,
                 "closed_at": deal.closed_at.isoformat() if deal.closed_at else None,
-                "reminder_date": deal.reminder_date.isoformat() if deal.reminder_date else None
+                "reminder_date": deal.reminder_date.isoformat() if deal.reminder_date else None,
+                "tags": tags.get(deal.id, []),
+                "watchers": watchers.get(deal.id, [])
             },
             "stage": {
                 "id": deal.stage.id if deal.stage else None,
@@ -244,7 +259,8 @@ class CRMDataAccess:
                     "id": similar.id,
                     "title": similar.title,
                     "value": similar.value,
-                    "status": "closed" if similar.closed_at else "open"
+                    "status": "closed" if similar.closed_at else "open",
+                    "tags": tags.get(similar.id, [])
                 }
                 for similar in similar_deals
             ]
@@ -254,7 +270,7 @@ class CRMDataAccess:
         """Get comprehensive contact context"""
         contact = self.db.query(Contact).options(
             joinedload(Contact.leads),
-            joinedload(Contact.deals)
+            joinedload(Contact.deals).joinedload(Deal.stage)
         ).filter(Contact.id == contact_id).first()
         
         if not contact:
@@ -263,6 +279,7 @@ class CRMDataAccess:
         # Get contact's interaction history
         all_deals = contact.deals
         all_leads = contact.leads
+        deal_tags = self._tag_labels(all_deals)
         
         # Calculate contact value
         total_deal_value = sum(deal.value or 0 for deal in all_deals)
@@ -315,7 +332,8 @@ class CRMDataAccess:
                     "value": deal.value,
                     "stage": deal.stage.name if deal.stage else None,
                     "status": "closed" if deal.closed_at else "open",
-                    "created_at": deal.created_at.isoformat() if deal.created_at else None
+                    "created_at": deal.created_at.isoformat() if deal.created_at else None,
+                    "tags": deal_tags.get(deal.id, [])
                 }
                 for deal in all_deals
             ],
@@ -463,12 +481,13 @@ class CRMDataAccess:
             ]
         
         if "deals" in entity_types:
-            deals = self.db.query(Deal).filter(
+            deals = self.db.query(Deal).options(joinedload(Deal.stage)).filter(
                 and_(
                     Deal.organization_id == self.organization_id,
                     Deal.title.ilike(f"%{query}%")
                 )
             ).limit(10).all()
+            deal_tags = self._tag_labels(deals)
             
             results["deals"] = [
                 {
@@ -476,6 +495,7 @@ class CRMDataAccess:
                     "title": deal.title,
                     "value": deal.value,
                     "stage": deal.stage.name if deal.stage else None,
+                    "tags": deal_tags.get(deal.id, []),
                     "type": "deal"
                 }
                 for deal in deals
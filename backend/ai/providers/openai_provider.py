@@ -4,9 +4,11 @@ Handles all OpenAI API interactions with gpt-4o-mini as default
 """
 import os
 import json
+import time
 from typing import Dict, List, Any, Optional, Union
 from openai import AsyncOpenAI
 from .base import BaseAIProvider, AIModel, AIResponse, AIMessage
+from api.metrics import LLMMetrics
 
 class OpenAIProvider(BaseAIProvider):
     """OpenAI API provider implementation"""
@@ -18,6 +20,7 @@ class OpenAIProvider(BaseAIProvider):
         
         super().__init__(api_key, model, **kwargs)
         self.client = AsyncOpenAI(api_key=api_key)
+        self.metrics = LLMMetrics("openai", self.model.value)
     
     async def chat_completion(
         self,
@@ -60,7 +63,14 @@ class OpenAIProvider(BaseAIProvider):
         
         # Make API call
         try:
-            response = await self.client.chat.completions.create(**request_params)
+            start = time.perf_counter()
+            try:
+                response = await self.client.chat.completions.create(**request_params)
+            except Exception:
+                self.metrics.errors.inc()
+                raise
+            finally:
+                self.metrics.duration.observe(time.perf_counter() - start)
             
             # Extract response content
             choice = response.choices[0]
@@ -82,6 +92,8 @@ class OpenAIProvider(BaseAIProvider):
                     "completion_tokens": response.usage.completion_tokens,
                     "total_tokens": response.usage.total_tokens
                 }
+                self.metrics.prompt_tokens.inc(response.usage.prompt_tokens or 0)
+                self.metrics.completion_tokens.inc(response.usage.completion_tokens or 0)
             
             return AIResponse(
                 content=content,
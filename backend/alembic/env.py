@@ -7,6 +7,7 @@ from sqlalchemy import pool
 
 from alembic import context
 from api.models import Base
+from api.schema_check import record_fingerprint
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
 config = context.config
@@ -84,6 +85,10 @@ def run_migrations_online() -> None:
 
         with context.begin_transaction():
             context.run_migrations()
+            # Compare with the models and record the result, so the app's boot
+            # check can skip DDL introspection (api/schema_check.py)
+            if context.get_context().get_current_heads() == tuple(context.script.get_heads()):
+                record_fingerprint(connection, context.get_context().get_current_revision())
 
 
 if context.is_offline_mode():
@@ -0,0 +1,78 @@
+"""Add tenant-scoped composite and partial indexes
+
+Revision ID: 3f6a9c2d4b1e
+Revises: c7fb6c589fc7
+Create Date: 2026-10-17 09:12:44.118302
+
+Every hot query filters on organization_id plus one of created_at, status,
+stage_id, owner_id or start_time. Index shapes follow the router queries:
+
+- dashboard metrics/performance/lead-quality: leads (org, status),
+  leads/deals/contacts (org, created_at), closed deals and reminders (partial)
+- kanban board: deals (org, stage_id), deals (org, owner_id)
+- telephony get_calls: calls (org, start_time) with optional status/agent
+- churn prediction: activities (timestamp), deals (contact, org, created_at)
+- email automation logs: email_logs (sent_at), (campaign_id, sent_at), (status)
+
+Indexes are built CONCURRENTLY so the migration does not lock writes on large
+tables; IF NOT EXISTS keeps it safe to re-run where some were added by hand.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f6a9c2d4b1e'
+down_revision: Union[str, Sequence[str], None] = 'c7fb6c589fc7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# (name, table, columns, extra create_index kwargs) - kept in step with the
+# Index() declarations in api/models.py
+INDEXES = [
+    ('ix_leads_org_status', 'leads', ['organization_id', 'status'], {}),
+    ('ix_leads_org_created_at', 'leads', ['organization_id', 'created_at'], {}),
+    ('ix_leads_org_owner', 'leads', ['organization_id', 'owner_id'], {}),
+    ('ix_deals_org_stage', 'deals', ['organization_id', 'stage_id'], {}),
+    ('ix_deals_org_created_at', 'deals', ['organization_id', 'created_at'], {}),
+    ('ix_deals_org_owner', 'deals', ['organization_id', 'owner_id'], {}),
+    ('ix_deals_contact_org_created_at', 'deals', ['contact_id', 'organization_id', 'created_at'], {}),
+    ('ix_deals_org_closed_at', 'deals', ['organization_id', 'closed_at'], {
+        'postgresql_where': sa.text('closed_at IS NOT NULL'),
+        'postgresql_include': ['value'],
+    }),
+    ('ix_deals_org_reminder', 'deals', ['organization_id'], {
+        'postgresql_where': sa.text('reminder_date IS NOT NULL'),
+    }),
+    ('ix_contacts_org_created_at', 'contacts', ['organization_id', 'created_at'], {}),
+    ('ix_activities_deal_timestamp', 'activities', ['deal_id', 'timestamp'], {}),
+    ('ix_activities_timestamp', 'activities', ['timestamp'], {}),
+    ('ix_watcher_user_id', 'watcher', ['user_id'], {}),
+    ('ix_calls_org_start_time', 'calls', ['organization_id', 'start_time'], {}),
+    ('ix_calls_org_status_start_time', 'calls', ['organization_id', 'status', 'start_time'], {}),
+    ('ix_calls_org_agent_start_time', 'calls', ['organization_id', 'agent_id', 'start_time'], {}),
+    ('ix_email_logs_sent_at', 'email_logs', ['sent_at'], {}),
+    ('ix_email_logs_campaign_sent_at', 'email_logs', ['campaign_id', 'sent_at'], {}),
+    ('ix_email_logs_status', 'email_logs', ['status'], {}),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction block
+    with op.get_context().autocommit_block():
+        for name, table, columns, kwargs in INDEXES:
+            op.create_index(
+                name, table, columns,
+                if_not_exists=True, postgresql_concurrently=True, **kwargs
+            )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for name, table, _columns, _kwargs in reversed(INDEXES):
+            op.drop_index(name, table_name=table, if_exists=True, postgresql_concurrently=True)
@@ -0,0 +1,37 @@
+"""Add org_change_versions table
+
+Revision ID: 5b7e2c9d1f43
+Revises: 8c1d5e7f2a90
+Create Date: 2026-10-17 16:21:37.550912
+
+Version counters per (organization, scope), bumped in the same transaction
+as every write to the tracked models. List, board and dashboard endpoints
+derive their ETag from them (api/change_tokens.py).
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5b7e2c9d1f43'
+down_revision: Union[str, Sequence[str], None] = '8c1d5e7f2a90'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'org_change_versions',
+        sa.Column('organization_id', sa.Integer(), primary_key=True),
+        sa.Column('scope', sa.String(length=32), primary_key=True),
+        sa.Column('version', sa.BigInteger(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('org_change_versions')
@@ -0,0 +1,757 @@
+"""Create the tables that were only ever made by create_all
+
+Revision ID: 6d2f8a1c4e57
+Revises: 7f8e9d0c1b2a
+Create Date: 2026-10-18 09:12:30.518204
+
+Calls/PBX, support, forecasting, segmentation, company settings, user skills
+and knowledge base tables were created by ``Base.metadata.create_all()`` at
+boot and never by a migration, so ``alembic upgrade head`` on an empty
+database failed at the first migration that altered one of them. They are
+created here in the shape the following migrations expect: pbx_providers
+before add_pbx_fields (with the ``context`` column aa6b98b2a150 drops),
+support_tickets without the AI summary columns, calls without the indexes
+of 3f6a9c2d4b1e.
+
+Databases that already have a table (created by create_all) keep it as is.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6d2f8a1c4e57'
+down_revision: Union[str, Sequence[str], None] = '7f8e9d0c1b2a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# In foreign-key order
+TABLES = [
+    'call_analytics',
+    'forecasting_analytics',
+    'support_analytics',
+    'support_queues',
+    'call_campaigns',
+    'company_settings',
+    'customer_segments',
+    'forecasting_models',
+    'knowledge_base_articles',
+    'pbx_providers',
+    'support_slas',
+    'user_skills',
+    'call_queues',
+    'customer_segment_members',
+    'forecast_results',
+    'pbx_extensions',
+    'segment_analytics',
+    'support_tickets',
+    'assignment_audits',
+    'call_queue_members',
+    'calls',
+    'customer_satisfaction_surveys',
+    'support_comments',
+    'call_activities',
+    'campaign_calls',
+    'support_attachments',
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    existing = set(sa.inspect(op.get_bind()).get_table_names())
+
+    def _create_table(name, *columns, **kwargs):
+        if name not in existing:
+            op.create_table(name, *columns, **kwargs)
+
+    _create_table('call_analytics',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('organization_id', sa.Integer(), nullable=False),
+    sa.Column('period_type', sa.String(), nullable=False),
+    sa.Column('period_start', sa.DateTime(), nullable=False),
+    sa.Column('period_end', sa.DateTime(), nullable=False),
+    sa.Column('total_calls', sa.Integer(), nullable=True),
+    sa.Column('inbound_calls', sa.Integer(), nullable=True),
+    sa.Column('outbound_calls', sa.Integer(), nullable=True),
+    sa.Column('internal_calls', sa.Integer(), nullable=True),
+    sa.Column('answered_calls', sa.Integer(), nullable=True),
+    sa.Column('missed_calls', sa.Integer(), nullable=True),
+    sa.Column('abandoned_calls', sa.Integer(), nullable=True),
+    sa.Column('answer_rate', sa.Float(), nullable=True),
+    sa.Column('abandonment_rate', sa.Float(), nullable=True),
+    sa.Column('avg_call_duration', sa.Float(), nullable=True),
+    sa.Column('avg_talk_time', sa.Float(), nullable=True),
+    sa.Column('avg_wait_time', sa.Float(), nullable=True),
+    sa.Column('avg_hold_time', sa.Float(), nullable=True),
+    sa.Column('queue_calls', sa.Integer(), nullable=True),
+    sa.Column('queue_answered', sa.Integer(), nullable=True),
+    sa.Column('queue_abandoned', sa.Integer(), nullable=True),
+    sa.Column('service_level', sa.Float(), nullable=True),
+    sa.Column('avg_queue_wait', sa.Float(), nullable=True),
+    sa.Column('active_agents', sa.Integer(), nullable=True),
+    sa.Column('total_agent_time', sa.Integer(), nullable=True),
+    sa.Column('avg_agent_utilization', sa.Float(), nullable=True),
+    sa.Column('total_cost', sa.Float(), nullable=True),
+    sa.Column('avg_cost_per_call', sa.Float(), nullable=True),
+    sa.Column('avg_quality_score', sa.Float(), nullable=True),
+    sa.Column('recordings_count', sa.Integer(), nullable=True),
+    sa.Column('transcriptions_count', sa.Integer(), nullable=True),
+    sa.Column('queue_breakdown', sa.JSON(), nullable=True),
+    sa.Column('agent_breakdown', sa.JSON(), nullable=True),
+    sa.Column('hourly_breakdown', sa.JSON(), nullable=True),
+    sa.Column('trends', sa.JSON(), nullable=True),
+    sa.Column('insights', sa.JSON(), nullable=True),
+    sa.Column('recommendations', sa.JSON(), nullable=True),
+    sa.Column('generated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['organization_id'], ['organizations.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    _create_table('forecasting_analytics',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('organization_id', sa.Integer(), nullable=False),
+    sa.Column('analytics_type', sa.String(), nullable=False),
+    sa.Column('period_start', sa.DateTime(), nullable=False),
+    sa.Column('period_end', sa.DateTime(), nullable=False),
+    sa.Column('total_forecasts', sa.Integer(), nullable=True),
+    sa.Column('accurate_forecasts', sa.Integer(), nullable=True),
+    sa.Column('accuracy_rate', sa.Float(), nullable=True),
+    sa.Column('avg_forecast_error', sa.Float(), nullable=True),
+    sa.Column('best_performing_model', sa.String(), nullable=True),
+    sa.Column('worst_performing_model', sa.String(), nullable=True),
+    sa.Column('trend_analysis', sa.JSON(), nullable=True),
+    sa.Column('seasonality_analysis', sa.JSON(), nullable=True),
+    sa.Column('anomaly_detection', sa.JSON(), nullable=True),
+    sa.Column('performance_insights', sa.JSON(), nullable=True),
+    sa.Column('improvement_recommendations', sa.JSON(), nullable=True),
+    sa.Column('generated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['organization_id'], ['organizations.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    _create_table('support_analytics',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('organization_id', sa.Integer(), nullable=False),
+    sa.Column('period_type', sa.String(), nullable=False),
+    sa.Column('period_start', sa.DateTime(), nullable=False),
+    sa.Column('period_end', sa.DateTime(), nullable=False),
+    sa.Column('total_tickets', sa.Integer(), nullable=True),
+    sa.Column('open_tickets', sa.Integer(), nullable=True),
+    sa.Column('resolved_tickets', sa.Integer(), nullable=True),
+    sa.Column('closed_tickets', sa.Integer(), nullable=True),
+    sa.Column('avg_first_response_time', sa.Float(), nullable=True),
+    sa.Column('avg_resolution_time', sa.Float(), nullable=True),
+    sa.Column('sla_breach_count', sa.Integer(), nullable=True),
+    sa.Column('sla_compliance_rate', sa.Float(), nullable=True),
+    sa.Column('avg_satisfaction_rating', sa.Float(), nullable=True),
+    sa.Column('nps_score', sa.Float(), nullable=True),
+    sa.Column('survey_response_rate', sa.Float(), nullable=True),
+    sa.Column('tickets_per_agent', sa.JSON(), nullable=True),
+    sa.Column('resolution_rate_per_agent', sa.JSON(), nullable=True),
+    sa.Column('tickets_by_category', sa.JSON(), nullable=True),
+    sa.Column('tickets_by_priority', sa.JSON(), nullable=True),
+    sa.Column('generated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['organization_id'], ['organizations.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    _create_table('support_queues',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(), nullable=False),
+    sa.Column('description', sa.Text(), nullable=True),
+    sa.Column('organization_id', sa.Integer(), nullable=False),
+    sa.Column('auto_assign', sa.Boolean(), nullable=True),
+    sa.Column('round_robin', sa.Boolean(), nullable=True),
+    sa.Column('max_workload', sa.Integer(), nullable=True),
+    sa.Column('business_hours_only', sa.Boolean(), nullable=True),
+    sa.Column('business_hours_start', sa.String(), nullable=True),
+    sa.Column('business_hours_end', sa.String(), nullable=True),
+    sa.Column('timezone', sa.String(), nullable=True),
+    sa.Column('handles_priorities', sa.JSON(), nullable=True),
+    sa.Column('escalation_queue_id', sa.Integer(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['escalation_queue_id'], ['support_queues.id'], ),
+    sa.ForeignKeyConstraint(['organization_id'], ['organizations.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    _create_table('call_campaigns',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('organization_id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(), nullable=False),
+    sa.Column('description', sa.Text(), nullable=True),
+    sa.Column('campaign_type', sa.String(), nullable=True),
+    sa.Column('target_contacts', sa.JSON(), nullable=True),
+    sa.Column('target_leads', sa.JSON(), nullable=True),
+    sa.Column('target_segments', sa.JSON(), nullable=True),
+    sa.Column('max_concurrent_calls', sa.Integer(), nullable=True),
+    sa.Column('call_timeout', sa.Integer(), nullable=True),
+    sa.Column('retry_attempts', sa.Integer(), nullable=True),
+    sa.Column('retry_interval', sa.Integer(), nullable=True),
+    sa.Column('start_time', sa.DateTime(), nullable=True),
+    sa.Column('end_time', sa.DateTime(), nullable=True),
+    sa.Column('business_hours_only', sa.Boolean(), nullable=True),
+    sa.Column('business_hours_start', sa.String(), nullable=True),
+    sa.Column('business_hours_end', sa.String(), nullable=True),
+    sa.Column('business_days', sa.JSON(), nullable=True),
+    sa.Column('timezone', sa.String(), nullable=True),
+    sa.Column('script_template', sa.Text(), nullable=True),
+    sa.Column('recording_enabled', sa.Boolean(), nullable=True),
+    sa.Column('transcription_enabled', sa.Boolean(), nullable=True),
+    sa.Column('status', sa.String(), nullable=True),
+    sa.Column('progress', sa.JSON(), nullable=True),
+    sa.Column('total_targets', sa.Integer(), nullable=True),
+    sa.Column('calls_made', sa.Integer(), nullable=True),
+    sa.Column('calls_answered', sa.Integer(), nullable=True),
+    sa.Column('calls_completed', sa.Integer(), nullable=True),
+    sa.Column('success_rate', sa.Float(), nullable=True),
+    sa.Column('created_by', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['created_by'], ['users.id'], ),
+    sa.ForeignKeyConstraint(['organization_id'], ['organizations.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    _create_table('company_settings',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('organization_id', sa.Integer(), nullable=False),
+    sa.Column('company_name', sa.String(), nullable=False),
+    sa.Column('company_mobile', sa.String(), nullable=True),
+    sa.Column('city', sa.String(), nullable=True),
+    sa.Column('area', sa.String(), nullable=True),
+    sa.Column('complete_address', sa.Text(), nullable=True),
+    sa.Column('trn', sa.String(), nullable=True),
+    sa.Column('currency', sa.String(), nullable=True),
+    sa.Column('timezone', sa.String(), nullable=True),
+    sa.Column('trial_date_enabled', sa.Boolean(), nullable=True),
+    sa.Column('trial_date_days', sa.Integer(), nullable=True),
+    sa.Column('delivery_date_enabled', sa.Boolean(), nullable=True),
+    sa.Column('delivery_date_days', sa.Integer(), nullable=True),
+    sa.Column('advance_payment_enabled', sa.Boolean(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.Column('created_by', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['created_by'], ['users.id'], ),
+    sa.ForeignKeyConstraint(['organization_id'], ['organizations.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('organization_id')
+    )
+    _create_table('customer_segments',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('organization_id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(), nullable=False),
+    sa.Column('description', sa.Text(), nullable=True),
+    sa.Column('segment_type', sa.String(), nullable=True),
+    sa.Column('criteria', sa.JSON(), nullable=False),
+    sa.Column('criteria_description', sa.Text(), nullable=True),
+    sa.Column('customer_count', sa.Integer(), nullable=True),
+    sa.Column('total_deal_value', sa.Float(), nullable=True),
+    sa.Column('avg_deal_value', sa.Float(), nullable=True),
+    sa.Column('conversion_rate', sa.Float(), nullable=True),
+    sa.Column('insights', sa.JSON(), nullable=True),
+    sa.Column('recommendations', sa.JSON(), nullable=True),
+    sa.Column('risk_score', sa.Float(), nullable=True),
+    sa.Column('opportunity_score', sa.Float(), nullable=True),
+    sa.Column('is_active', sa.Boolean(), nullable=True),
+    sa.Column('is_auto_updated', sa.Boolean(), nullable=True),
+    sa.Column('last_updated', sa.DateTime(), nullable=True),
+    sa.Column('created_by', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['created_by'], ['users.id'], ),
+    sa.ForeignKeyConstraint(['organization_id'], ['organizations.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    _create_table('forecasting_models',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('organization_id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(), nullable=False),
+    sa.Column('description', sa.Text(), nullable=True),
+    sa.Column('model_type', sa.String(), nullable=False),
+    sa.Column('data_source', sa.String(), nullable=False),
+    sa.Column('model_algorithm', sa.String(), nullable=False),
+    sa.Column('model_parameters', sa.JSON(), nullable=True),
+    sa.Column('training_data_period', sa.String(), nullable=False),
+    sa.Column('forecast_horizon', sa.String(), nullable=False),
+    sa.Column('accuracy_metrics', sa.JSON(), nullable=True),
+    sa.Column('is_active', sa.Boolean(), nullable=True),
+    sa.Column('last_trained', sa.DateTime(), nullable=True),
+    sa.Column('created_by', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['created_by'], ['users.id'], ),
+    sa.ForeignKeyConstraint(['organization_id'], ['organizations.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    _create_table('knowledge_base_articles',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('organization_id', sa.Integer(), nullable=False),
+    sa.Column('title', sa.String(), nullable=False),
+    sa.Column('slug', sa.String(), nullable=False),
+    sa.Column('content', sa.Text(), nullable=False),
+    sa.Column('summary', sa.Text(), nullable=True),
+    sa.Column('category', sa.String(), nullable=False),
+    sa.Column('subcategory', sa.String(), nullable=True),
+    sa.Column('tags', sa.JSON(), nullable=True),
+    sa.Column('status', sa.String(), nullable=True),
+    sa.Column('visibility', sa.String(), nullable=True),
+    sa.Column('featured', sa.Boolean(), nullable=True),
+    sa.Column('meta_description', sa.String(), nullable=True),
+    sa.Column('view_count', sa.Integer(), nullable=True),
+    sa.Column('helpful_count', sa.Integer(), nullable=True),
+    sa.Column('not_helpful_count', sa.Integer(), nullable=True),
+    sa.Column('author_id', sa.Integer(), nullable=False),
+    sa.Column('reviewer_id', sa.Integer(), nullable=True),
+    sa.Column('approved_at', sa.DateTime(), nullable=True),
+    sa.Column('last_reviewed_at', sa.DateTime(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.Column('published_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['author_id'], ['users.id'], ),
+    sa.ForeignKeyConstraint(['organization_id'], ['organizations.id'], ),
+    sa.ForeignKeyConstraint(['reviewer_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('slug')
+    )
+    _create_table('pbx_providers',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('organization_id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(), nullable=False),
+    sa.Column('provider_type', sa.String(), nullable=False),
+    sa.Column('display_name', sa.String(), nullable=False),
+    sa.Column('description', sa.Text(), nullable=True),
+    sa.Column('host', sa.String(), nullable=False),
+    sa.Column('port', sa.Integer(), nullable=True),
+    sa.Column('username', sa.String(), nullable=False),
+    sa.Column('password', sa.String(), nullable=False),
+    sa.Column('caller_id_field', sa.String(), nullable=True),
+    sa.Column('dialplan_context', sa.String(), nullable=True),
+    sa.Column('recording_enabled', sa.Boolean(), nullable=True),
+    sa.Column('recording_path', sa.String(), nullable=True),
+    sa.Column('transcription_enabled', sa.Boolean(), nullable=True),
+    sa.Column('cdr_enabled', sa.Boolean(), nullable=True),
+    sa.Column('cdr_path', sa.String(), nullable=True),
+    sa.Column('webhook_url', sa.String(), nullable=True),
+    sa.Column('webhook_secret', sa.String(), nullable=True),
+    sa.Column('api_key', sa.String(), nullable=True),
+    sa.Column('is_active', sa.Boolean(), nullable=True),
+    sa.Column('is_primary', sa.Boolean(), nullable=True),
+    sa.Column('auto_assign_calls', sa.Boolean(), nullable=True),
+    sa.Column('created_by', sa.Integer(), nullable=False),
+    sa.Column('context', sa.String(length=100), server_default='default', nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.Column('last_sync', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['created_by'], ['users.id'], ),
+    sa.ForeignKeyConstraint(['organization_id'], ['organizations.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    _create_table('support_slas',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('organization_id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(), nullable=False),
+    sa.Column('priority', sa.String(), nullable=False),
+    sa.Column('category', sa.String(), nullable=True),
+    sa.Column('first_response_time', sa.Integer(), nullable=False),
+    sa.Column('resolution_time', sa.Integer(), nullable=False),
+    sa.Column('business_hours_only', sa.Boolean(), nullable=True),
+    sa.Column('business_hours_start', sa.String(), nullable=True),
+    sa.Column('business_hours_end', sa.String(), nullable=True),
+    sa.Column('business_days', sa.JSON(), nullable=True),
+    sa.Column('auto_escalate', sa.Boolean(), nullable=True),
+    sa.Column('escalation_time', sa.Integer(), nullable=True),
+    sa.Column('escalation_user_id', sa.Integer(), nullable=True),
+    sa.Column('active', sa.Boolean(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['escalation_user_id'], ['users.id'], ),
+    sa.ForeignKeyConstraint(['organization_id'], ['organizations.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    _create_table('user_skills',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('skill_name', sa.String(), nullable=False),
+    sa.Column('skill_level', sa.String(), nullable=True),
+    sa.Column('category', sa.String(), nullable=True),
+    sa.Column('is_active', sa.Boolean(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    _create_table('call_queues',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('organization_id', sa.Integer(), nullable=False),
+    sa.Column('provider_id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(), nullable=False),
+    sa.Column('description', sa.Text(), nullable=True),
+    sa.Column('queue_number', sa.String(), nullable=False),
+    sa.Column('strategy', sa.String(), nullable=True),
+    sa.Column('timeout', sa.Integer(), nullable=True),
+    sa.Column('retry', sa.Integer(), nullable=True),
+    sa.Column('wrapup_time', sa.Integer(), nullable=True),
+    sa.Column('max_wait_time', sa.Integer(), nullable=True),
+    sa.Column('music_on_hold', sa.String(), nullable=True),
+    sa.Column('announce_frequency', sa.Integer(), nullable=True),
+    sa.Column('announce_position', sa.Boolean(), nullable=True),
+    sa.Column('announce_hold_time', sa.Boolean(), nullable=True),
+    sa.Column('max_calls_per_agent', sa.Integer(), nullable=True),
+    sa.Column('join_empty', sa.Boolean(), nullable=True),
+    sa.Column('leave_when_empty', sa.Boolean(), nullable=True),
+    sa.Column('priority', sa.Integer(), nullable=True),
+    sa.Column('skill_based_routing', sa.Boolean(), nullable=True),
+    sa.Column('required_skills', sa.JSON(), nullable=True),
+    sa.Column('is_active', sa.Boolean(), nullable=True),
+    sa.Column('current_calls', sa.Integer(), nullable=True),
+    sa.Column('current_agents', sa.Integer(), nullable=True),
+    sa.Column('total_calls', sa.Integer(), nullable=True),
+    sa.Column('answered_calls', sa.Integer(), nullable=True),
+    sa.Column('abandoned_calls', sa.Integer(), nullable=True),
+    sa.Column('avg_wait_time', sa.Float(), nullable=True),
+    sa.Column('avg_talk_time', sa.Float(), nullable=True),
+    sa.Column('service_level', sa.Float(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['organization_id'], ['organizations.id'], ),
+    sa.ForeignKeyConstraint(['provider_id'], ['pbx_providers.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    _create_table('customer_segment_members',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('segment_id', sa.Integer(), nullable=False),
+    sa.Column('contact_id', sa.Integer(), nullable=False),
+    sa.Column('membership_score', sa.Float(), nullable=True),
+    sa.Column('membership_reasons', sa.JSON(), nullable=True),
+    sa.Column('added_by_ai', sa.Boolean(), nullable=True),
+    sa.Column('segment_engagement_score', sa.Float(), nullable=True),
+    sa.Column('last_activity_in_segment', sa.DateTime(), nullable=True),
+    sa.Column('added_at', sa.DateTime(), nullable=True),
+    sa.Column('last_updated', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['contact_id'], ['contacts.id'], ),
+    sa.ForeignKeyConstraint(['segment_id'], ['customer_segments.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    _create_table('forecast_results',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('model_id', sa.Integer(), nullable=False),
+    sa.Column('organization_id', sa.Integer(), nullable=False),
+    sa.Column('forecast_type', sa.String(), nullable=False),
+    sa.Column('forecast_period', sa.String(), nullable=False),
+    sa.Column('forecast_date', sa.DateTime(), nullable=False),
+    sa.Column('forecasted_value', sa.Float(), nullable=False),
+    sa.Column('confidence_interval_lower', sa.Float(), nullable=True),
+    sa.Column('confidence_interval_upper', sa.Float(), nullable=True),
+    sa.Column('actual_value', sa.Float(), nullable=True),
+    sa.Column('accuracy_score', sa.Float(), nullable=True),
+    sa.Column('trend_direction', sa.String(), nullable=True),
+    sa.Column('seasonality_factor', sa.Float(), nullable=True),
+    sa.Column('anomaly_detected', sa.Boolean(), nullable=True),
+    sa.Column('forecast_quality_score', sa.Float(), nullable=True),
+    sa.Column('insights', sa.JSON(), nullable=True),
+    sa.Column('recommendations', sa.JSON(), nullable=True),
+    sa.Column('generated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['model_id'], ['forecasting_models.id'], ),
+    sa.ForeignKeyConstraint(['organization_id'], ['organizations.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    _create_table('pbx_extensions',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('provider_id', sa.Integer(), nullable=False),
+    sa.Column('organization_id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=True),
+    sa.Column('extension_number', sa.String(), nullable=False),
+    sa.Column('extension_name', sa.String(), nullable=False),
+    sa.Column('extension_type', sa.String(), nullable=True),
+    sa.Column('device_type', sa.String(), nullable=True),
+    sa.Column('device_config', sa.JSON(), nullable=True),
+    sa.Column('voicemail_enabled', sa.Boolean(), nullable=True),
+    sa.Column('voicemail_password', sa.String(), nullable=True),
+    sa.Column('ring_timeout', sa.Integer(), nullable=True),
+    sa.Column('max_ring_timeout', sa.Integer(), nullable=True),
+    sa.Column('call_forward_enabled', sa.Boolean(), nullable=True),
+    sa.Column('call_forward_number', sa.String(), nullable=True),
+    sa.Column('call_forward_conditions', sa.JSON(), nullable=True),
+    sa.Column('presence_status', sa.String(), nullable=True),
+    sa.Column('dnd_enabled', sa.Boolean(), nullable=True),
+    sa.Column('auto_answer', sa.Boolean(), nullable=True),
+    sa.Column('queue_strategy', sa.String(), nullable=True),
+    sa.Column('queue_timeout', sa.Integer(), nullable=True),
+    sa.Column('queue_retry', sa.Integer(), nullable=True),
+    sa.Column('queue_wrapup_time', sa.Integer(), nullable=True),
+    sa.Column('is_active', sa.Boolean(), nullable=True),
+    sa.Column('is_registered', sa.Boolean(), nullable=True),
+    sa.Column('last_registered', sa.DateTime(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['organization_id'], ['organizations.id'], ),
+    sa.ForeignKeyConstraint(['provider_id'], ['pbx_providers.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    _create_table('segment_analytics',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('segment_id', sa.Integer(), nullable=False),
+    sa.Column('organization_id', sa.Integer(), nullable=False),
+    sa.Column('period_type', sa.String(), nullable=False),
+    sa.Column('period_start', sa.DateTime(), nullable=False),
+    sa.Column('period_end', sa.DateTime(), nullable=False),
+    sa.Column('customer_count', sa.Integer(), nullable=True),
+    sa.Column('new_members', sa.Integer(), nullable=True),
+    sa.Column('lost_members', sa.Integer(), nullable=True),
+    sa.Column('total_revenue', sa.Float(), nullable=True),
+    sa.Column('avg_revenue_per_customer', sa.Float(), nullable=True),
+    sa.Column('revenue_growth_rate', sa.Float(), nullable=True),
+    sa.Column('avg_engagement_score', sa.Float(), nullable=True),
+    sa.Column('active_customers', sa.Integer(), nullable=True),
+    sa.Column('churn_rate', sa.Float(), nullable=True),
+    sa.Column('total_deals', sa.Integer(), nullable=True),
+    sa.Column('closed_deals', sa.Integer(), nullable=True),
+    sa.Column('avg_deal_size', sa.Float(), nullable=True),
+    sa.Column('conversion_rate', sa.Float(), nullable=True),
+    sa.Column('trends', sa.JSON(), nullable=True),
+    sa.Column('predictions', sa.JSON(), nullable=True),
+    sa.Column('recommendations', sa.JSON(), nullable=True),
+    sa.Column('generated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['organization_id'], ['organizations.id'], ),
+    sa.ForeignKeyConstraint(['segment_id'], ['customer_segments.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    _create_table('support_tickets',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('ticket_number', sa.String(), nullable=False),
+    sa.Column('organization_id', sa.Integer(), nullable=False),
+    sa.Column('title', sa.String(), nullable=False),
+    sa.Column('description', sa.Text(), nullable=False),
+    sa.Column('priority', sa.String(), nullable=True),
+    sa.Column('status', sa.String(), nullable=True),
+    sa.Column('category', sa.String(), nullable=False),
+    sa.Column('subcategory', sa.String(), nullable=True),
+    sa.Column('customer_account_id', sa.Integer(), nullable=True),
+    sa.Column('contact_id', sa.Integer(), nullable=True),
+    sa.Column('customer_email', sa.String(), nullable=False),
+    sa.Column('customer_name', sa.String(), nullable=False),
+    sa.Column('assigned_to_id', sa.Integer(), nullable=True),
+    sa.Column('assigned_at', sa.DateTime(), nullable=True),
+    sa.Column('assignment_reason', sa.Text(), nullable=True),
+    sa.Column('assignment_type', sa.String(), nullable=True),
+    sa.Column('queue_id', sa.Integer(), nullable=True),
+    sa.Column('sla_deadline', sa.DateTime(), nullable=True),
+    sa.Column('first_response_at', sa.DateTime(), nullable=True),
+    sa.Column('resolution_deadline', sa.DateTime(), nullable=True),
+    sa.Column('resolution', sa.Text(), nullable=True),
+    sa.Column('resolution_notes', sa.Text(), nullable=True),
+    sa.Column('resolved_at', sa.DateTime(), nullable=True),
+    sa.Column('resolved_by_id', sa.Integer(), nullable=True),
+    sa.Column('closure_reason', sa.String(), nullable=True),
+    sa.Column('closure_category', sa.String(), nullable=True),
+    sa.Column('follow_up_required', sa.Boolean(), nullable=True),
+    sa.Column('follow_up_date', sa.DateTime(), nullable=True),
+    sa.Column('follow_up_notes', sa.Text(), nullable=True),
+    sa.Column('customer_satisfied', sa.Boolean(), nullable=True),
+    sa.Column('internal_notes', sa.Text(), nullable=True),
+    sa.Column('escalated', sa.Boolean(), nullable=True),
+    sa.Column('escalated_at', sa.DateTime(), nullable=True),
+    sa.Column('escalated_to_id', sa.Integer(), nullable=True),
+    sa.Column('escalation_reason', sa.String(), nullable=True),
+    sa.Column('satisfaction_rating', sa.Integer(), nullable=True),
+    sa.Column('satisfaction_feedback', sa.Text(), nullable=True),
+    sa.Column('satisfaction_survey_sent', sa.Boolean(), nullable=True),
+    sa.Column('satisfaction_survey_sent_at', sa.DateTime(), nullable=True),
+    sa.Column('created_by', sa.Integer(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.Column('closed_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['assigned_to_id'], ['users.id'], ),
+    sa.ForeignKeyConstraint(['contact_id'], ['contacts.id'], ),
+    sa.ForeignKeyConstraint(['created_by'], ['users.id'], ),
+    sa.ForeignKeyConstraint(['customer_account_id'], ['customer_accounts.id'], ),
+    sa.ForeignKeyConstraint(['escalated_to_id'], ['users.id'], ),
+    sa.ForeignKeyConstraint(['organization_id'], ['organizations.id'], ),
+    sa.ForeignKeyConstraint(['queue_id'], ['support_queues.id'], ),
+    sa.ForeignKeyConstraint(['resolved_by_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('ticket_number')
+    )
+    _create_table('assignment_audits',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('ticket_id', sa.Integer(), nullable=False),
+    sa.Column('assigned_to_id', sa.Integer(), nullable=True),
+    sa.Column('assigned_by_id', sa.Integer(), nullable=False),
+    sa.Column('assignment_type', sa.String(), nullable=False),
+    sa.Column('assignment_reason', sa.Text(), nullable=True),
+    sa.Column('previous_assigned_to_id', sa.Integer(), nullable=True),
+    sa.Column('queue_id', sa.Integer(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['assigned_by_id'], ['users.id'], ),
+    sa.ForeignKeyConstraint(['assigned_to_id'], ['users.id'], ),
+    sa.ForeignKeyConstraint(['previous_assigned_to_id'], ['users.id'], ),
+    sa.ForeignKeyConstraint(['queue_id'], ['support_queues.id'], ),
+    sa.ForeignKeyConstraint(['ticket_id'], ['support_tickets.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    _create_table('call_queue_members',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('queue_id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('extension_id', sa.Integer(), nullable=True),
+    sa.Column('penalty', sa.Integer(), nullable=True),
+    sa.Column('paused', sa.Boolean(), nullable=True),
+    sa.Column('status', sa.String(), nullable=True),
+    sa.Column('last_call_time', sa.DateTime(), nullable=True),
+    sa.Column('total_calls', sa.Integer(), nullable=True),
+    sa.Column('answered_calls', sa.Integer(), nullable=True),
+    sa.Column('talk_time', sa.Integer(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['extension_id'], ['pbx_extensions.id'], ),
+    sa.ForeignKeyConstraint(['queue_id'], ['call_queues.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    _create_table('calls',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('organization_id', sa.Integer(), nullable=False),
+    sa.Column('provider_id', sa.Integer(), nullable=False),
+    sa.Column('extension_id', sa.Integer(), nullable=True),
+    sa.Column('unique_id', sa.String(), nullable=False),
+    sa.Column('pbx_call_id', sa.String(), nullable=True),
+    sa.Column('session_id', sa.String(), nullable=True),
+    sa.Column('caller_id', sa.String(), nullable=False),
+    sa.Column('caller_name', sa.String(), nullable=True),
+    sa.Column('called_number', sa.String(), nullable=False),
+    sa.Column('called_name', sa.String(), nullable=True),
+    sa.Column('direction', sa.String(), nullable=False),
+    sa.Column('call_type', sa.String(), nullable=True),
+    sa.Column('contact_id', sa.Integer(), nullable=True),
+    sa.Column('lead_id', sa.Integer(), nullable=True),
+    sa.Column('deal_id', sa.Integer(), nullable=True),
+    sa.Column('agent_id', sa.Integer(), nullable=True),
+    sa.Column('queue_id', sa.Integer(), nullable=True),
+    sa.Column('status', sa.String(), nullable=False),
+    sa.Column('start_time', sa.DateTime(), nullable=False),
+    sa.Column('answer_time', sa.DateTime(), nullable=True),
+    sa.Column('end_time', sa.DateTime(), nullable=True),
+    sa.Column('duration', sa.Integer(), nullable=True),
+    sa.Column('talk_time', sa.Integer(), nullable=True),
+    sa.Column('hold_time', sa.Integer(), nullable=True),
+    sa.Column('wait_time', sa.Integer(), nullable=True),
+    sa.Column('quality_score', sa.Float(), nullable=True),
+    sa.Column('recording_url', sa.String(), nullable=True),
+    sa.Column('recording_duration', sa.Integer(), nullable=True),
+    sa.Column('transcription_url', sa.String(), nullable=True),
+    sa.Column('transcription_text', sa.Text(), nullable=True),
+    sa.Column('disposition', sa.String(), nullable=True),
+    sa.Column('hangup_cause', sa.String(), nullable=True),
+    sa.Column('notes', sa.Text(), nullable=True),
+    sa.Column('cost', sa.Float(), nullable=True),
+    sa.Column('cost_currency', sa.String(), nullable=True),
+    sa.Column('cdr_data', sa.JSON(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['agent_id'], ['users.id'], ),
+    sa.ForeignKeyConstraint(['contact_id'], ['contacts.id'], ),
+    sa.ForeignKeyConstraint(['deal_id'], ['deals.id'], ),
+    sa.ForeignKeyConstraint(['extension_id'], ['pbx_extensions.id'], ),
+    sa.ForeignKeyConstraint(['lead_id'], ['leads.id'], ),
+    sa.ForeignKeyConstraint(['organization_id'], ['organizations.id'], ),
+    sa.ForeignKeyConstraint(['provider_id'], ['pbx_providers.id'], ),
+    sa.ForeignKeyConstraint(['queue_id'], ['call_queues.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('unique_id')
+    )
+    _create_table('customer_satisfaction_surveys',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('ticket_id', sa.Integer(), nullable=False),
+    sa.Column('organization_id', sa.Integer(), nullable=False),
+    sa.Column('survey_type', sa.String(), nullable=True),
+    sa.Column('rating', sa.Integer(), nullable=False),
+    sa.Column('nps_score', sa.Integer(), nullable=True),
+    sa.Column('overall_satisfaction', sa.Integer(), nullable=True),
+    sa.Column('response_time_rating', sa.Integer(), nullable=True),
+    sa.Column('resolution_quality_rating', sa.Integer(), nullable=True),
+    sa.Column('agent_knowledge_rating', sa.Integer(), nullable=True),
+    sa.Column('communication_rating', sa.Integer(), nullable=True),
+    sa.Column('what_went_well', sa.Text(), nullable=True),
+    sa.Column('what_could_improve', sa.Text(), nullable=True),
+    sa.Column('additional_comments', sa.Text(), nullable=True),
+    sa.Column('follow_up_required', sa.Boolean(), nullable=True),
+    sa.Column('follow_up_notes', sa.Text(), nullable=True),
+    sa.Column('follow_up_assigned_to', sa.Integer(), nullable=True),
+    sa.Column('submitted_at', sa.DateTime(), nullable=True),
+    sa.Column('customer_email', sa.String(), nullable=False),
+    sa.Column('customer_name', sa.String(), nullable=False),
+    sa.ForeignKeyConstraint(['follow_up_assigned_to'], ['users.id'], ),
+    sa.ForeignKeyConstraint(['organization_id'], ['organizations.id'], ),
+    sa.ForeignKeyConstraint(['ticket_id'], ['support_tickets.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    _create_table('support_comments',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('ticket_id', sa.Integer(), nullable=False),
+    sa.Column('author_id', sa.Integer(), nullable=True),
+    sa.Column('author_name', sa.String(), nullable=False),
+    sa.Column('author_email', sa.String(), nullable=False),
+    sa.Column('author_type', sa.String(), nullable=True),
+    sa.Column('content', sa.Text(), nullable=False),
+    sa.Column('is_internal', sa.Boolean(), nullable=True),
+    sa.Column('comment_type', sa.String(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['author_id'], ['users.id'], ),
+    sa.ForeignKeyConstraint(['ticket_id'], ['support_tickets.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    _create_table('call_activities',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('call_id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=True),
+    sa.Column('activity_type', sa.String(), nullable=False),
+    sa.Column('activity_data', sa.JSON(), nullable=True),
+    sa.Column('timestamp', sa.DateTime(), nullable=False),
+    sa.Column('duration', sa.Integer(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['call_id'], ['calls.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    _create_table('campaign_calls',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('campaign_id', sa.Integer(), nullable=False),
+    sa.Column('call_id', sa.Integer(), nullable=False),
+    sa.Column('target_contact_id', sa.Integer(), nullable=True),
+    sa.Column('target_lead_id', sa.Integer(), nullable=True),
+    sa.Column('attempt_number', sa.Integer(), nullable=True),
+    sa.Column('scheduled_time', sa.DateTime(), nullable=True),
+    sa.Column('actual_call_time', sa.DateTime(), nullable=True),
+    sa.Column('outcome', sa.String(), nullable=True),
+    sa.Column('disposition', sa.String(), nullable=True),
+    sa.Column('notes', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['call_id'], ['calls.id'], ),
+    sa.ForeignKeyConstraint(['campaign_id'], ['call_campaigns.id'], ),
+    sa.ForeignKeyConstraint(['target_contact_id'], ['contacts.id'], ),
+    sa.ForeignKeyConstraint(['target_lead_id'], ['leads.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    _create_table('support_attachments',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('ticket_id', sa.Integer(), nullable=False),
+    sa.Column('comment_id', sa.Integer(), nullable=True),
+    sa.Column('filename', sa.String(), nullable=False),
+    sa.Column('original_filename', sa.String(), nullable=False),
+    sa.Column('file_path', sa.String(), nullable=False),
+    sa.Column('file_size', sa.Integer(), nullable=False),
+    sa.Column('mime_type', sa.String(), nullable=False),
+    sa.Column('uploaded_by_id', sa.Integer(), nullable=True),
+    sa.Column('uploaded_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['comment_id'], ['support_comments.id'], ),
+    sa.ForeignKeyConstraint(['ticket_id'], ['support_tickets.id'], ),
+    sa.ForeignKeyConstraint(['uploaded_by_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for name in reversed(TABLES):
+        op.drop_table(name)
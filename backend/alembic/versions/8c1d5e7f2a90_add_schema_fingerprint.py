@@ -0,0 +1,39 @@
+"""Add schema_fingerprint table
+
+Revision ID: 8c1d5e7f2a90
+Revises: 3f6a9c2d4b1e
+Create Date: 2026-10-17 14:05:12.402117
+
+Holds the hash of the model DDL and the hash of the live catalog, recorded
+once the database has been compared with the models. The app compares them
+(and alembic_version) at boot instead of running metadata.create_all(); see
+api/schema_check.py. alembic/env.py records them after every upgrade that
+reaches head.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8c1d5e7f2a90'
+down_revision: Union[str, Sequence[str], None] = '3f6a9c2d4b1e'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'schema_fingerprint',
+        sa.Column('revision', sa.String(length=32), primary_key=True),
+        sa.Column('fingerprint', sa.String(length=64), nullable=False),
+        sa.Column('catalog_fingerprint', sa.String(length=64), nullable=True),
+        sa.Column('recorded_at', sa.DateTime(), nullable=False),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('schema_fingerprint')
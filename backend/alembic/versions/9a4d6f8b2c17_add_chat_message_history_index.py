@@ -0,0 +1,41 @@
+"""Add chat message history index
+
+Revision ID: 9a4d6f8b2c17
+Revises: 5b7e2c9d1f43
+Create Date: 2026-10-17 18:02:55.731448
+
+Room history is paged newest first by (created_at, id) over messages that are
+not deleted (chat.get_room_messages, keyset cursor). Partial on
+deleted_at IS NULL to match that filter; built CONCURRENTLY like the other
+tenant indexes.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9a4d6f8b2c17'
+down_revision: Union[str, Sequence[str], None] = '5b7e2c9d1f43'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_chat_messages_room_created_at', 'chat_messages', ['room_id', 'created_at'],
+            if_not_exists=True, postgresql_concurrently=True,
+            postgresql_where=sa.text('deleted_at IS NULL'),
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_chat_messages_room_created_at', table_name='chat_messages',
+            if_exists=True, postgresql_concurrently=True,
+        )
@@ -0,0 +1,40 @@
+"""Add kanban stage page index
+
+Revision ID: a7c3e9f1d205
+Revises: e2b8d4f6a013
+Create Date: 2026-10-17 21:02:37.519840
+
+The lazy-loading board reads each stage's cards newest first and pages with
+a (created_at, id) cursor; (organization_id, stage_id, created_at, id) lets
+every page start with an index seek and read the page in cursor order, ties
+on created_at included. Built CONCURRENTLY like the other tenant
+indexes.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a7c3e9f1d205'
+down_revision: Union[str, Sequence[str], None] = 'e2b8d4f6a013'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_deals_org_stage_created_at', 'deals', ['organization_id', 'stage_id', 'created_at', 'id'],
+            if_not_exists=True, postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_deals_org_stage_created_at', table_name='deals',
+            if_exists=True, postgresql_concurrently=True,
+        )
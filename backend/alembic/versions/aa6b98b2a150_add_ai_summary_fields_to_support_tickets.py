@@ -21,16 +21,14 @@ depends_on: Union[str, Sequence[str], None] = None
 def upgrade() -> None:
     """Upgrade schema."""
     # ### commands auto generated by Alembic - please adjust! ###
-    op.drop_table('nurturing_steps')
-    op.drop_table('tasks')
-    op.drop_table('approval_requests')
-    op.drop_table('lead_campaign_enrollments')
-    op.drop_table('support_agents')
-    op.drop_table('lead_assignment_rules')
-    op.drop_table('task_templates')
-    op.drop_table('approval_workflows')
-    op.drop_table('approval_steps')
-    op.drop_table('lead_nurturing_campaigns')
+    # Left behind by create_all on older databases; never created by a migration
+    inspector = sa.inspect(op.get_bind())
+    existing = set(inspector.get_table_names())
+    for table in ('nurturing_steps', 'tasks', 'approval_requests', 'lead_campaign_enrollments',
+                  'support_agents', 'lead_assignment_rules', 'task_templates', 'approval_workflows',
+                  'approval_steps', 'lead_nurturing_campaigns'):
+        if table in existing:
+            op.drop_table(table)
     op.alter_column('call_records', 'direction',
                existing_type=sa.VARCHAR(),
                nullable=True,
@@ -54,9 +52,15 @@ def upgrade() -> None:
     op.add_column('payments', sa.Column('contact_id', sa.Integer(), nullable=True))
     op.create_foreign_key(None, 'payments', 'contacts', ['contact_id'], ['id'])
     op.drop_column('pbx_providers', 'context')
-    op.add_column('support_tickets', sa.Column('ai_summary', sa.Text(), nullable=True))
-    op.add_column('support_tickets', sa.Column('ai_summary_generated_at', sa.DateTime(), nullable=True))
-    op.add_column('support_tickets', sa.Column('ai_summary_model', sa.String(), nullable=True))
+    # bb6b98b2a151, on the other branch, adds the same columns
+    ticket_columns = {column['name'] for column in inspector.get_columns('support_tickets')}
+    for column in (
+        sa.Column('ai_summary', sa.Text(), nullable=True),
+        sa.Column('ai_summary_generated_at', sa.DateTime(), nullable=True),
+        sa.Column('ai_summary_model', sa.String(), nullable=True),
+    ):
+        if column.name not in ticket_columns:
+            op.add_column('support_tickets', column)
     # ### end Alembic commands ###
 
 
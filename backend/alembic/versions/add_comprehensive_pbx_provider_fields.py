@@ -11,7 +11,7 @@ from sqlalchemy.dialects import postgresql
 
 # revision identifiers, used by Alembic.
 revision = 'add_pbx_fields'
-down_revision = '7f8e9d0c1b2a'  # Latest existing migration
+down_revision = '6d2f8a1c4e57'
 branch_labels = None
 depends_on = None
 
@@ -0,0 +1,77 @@
+"""Add deal rank
+
+Revision ID: b5d1f3a8c624
+Revises: a7c3e9f1d205
+Create Date: 2026-10-17 21:48:12.604193
+
+deals.rank keeps the manual card order within a Kanban stage as a fractional
+key (api/deal_ranking.py). COLLATE "C" makes the comparison byte-wise
+whatever the database locale. Existing deals are ranked here, stage by
+stage, in the order the board listed them until now (newest first), so no
+later move has to rank a whole stage.
+
+(organization_id, stage_id, rank, id) replaces the created_at index the
+stage pages used until now. id is the cursor tiebreaker for equal ranks.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from api.deal_ranking import spread_ranks
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b5d1f3a8c624'
+down_revision: Union[str, Sequence[str], None] = 'a7c3e9f1d205'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('deals', sa.Column('rank', sa.String(collation='C'), nullable=True))
+    _rank_existing_deals()
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_deals_org_stage_rank', 'deals', ['organization_id', 'stage_id', 'rank', 'id'],
+            if_not_exists=True, postgresql_concurrently=True,
+        )
+        op.drop_index(
+            'ix_deals_org_stage_created_at', table_name='deals',
+            if_exists=True, postgresql_concurrently=True,
+        )
+
+
+def _rank_existing_deals() -> None:
+    deals = sa.table(
+        'deals', sa.column('id', sa.Integer), sa.column('organization_id', sa.Integer),
+        sa.column('stage_id', sa.Integer), sa.column('rank', sa.String),
+    )
+    bind = op.get_bind()
+    rows = bind.execute(
+        sa.select(deals.c.id, deals.c.organization_id, deals.c.stage_id)
+        .order_by(deals.c.organization_id, deals.c.stage_id, deals.c.id.desc())
+    ).all()
+    stages = {}
+    for deal_id, organization_id, stage_id in rows:
+        stages.setdefault((organization_id, stage_id), []).append(deal_id)
+    update = deals.update().where(deals.c.id == sa.bindparam('deal_id')).values(rank=sa.bindparam('new_rank'))
+    for deal_ids in stages.values():
+        # Listed highest first, like the cards
+        ranks = spread_ranks(len(deal_ids))[::-1]
+        bind.execute(update, [{'deal_id': deal_id, 'new_rank': rank} for deal_id, rank in zip(deal_ids, ranks)])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_deals_org_stage_created_at', 'deals', ['organization_id', 'stage_id', 'created_at', 'id'],
+            if_not_exists=True, postgresql_concurrently=True,
+        )
+        op.drop_index(
+            'ix_deals_org_stage_rank', table_name='deals',
+            if_exists=True, postgresql_concurrently=True,
+        )
+    op.drop_column('deals', 'rank')
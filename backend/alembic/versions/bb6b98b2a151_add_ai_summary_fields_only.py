@@ -20,10 +20,16 @@ depends_on: Union[str, Sequence[str], None] = None
 
 def upgrade() -> None:
     """Upgrade schema."""
-    # Add AI summary fields to support_tickets table
-    op.add_column('support_tickets', sa.Column('ai_summary', sa.Text(), nullable=True))
-    op.add_column('support_tickets', sa.Column('ai_summary_generated_at', sa.DateTime(), nullable=True))
-    op.add_column('support_tickets', sa.Column('ai_summary_model', sa.String(), nullable=True))
+    # Add AI summary fields to support_tickets table. aa6b98b2a150, on the
+    # other branch, adds the same columns; whichever runs second skips them
+    existing = {column['name'] for column in sa.inspect(op.get_bind()).get_columns('support_tickets')}
+    for column in (
+        sa.Column('ai_summary', sa.Text(), nullable=True),
+        sa.Column('ai_summary_generated_at', sa.DateTime(), nullable=True),
+        sa.Column('ai_summary_model', sa.String(), nullable=True),
+    ):
+        if column.name not in existing:
+            op.add_column('support_tickets', column)
 
 
 def downgrade() -> None:
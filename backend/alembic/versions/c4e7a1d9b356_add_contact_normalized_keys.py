@@ -0,0 +1,61 @@
+"""Add normalized contact keys
+
+Revision ID: c4e7a1d9b356
+Revises: 9a4d6f8b2c17
+Create Date: 2026-10-17 19:24:08.413902
+
+contacts.email_normalized / phone_normalized hold the lower-cased email and
+digits-only phone (api/normalization.py) so imports and lead capture can
+find an existing contact through an index. Backfilled with the SQL
+equivalents; the indexes are built CONCURRENTLY like the other tenant
+indexes.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4e7a1d9b356'
+down_revision: Union[str, Sequence[str], None] = '9a4d6f8b2c17'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+EMAIL_NORMALIZED_SQL = "NULLIF(lower(btrim(email)), '')"
+PHONE_NORMALIZED_SQL = "NULLIF(regexp_replace(phone, '[^0-9]', '', 'g'), '')"
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('contacts', sa.Column('email_normalized', sa.String(), nullable=True))
+    op.add_column('contacts', sa.Column('phone_normalized', sa.String(), nullable=True))
+    op.execute(
+        f"UPDATE contacts SET email_normalized = {EMAIL_NORMALIZED_SQL}, "
+        f"phone_normalized = {PHONE_NORMALIZED_SQL} "
+        "WHERE email IS NOT NULL OR phone IS NOT NULL"
+    )
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_contacts_org_email_normalized', 'contacts', ['organization_id', 'email_normalized'],
+            if_not_exists=True, postgresql_concurrently=True,
+        )
+        op.create_index(
+            'ix_contacts_org_phone_normalized', 'contacts', ['organization_id', 'phone_normalized'],
+            if_not_exists=True, postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_contacts_org_phone_normalized', table_name='contacts',
+            if_exists=True, postgresql_concurrently=True,
+        )
+        op.drop_index(
+            'ix_contacts_org_email_normalized', table_name='contacts',
+            if_exists=True, postgresql_concurrently=True,
+        )
+    op.drop_column('contacts', 'phone_normalized')
+    op.drop_column('contacts', 'email_normalized')
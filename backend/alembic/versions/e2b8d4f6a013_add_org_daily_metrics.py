@@ -0,0 +1,68 @@
+"""Add org_daily_metrics rollup
+
+Revision ID: e2b8d4f6a013
+Revises: c4e7a1d9b356
+Create Date: 2026-10-17 20:11:45.207316
+
+Daily per-organization counters (leads/deals created, deals closed, revenue
+closed, activities) kept up to date on every write by api/daily_metrics.py.
+Backfilled here from the raw tables. Rows written by code that predates the
+listener can be corrected with ``python -m api.daily_metrics``.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e2b8d4f6a013'
+down_revision: Union[str, Sequence[str], None] = 'c4e7a1d9b356'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BACKFILL = """
+INSERT INTO org_daily_metrics
+    (organization_id, day, leads_created, deals_created, deals_closed, revenue_closed, activities, updated_at)
+SELECT organization_id, day, sum(leads_created), sum(deals_created), sum(deals_closed),
+       sum(revenue_closed), sum(activities), now()
+FROM (
+    SELECT organization_id, created_at::date AS day,
+           count(*) AS leads_created, 0 AS deals_created, 0 AS deals_closed,
+           0::float AS revenue_closed, 0 AS activities
+    FROM leads WHERE created_at IS NOT NULL GROUP BY 1, 2
+    UNION ALL
+    SELECT organization_id, created_at::date, 0, count(*), 0, 0, 0
+    FROM deals WHERE created_at IS NOT NULL GROUP BY 1, 2
+    UNION ALL
+    SELECT organization_id, closed_at::date, 0, 0, count(*), coalesce(sum(value), 0), 0
+    FROM deals WHERE closed_at IS NOT NULL GROUP BY 1, 2
+    UNION ALL
+    SELECT d.organization_id, a.timestamp::date, 0, 0, 0, 0, count(*)
+    FROM activities a JOIN deals d ON d.id = a.deal_id
+    WHERE a.timestamp IS NOT NULL GROUP BY 1, 2
+) counts
+WHERE organization_id IS NOT NULL
+GROUP BY organization_id, day
+"""
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'org_daily_metrics',
+        sa.Column('organization_id', sa.Integer(), primary_key=True),
+        sa.Column('day', sa.Date(), primary_key=True),
+        sa.Column('leads_created', sa.Integer(), nullable=False),
+        sa.Column('deals_created', sa.Integer(), nullable=False),
+        sa.Column('deals_closed', sa.Integer(), nullable=False),
+        sa.Column('revenue_closed', sa.Float(), nullable=False),
+        sa.Column('activities', sa.Integer(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+    )
+    op.execute(BACKFILL)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('org_daily_metrics')
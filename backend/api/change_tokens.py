@@ -0,0 +1,253 @@
+"""
+Per-organization change tokens for conditional GETs.
+
+Every commit that inserted, updated or deleted a tracked model bumps a
+version counter per (organization, scope) in ``org_change_versions``, so the
+token is consistent across workers. Reading a token is a single primary-key
+lookup:
+
+    scope       bumped by
+    contacts    Contact
+    leads       Lead
+    board       Deal (incl. watchers/tags), Contact, User, Stage (shared, org 0)
+    dashboard   Deal, Lead, Contact, Activity
+
+Endpoints turn the versions into a weak ETag and answer ``If-None-Match`` with
+304 before running their query:
+
+    @router.get("/metrics", dependencies=[Depends(conditional_get("dashboard"))])
+
+Flushes only note the changed pairs. The counters are bumped as the last
+statement of the writer's own transaction, just before COMMIT, so the write
+and its bump commit or roll back together. The lock on a counter row is held
+only for the COMMIT round trip, so writers to one org do not queue behind
+each other for the rest of their transactions.
+
+Writes that bypass the ORM unit of work (``query.update()``, raw SQL) must call
+``record_changes()`` themselves.
+
+In-process caches subscribe with ``@on_commit``: after each commit they get
+the (organization, scope) pairs that transaction changed. Transactions that
+roll back notify nobody.
+"""
+import hashlib
+import logging
+import time
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from fastapi import Depends, HTTPException, Request, Response
+from sqlalchemy import event, select, tuple_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from .dependencies import get_current_user, get_db
+from .models import Activity, Contact, Deal, Lead, OrgChangeVersion, Stage, User
+from .singleton import share_module
+
+share_module(__name__)
+
+logger = logging.getLogger(__name__)
+
+SHARED_ORG = 0
+
+# model -> scopes it invalidates
+TRACKED_SCOPES = {
+    Contact: ("contacts", "board", "dashboard"),
+    Lead: ("leads", "dashboard"),
+    Deal: ("board", "dashboard"),
+    User: ("board",),
+    Stage: ("board",),
+    Activity: ("dashboard",),
+}
+
+# Models without organization_id
+_SHARED_MODELS = (Stage,)
+
+# The models module exists once per import root (backend.api / api), so
+# objects are matched by table rather than by class
+SCOPES_BY_TABLE = {model.__tablename__: scopes for model, scopes in TRACKED_SCOPES.items()}
+_SHARED_TABLES = {model.__tablename__ for model in _SHARED_MODELS}
+
+ETAG_HEADERS = {"Cache-Control": "private, no-cache"}
+
+# session.info key for pairs changed in the current transaction
+_PENDING_CHANGES = "change_tokens_pending"
+
+_commit_listeners: List[Callable[[Set[Tuple[int, str]]], None]] = []
+
+
+def _changed_pairs(session: Session) -> Set[Tuple[int, str]]:
+    pairs = set()
+    activity_deal_ids = set()
+    for state, objects in (("new", session.new), ("dirty", session.dirty), ("deleted", session.deleted)):
+        for obj in objects:
+            table = getattr(obj, "__tablename__", None)
+            scopes = SCOPES_BY_TABLE.get(table)
+            if scopes is None:
+                continue
+            if state == "dirty" and not session.is_modified(obj, include_collections=True):
+                continue
+            if table in _SHARED_TABLES:
+                org_id = SHARED_ORG
+            elif table == Activity.__tablename__:
+                # Activities belong to an org through their deal; resolved below in one query
+                if obj.deal_id is not None:
+                    activity_deal_ids.add(obj.deal_id)
+                continue
+            else:
+                org_id = obj.organization_id
+            if org_id is not None:
+                pairs.update((org_id, scope) for scope in scopes)
+
+    if activity_deal_ids:
+        org_ids = session.connection().execute(
+            select(Deal.organization_id).where(Deal.id.in_(activity_deal_ids)).distinct()
+        ).scalars()
+        pairs.update((org_id, scope) for org_id in org_ids for scope in SCOPES_BY_TABLE[Activity.__tablename__])
+    return pairs
+
+
+def bump_versions(connection, pairs: Iterable[Tuple[int, str]]):
+    """Increment the counters for (organization_id, scope) pairs on ``connection``."""
+    pairs = sorted(set(pairs))  # fixed lock order: concurrent writers cannot deadlock
+    if not pairs:
+        return
+    insert = pg_insert if connection.dialect.name == "postgresql" else sqlite_insert
+    table = OrgChangeVersion.__table__
+    now = datetime.utcnow()
+    statement = insert(table).values([
+        {"organization_id": org_id, "scope": scope, "version": 1, "updated_at": now} for org_id, scope in pairs
+    ])
+    statement = statement.on_conflict_do_update(
+        index_elements=[table.c.organization_id, table.c.scope],
+        set_={"version": table.c.version + 1, "updated_at": statement.excluded.updated_at},
+    )
+    connection.execute(statement)
+
+
+def record_changes(session: Session, pairs: Iterable[Tuple[int, str]]):
+    """Bump the counters when the session's transaction commits, then notify ``on_commit`` listeners."""
+    pairs = set(pairs)
+    if pairs:
+        session.info.setdefault(_PENDING_CHANGES, set()).update(pairs)
+
+
+def on_commit(listener: Callable[[Set[Tuple[int, str]]], None]):
+    """Register ``listener(pairs)`` to run after every commit that changed tracked rows."""
+    _commit_listeners.append(listener)
+    return listener
+
+
+@event.listens_for(Session, "after_flush")
+def _note_after_flush(session, flush_context):
+    record_changes(session, _changed_pairs(session))
+
+
+@event.listens_for(Session, "before_commit")
+def _bump_before_commit(session):
+    # Savepoints are released without a bump; the outermost commit does it
+    if session.in_nested_transaction():
+        return
+    # The commit's own flush has not run yet; its changes must be noted too
+    session.flush()
+    pairs = session.info.get(_PENDING_CHANGES)
+    if pairs:
+        bump_versions(session.connection(), pairs)
+
+
+@event.listens_for(Session, "after_commit")
+def _notify_after_commit(session):
+    pairs = session.info.pop(_PENDING_CHANGES, None)
+    if not pairs:
+        return
+    for listener in _commit_listeners:
+        try:
+            listener(pairs)
+        except Exception:
+            logger.exception(f"Commit listener {listener!r} failed")
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _discard_uncommitted(session, transaction):
+    # Runs after after_commit; anything still pending was rolled back or abandoned
+    if transaction.parent is None:
+        session.info.pop(_PENDING_CHANGES, None)
+
+
+def read_versions(db: Session, organization_id: int, scopes: Iterable[str]) -> Dict[Tuple[int, str], int]:
+    keys = [(org_id, scope) for scope in scopes for org_id in (organization_id, SHARED_ORG)]
+    rows = db.execute(
+        select(OrgChangeVersion.organization_id, OrgChangeVersion.scope, OrgChangeVersion.version)
+        .where(tuple_(OrgChangeVersion.organization_id, OrgChangeVersion.scope).in_(keys))
+    )
+    return {(org_id, scope): version for org_id, scope, version in rows}
+
+
+def change_token(db: Session, organization_id: int, scopes: Iterable[str], refresh_seconds: int = None) -> str:
+    """Weak ETag for ``scopes`` of one organization.
+
+    ``refresh_seconds`` mixes in a time bucket for payloads that also depend on
+    the clock ("5 min ago"), so they are revalidated at least that often.
+    """
+    scopes = tuple(scopes)
+    versions = read_versions(db, organization_id, scopes)
+    parts = [f"{organization_id}"] + [
+        f"{scope}:{versions.get((organization_id, scope), 0)}.{versions.get((SHARED_ORG, scope), 0)}"
+        for scope in scopes
+    ]
+    if refresh_seconds:
+        parts.append(str(int(time.time() // refresh_seconds)))
+    digest = hashlib.sha1("|".join(parts).encode("utf-8")).hexdigest()[:20]
+    return f'W/"{digest}"'
+
+
+async def change_token_async(db, organization_id: int, scopes: Iterable[str], refresh_seconds: int = None) -> str:
+    """change_token() for an AsyncSession."""
+    return await db.run_sync(lambda session: change_token(session, organization_id, scopes, refresh_seconds))
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison, as RFC 9110 requires for If-None-Match."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if (candidate[2:] if candidate.startswith("W/") else candidate) == opaque:
+            return True
+    return False
+
+
+def etag_headers(etag: str) -> dict:
+    return {"ETag": etag, **ETAG_HEADERS}
+
+
+def not_modified(request: Request, etag: str) -> Optional[Response]:
+    """A 304 response when the client already has ``etag``, else None."""
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=etag_headers(etag))
+    return None
+
+
+def conditional_get(*scopes: str, refresh_seconds: int = None):
+    """Dependency: sets ETag on the response, or ends the request with 304.
+
+    Returns the ETag, for endpoints that build their own Response.
+    """
+    def dependency(
+        request: Request,
+        response: Response,
+        current_user: User = Depends(get_current_user),
+        db: Session = Depends(get_db),
+    ) -> str:
+        etag = change_token(db, current_user.organization_id, scopes, refresh_seconds)
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            raise HTTPException(status_code=304, headers=etag_headers(etag))
+        response.headers.update(etag_headers(etag))
+        return etag
+
+    return dependency
@@ -0,0 +1,190 @@
+"""
+Response compression (brotli or gzip) as pure ASGI middleware.
+
+Picks brotli when the client accepts it and the ``brotli`` package is
+installed, gzip otherwise. Responses are left alone when they are:
+
+- not a compressible type (JSON, NDJSON, text, JS, SVG, ...)
+- already encoded (the precompressed static assets in api/static_assets.py)
+- marked ``Cache-Control: no-transform``, or 204/304
+- complete in one body message smaller than ``COMPRESSION_MIN_SIZE`` bytes
+
+Streaming responses (more than one body message) are compressed
+incrementally: every chunk is flushed to the client as it arrives, so
+NDJSON/CSV exports and server-sent events are not held back by the encoder.
+
+    COMPRESSION_MIN_SIZE        bytes below which a response is sent as is (default 1024)
+    COMPRESSION_GZIP_LEVEL      zlib level for responses (default 6)
+    COMPRESSION_BROTLI_QUALITY  brotli quality for responses (default 4)
+"""
+import os
+import zlib
+
+try:
+    import brotli
+except ImportError:  # gzip only
+    brotli = None
+
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+COMPRESSION_GZIP_LEVEL = int(os.getenv("COMPRESSION_GZIP_LEVEL", "6"))
+COMPRESSION_BROTLI_QUALITY = int(os.getenv("COMPRESSION_BROTLI_QUALITY", "4"))
+
+COMPRESSIBLE_TYPES = (
+    "application/json",
+    "application/x-ndjson",
+    "application/javascript",
+    "application/xml",
+    "application/manifest+json",
+    "image/svg+xml",
+    "text/",
+)
+
+
+def is_compressible(content_type: str) -> bool:
+    content_type = (content_type or "").split(";", 1)[0].strip().lower()
+    return content_type.startswith(COMPRESSIBLE_TYPES)
+
+
+def choose_encoding(accept_encoding: str):
+    """'br', 'gzip' or None for an Accept-Encoding header value."""
+    accepted = set()
+    for part in (accept_encoding or "").lower().split(","):
+        coding, _, params = part.strip().partition(";")
+        params = params.replace(" ", "")
+        if params.startswith("q="):
+            try:
+                if float(params[2:]) <= 0:
+                    continue
+            except ValueError:
+                continue
+        accepted.add(coding.strip())
+    if brotli is not None and ("br" in accepted or "*" in accepted):
+        return "br"
+    if "gzip" in accepted or "*" in accepted:
+        return "gzip"
+    return None
+
+
+class _Encoder:
+    """Incremental encoder; ``compress`` returns bytes ready to send."""
+
+    def __init__(self, encoding: str, gzip_level: int, brotli_quality: int):
+        self.encoding = encoding
+        if encoding == "br":
+            self._brotli = brotli.Compressor(quality=brotli_quality)
+        else:
+            # wbits 16+ produces a gzip container
+            self._zlib = zlib.compressobj(gzip_level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data: bytes, flush: bool = False) -> bytes:
+        if self.encoding == "br":
+            out = self._brotli.process(data)
+            return out + self._brotli.flush() if flush else out
+        out = self._zlib.compress(data)
+        return out + self._zlib.flush(zlib.Z_SYNC_FLUSH) if flush else out
+
+    def finish(self, data: bytes = b"") -> bytes:
+        if self.encoding == "br":
+            return self._brotli.process(data) + self._brotli.finish()
+        return self._zlib.compress(data) + self._zlib.flush(zlib.Z_FINISH)
+
+
+def compress_bytes(data: bytes, encoding: str, gzip_level: int = 9, brotli_quality: int = 11) -> bytes:
+    """One-shot compression (used for precompressed static assets)."""
+    return _Encoder(encoding, gzip_level, brotli_quality).finish(data)
+
+
+def _add_vary(headers: list):
+    for index, (name, value) in enumerate(headers):
+        if name.lower() == b"vary":
+            if b"accept-encoding" not in value.lower():
+                headers[index] = (name, value + b", Accept-Encoding")
+            return
+    headers.append((b"vary", b"Accept-Encoding"))
+
+
+class CompressionMiddleware:
+    def __init__(
+        self,
+        app,
+        minimum_size: int = COMPRESSION_MIN_SIZE,
+        gzip_level: int = COMPRESSION_GZIP_LEVEL,
+        brotli_quality: int = COMPRESSION_BROTLI_QUALITY,
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = None
+        for name, value in scope.get("headers", []):
+            if name == b"accept-encoding":
+                encoding = choose_encoding(value.decode("latin-1"))
+                break
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+        encoder = None
+        passthrough = False
+
+        async def send_wrapper(message):
+            nonlocal start_message, encoder, passthrough
+            message_type = message["type"]
+
+            if message_type == "http.response.start":
+                start_message = message
+                headers = {name.lower(): value for name, value in message.get("headers", [])}
+                passthrough = (
+                    message["status"] in (204, 304)
+                    or b"content-encoding" in headers
+                    or b"no-transform" in headers.get(b"cache-control", b"").lower()
+                    or not is_compressible(headers.get(b"content-type", b"").decode("latin-1"))
+                )
+                if passthrough:
+                    await send(message)
+                return
+
+            if message_type != "http.response.body" or passthrough:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+
+            if encoder is None:
+                if not more_body and len(body) < self.minimum_size:
+                    # Small, complete response: compression would not pay off
+                    passthrough = True
+                    await send(start_message)
+                    await send(message)
+                    return
+
+                encoder = _Encoder(encoding, self.gzip_level, self.brotli_quality)
+                headers = [
+                    (name, value) for name, value in start_message.get("headers", [])
+                    if name.lower() != b"content-length"
+                ]
+                headers.append((b"content-encoding", encoding.encode("latin-1")))
+                _add_vary(headers)
+                if not more_body:
+                    compressed = encoder.finish(body)
+                    headers.append((b"content-length", str(len(compressed)).encode("latin-1")))
+                    await send(dict(start_message, headers=headers))
+                    await send({"type": "http.response.body", "body": compressed})
+                    return
+                await send(dict(start_message, headers=headers))
+
+            if more_body:
+                # Flush per chunk so streamed rows reach the client immediately
+                await send({"type": "http.response.body", "body": encoder.compress(body, flush=True), "more_body": True})
+            else:
+                await send({"type": "http.response.body", "body": encoder.finish(body)})
+
+        await self.app(scope, receive, send_wrapper)
@@ -0,0 +1,70 @@
+"""
+Batch loaders for deal watchers and tags.
+
+``deal.watchers`` / ``deal.tags`` lazy-load one deal at a time, so a list
+that touches them costs one query per deal. These loaders read the relation
+for a whole set of deals with one query over the association table and
+return it keyed by deal id:
+
+    watchers = watchers_by_deal(db, Deal.id.in_(deal_ids))
+    tags = tags_by_deal(db, Deal.organization_id == organization_id)
+
+``where`` is any condition on Deal: an id list for a page of cards, the org
+for a whole board (cheaper than a long IN list). Used by the Kanban
+endpoints and the AI data access layer (ai/data_access.py).
+"""
+from typing import Dict, Iterable, List
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from api.models import Deal, DealTag, Tag, User, Watcher
+
+
+def watchers_by_deal(db: Session, where) -> Dict[int, List[str]]:
+    """Watcher names per deal id, for the deals matching ``where``."""
+    watchers: Dict[int, List[str]] = {}
+    for deal_id, name in db.execute(
+        select(Watcher.c.deal_id, User.name)
+        .join(User, Watcher.c.user_id == User.id)
+        .join(Deal, Watcher.c.deal_id == Deal.id)
+        .where(where)
+        .order_by(Watcher.c.deal_id, User.name)
+    ):
+        watchers.setdefault(deal_id, []).append(name)
+    return watchers
+
+
+def tags_by_deal(db: Session, where) -> Dict[int, List[dict]]:
+    """Tags ({id, label, color}) per deal id, for the deals matching ``where``."""
+    tags: Dict[int, List[dict]] = {}
+    for deal_id, tag_id, label, color in db.execute(
+        select(DealTag.c.deal_id, Tag.id, Tag.label, Tag.color)
+        .join(Tag, DealTag.c.tag_id == Tag.id)
+        .join(Deal, DealTag.c.deal_id == Deal.id)
+        .where(where)
+        .order_by(DealTag.c.deal_id, Tag.label)
+    ):
+        tags.setdefault(deal_id, []).append({"id": tag_id, "label": label, "color": color})
+    return tags
+
+
+def for_deals(deal_ids: Iterable[int]):
+    """``where`` condition for an explicit set of deals."""
+    return Deal.id.in_(list(deal_ids))
+
+
+def attach_watchers_and_tags(db: Session, deals: List[dict], where=None):
+    """Fill in ``watchers`` and ``tags`` of card dicts: two queries for any number of deals.
+
+    ``where`` defaults to the cards' own ids.
+    """
+    if not deals:
+        return
+    if where is None:
+        where = for_deals(deal["id"] for deal in deals)
+    watchers = watchers_by_deal(db, where)
+    tags = tags_by_deal(db, where)
+    for deal in deals:
+        deal["watchers"] = watchers.get(deal["id"], [])
+        deal["tags"] = tags.get(deal["id"], [])
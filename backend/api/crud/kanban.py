@@ -1,55 +1,166 @@
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import Dict, List, Optional, Sequence, Tuple
+from collections import Counter, defaultdict
+from dataclasses import dataclass
 from datetime import datetime
-from api.models import Deal, Stage, Contact, User
-from api.schemas.kanban import DealCreate, DealUpdate, StageCreate, StageUpdate
+from sqlalchemy import Integer, bindparam, cast, column, func, select, union_all, update, values
+from api.models import Deal, DealTag, Stage, Contact, User
+from api.schemas.kanban import DealCreate, DealUpdate, StageCreate, StageUpdate, StageOut, DealOut
+from api.fast_json import rows_to_dicts, schema_columns
+from api.pagination import keyset_order, paginate, split_page
+from api.crud.deal_relations import attach_watchers_and_tags
+from api.deal_ranking import lock_stage, place_deal, ranks_for_drop, top_rank
+from api.change_tokens import SCOPES_BY_TABLE, record_changes
+from api.daily_metrics import apply_deltas
+
+# Cards per stage on the first paint, and the most a stage page may ask for
+BOARD_PAGE_SIZE = 20
+MAX_BOARD_PAGE_SIZE = 200
+
+# Cards are listed in manual order (rank DESC, then newest first on equal ranks);
+# pages seek on ix_deals_org_stage_rank
+CARD_SORT_COLUMN = Deal.rank
+
+
+@dataclass
+class DealFilters:
+    """Server-side board filters; applied to stage totals and cards alike."""
+    owner_id: Optional[int] = None
+    tag_id: Optional[int] = None
+    min_value: Optional[float] = None
+    max_value: Optional[float] = None
+    search: Optional[str] = None
+
+    def clauses(self) -> list:
+        clauses = []
+        if self.owner_id is not None:
+            clauses.append(Deal.owner_id == self.owner_id)
+        if self.tag_id is not None:
+            clauses.append(Deal.id.in_(select(DealTag.c.deal_id).where(DealTag.c.tag_id == self.tag_id)))
+        if self.min_value is not None:
+            clauses.append(Deal.value >= self.min_value)
+        if self.max_value is not None:
+            clauses.append(Deal.value <= self.max_value)
+        if self.search:
+            clauses.append(Deal.title.icontains(self.search, autoescape=True))
+        return clauses
+
+
+def _card_statement(organization_id: Optional[int], filters: Optional[DealFilters] = None):
+    """DealOut columns for the org's deals, or any deal when ``organization_id`` is None.
+
+    Watchers and tags are filled in afterwards by attach_watchers_and_tags().
+    """
+    statement = (
+        select(*schema_columns(
+            Deal, DealOut,
+            contact_name=Contact.name,
+            owner_name=User.name,
+            stage_name=Stage.name,
+            watchers=None,
+            tags=None,
+        ))
+        .outerjoin(Contact, Deal.contact_id == Contact.id)
+        .outerjoin(User, Deal.owner_id == User.id)
+        .outerjoin(Stage, Deal.stage_id == Stage.id)
+        .where(*(filters.clauses() if filters else ()))
+    )
+    if organization_id is not None:
+        statement = statement.where(Deal.organization_id == organization_id)
+    return statement
+
 
 def get_kanban_board(db: Session, organization_id: int):
     """
-    Get all stages with their associated deals for the Kanban board
+    Get all stages with their associated deals for the Kanban board.
+
+    Selects exactly the KanbanBoard schema columns and returns plain dicts, so
+    the router can encode them with orjson without building ORM objects or
+    re-validating (see api/fast_json.py). Watchers and tags come from one
+    extra query each for the whole board instead of a lazy load per deal.
     """
-    stages = db.query(Stage).order_by(Stage.order).all()
-    
-    # Get all deals with related data
-    deals = (
-        db.query(
-            Deal,
-            Contact.name.label("contact_name"),
-            User.name.label("owner_name"),
-            Stage.name.label("stage_name")
-        )
-        .join(Contact, Deal.contact_id == Contact.id, isouter=True)
-        .join(User, Deal.owner_id == User.id, isouter=True)
-        .join(Stage, Deal.stage_id == Stage.id, isouter=True)
-        .filter(Deal.organization_id == organization_id)
-        .all()
+    stages = rows_to_dicts(db.execute(
+        select(*schema_columns(Stage, StageOut)).order_by(Stage.order)
+    ))
+    deals = rows_to_dicts(db.execute(
+        _card_statement(organization_id).order_by(Deal.stage_id, *keyset_order(CARD_SORT_COLUMN, Deal.id))
+    ))
+    attach_watchers_and_tags(db, deals, Deal.organization_id == organization_id)
+    return {"stages": stages, "deals": deals}
+
+def get_stage_totals(db: Session, organization_id: int, filters: Optional[DealFilters] = None) -> Dict[int, Tuple[int, float]]:
+    """(deal count, value sum) per stage from one grouped query."""
+    rows = db.execute(
+        select(Deal.stage_id, func.count(), func.coalesce(func.sum(Deal.value), 0))
+        .where(Deal.organization_id == organization_id, *(filters.clauses() if filters else ()))
+        .group_by(Deal.stage_id)
     )
-    
-    # Convert to list of dicts for easier processing
-    deal_list = []
-    for deal, contact_name, owner_name, stage_name in deals:
-        # Create a clean dict without SQLAlchemy internal attributes
-        deal_dict = {
-            "id": deal.id,
-            "title": deal.title,
-            "description": deal.description,
-            "value": deal.value,
-            "contact_id": deal.contact_id,
-            "owner_id": deal.owner_id,
-            "stage_id": deal.stage_id,
-            "reminder_date": deal.reminder_date,
-            "created_at": deal.created_at,
-            "contact_name": contact_name,
-            "owner_name": owner_name,
-            "stage_name": stage_name,
-        }
-        
-        # Get watchers for this deal
-        deal_dict["watchers"] = [user.name for user in deal.watchers]
-        
-        deal_list.append(deal_dict)
-    
-    return {"stages": stages, "deals": deal_list}
+    return {stage_id: (count, float(total)) for stage_id, count, total in rows}
+
+def get_kanban_board_columns(
+    db: Session, organization_id: int, filters: Optional[DealFilters] = None, per_stage: int = BOARD_PAGE_SIZE
+):
+    """
+    First paint of the board: every stage with its filtered deal count and
+    value sum, its first ``per_stage`` cards and the cursor for the rest.
+
+    Five queries whatever the size of the org: stages, the grouped totals,
+    one UNION ALL of a per-stage LIMIT (each branch an index seek), and the
+    watchers and tags of the cards returned.
+    """
+    stages = rows_to_dicts(db.execute(
+        select(*schema_columns(Stage, StageOut)).order_by(Stage.order)
+    ))
+    totals = get_stage_totals(db, organization_id, filters)
+
+    cards = {}
+    if stages:
+        pages = [
+            select(paginate(
+                _card_statement(organization_id, filters).where(Deal.stage_id == stage["id"]),
+                CARD_SORT_COLUMN, Deal.id, None, per_stage,
+            ).subquery())
+            for stage in stages
+        ]
+        statement = union_all(*pages)
+        columns = statement.selected_columns
+        statement = statement.order_by(columns.stage_id, *keyset_order(columns[CARD_SORT_COLUMN.key], columns.id))
+        for deal in rows_to_dicts(db.execute(statement)):
+            cards.setdefault(deal["stage_id"], []).append(deal)
+
+    visible = []
+    for stage in stages:
+        deals, next_cursor = split_page(cards.get(stage["id"], []), per_stage, CARD_SORT_COLUMN.key)
+        count, value_sum = totals.get(stage["id"], (0, 0.0))
+        stage.update(deal_count=count, value_sum=value_sum, deals=deals, next_cursor=next_cursor)
+        visible.extend(deals)
+    attach_watchers_and_tags(db, visible)
+    return {"stages": stages}
+
+def get_stage_deals(
+    db: Session,
+    organization_id: int,
+    stage_id: int,
+    filters: Optional[DealFilters] = None,
+    cursor: Optional[str] = None,
+    limit: int = BOARD_PAGE_SIZE,
+) -> Tuple[List[dict], Optional[str]]:
+    """One page of a stage's cards after ``cursor``; returns (cards, next cursor or None)."""
+    statement = paginate(
+        _card_statement(organization_id, filters).where(Deal.stage_id == stage_id),
+        CARD_SORT_COLUMN, Deal.id, cursor, limit,
+    )
+    deals, next_cursor = split_page(rows_to_dicts(db.execute(statement)), limit, CARD_SORT_COLUMN.key)
+    attach_watchers_and_tags(db, deals)
+    return deals, next_cursor
+
+def get_deal_card(db: Session, deal_id: int, organization_id: Optional[int] = None) -> Optional[dict]:
+    """One deal in the DealOut shape, with its watchers and tags."""
+    deal = rows_to_dicts(db.execute(_card_statement(organization_id).where(Deal.id == deal_id)))
+    if not deal:
+        return None
+    attach_watchers_and_tags(db, deal)
+    return deal[0]
 
 def get_stage(db: Session, stage_id: int):
     """Get a single stage by ID"""
@@ -112,8 +223,9 @@ def get_deal(db: Session, deal_id: int):
     )
 
 def create_deal(db: Session, deal: DealCreate):
-    """Create a new deal"""
+    """Create a new deal, on top of its stage"""
     db_deal = Deal(**deal.dict())
+    db_deal.rank = top_rank(db, db_deal.organization_id, db_deal.stage_id)
     db.add(db_deal)
     db.commit()
     db.refresh(db_deal)
@@ -126,6 +238,9 @@ def update_deal(db: Session, deal_id: int, deal: DealUpdate):
         return None
     
     update_data = deal.dict(exclude_unset=True)
+    if "stage_id" in update_data and update_data["stage_id"] != db_deal.stage_id:
+        # Its rank belongs to the old stage; it goes on top of the new one
+        db_deal.rank = top_rank(db, db_deal.organization_id, update_data["stage_id"])
     for field, value in update_data.items():
         setattr(db_deal, field, value)
     
@@ -143,21 +258,206 @@ def delete_deal(db: Session, deal_id: int):
         return True
     return False
 
-def move_deal(db: Session, deal_id: int, new_stage_id: int, new_position: Optional[int] = None):
+def move_deal(
+    db: Session,
+    deal_id: int,
+    new_stage_id: int,
+    new_position: Optional[int] = None,
+    above_deal_id: Optional[int] = None,
+    below_deal_id: Optional[int] = None,
+    organization_id: Optional[int] = None,
+):
     """
-    Move a deal to a new stage and optionally reorder it within that stage
+    Move a deal to a new stage and place it between two cards of that stage:
+    under ``above_deal_id``, over ``below_deal_id``, or at 0-based
+    ``new_position`` (top when none is given). Only the moved deal's row is
+    written (see api/deal_ranking.py). Raises ValueError when a neighbour is
+    not in the stage.
     """
-    db_deal = db.query(Deal).filter(Deal.id == deal_id).first()
+    query = db.query(Deal).filter(Deal.id == deal_id)
+    if organization_id is not None:
+        query = query.filter(Deal.organization_id == organization_id)
+    db_deal = query.first()
     if not db_deal:
         return None
     
-    # Update the stage
-    db_deal.stage_id = new_stage_id
-    
-    # If a new position is provided, you might want to update an 'order' field in the Deal model
-    # For now, we'll just update the stage_id
+    place_deal(db, db_deal, new_stage_id, position=new_position, above_id=above_deal_id, below_id=below_deal_id)
     
     db.add(db_deal)
     db.commit()
     db.refresh(db_deal)
     return db_deal
+
+# --- batch moves and patches --------------------------------------------------
+
+# Deal fields a batch operation may patch
+BATCH_PATCH_FIELDS = ("title", "description", "value", "contact_id", "owner_id", "reminder_date")
+_MOVE_FIELDS = ("to_stage_id", "position", "above_deal_id", "below_deal_id")
+
+class DealBatchError(ValueError):
+    """The whole batch is rejected; ``status_code`` and ``detail`` describe why."""
+
+    def __init__(self, detail, status_code: int = 400):
+        super().__init__(detail if isinstance(detail, str) else detail.get("message", "Deal batch rejected"))
+        self.detail = detail
+        self.status_code = status_code
+
+def _update_deal_rows(db: Session, names: Sequence[str], rows: List[dict]):
+    """UPDATE ``names`` of each row (by id) in one statement.
+
+    Postgres joins the table to a VALUES list; other databases run the same
+    UPDATE as an executemany.
+    """
+    table = Deal.__table__
+    if db.get_bind().dialect.name == "postgresql":
+        patch = values(
+            column("id", Integer), *(column(name, table.c[name].type) for name in names), name="patch"
+        ).data([tuple(row[name] for name in ("id", *names)) for row in rows])
+        # Casts: a VALUES column holding only NULLs would otherwise be text
+        db.execute(
+            update(table).where(table.c.id == patch.c.id)
+            .values({name: cast(patch.c[name], table.c[name].type) for name in names})
+        )
+    else:
+        db.execute(
+            update(table).where(table.c.id == bindparam("row_id"))
+            .values({name: bindparam(name) for name in names}),
+            [{"row_id": row["id"], **{name: row[name] for name in names}} for row in rows],
+        )
+
+def _check_references(db: Session, organization_id: int, operations):
+    """Owners and contacts set by the batch must belong to the organization."""
+    for field, model in (("owner_id", User), ("contact_id", Contact)):
+        wanted = {getattr(op, field) for op in operations if field in op.model_fields_set and getattr(op, field) is not None}
+        if not wanted:
+            continue
+        found = set(db.execute(
+            select(model.id).where(model.id.in_(wanted), model.organization_id == organization_id)
+        ).scalars())
+        if wanted - found:
+            raise DealBatchError(f"Unknown {field}: {sorted(wanted - found)}")
+
+def _check_wip_limits(db: Session, organization_id: int, moves, current, wip_limits: Dict[int, Optional[int]]):
+    """Reject the batch if it takes a stage over its WIP limit (counted after every move).
+
+    Each limited stage's exclusive lock is held until commit, so concurrent
+    batches into one stage count one after the other, each seeing the
+    other's committed moves.
+    """
+    incoming = Counter(op.to_stage_id for op in moves)
+    limited = sorted(stage_id for stage_id in incoming if wip_limits.get(stage_id) is not None)
+    if not limited:
+        return
+    # In stage order, so two batches never wait on each other's locks
+    for stage_id in limited:
+        lock_stage(db, organization_id, stage_id, exclusive=True)
+    moved_ids = [op.deal_id for op in moves]
+    staying = dict(db.execute(
+        select(Deal.stage_id, func.count())
+        .where(Deal.organization_id == organization_id, Deal.stage_id.in_(limited), Deal.id.notin_(moved_ids))
+        .group_by(Deal.stage_id)
+    ).all())
+    leaving = Counter(current[deal_id].stage_id for deal_id in moved_ids)
+    over = []
+    for stage_id in limited:
+        before = staying.get(stage_id, 0) + leaving[stage_id]
+        after = staying.get(stage_id, 0) + incoming[stage_id]
+        # A stage already over its limit may still shrink or stay put
+        if after > wip_limits[stage_id] and after > before:
+            over.append({"stage_id": stage_id, "wip_limit": wip_limits[stage_id], "deal_count": after})
+    if over:
+        raise DealBatchError({"message": "WIP limit exceeded", "stages": over}, status_code=409)
+
+def apply_deal_batch(db: Session, organization_id: int, operations) -> dict:
+    """
+    Apply a list of DealBatchOperation moves and field patches in one
+    transaction, or none of them (DealBatchError).
+
+    Reads are one query each (the deals, their target stages, staying counts
+    for WIP-limited stages, owner/contact checks) plus a neighbour lookup per
+    drop gap. Moves dropped into the same gap share it in the order they are
+    listed. Writes are one set-based UPDATE for all moves and one per distinct
+    set of patched fields.
+    """
+    deal_ids = [op.deal_id for op in operations]
+    if len(set(deal_ids)) != len(deal_ids):
+        raise DealBatchError("Each deal may appear only once per batch")
+    current = {
+        row.id: row for row in db.execute(
+            select(Deal.id, Deal.stage_id, Deal.rank, Deal.value, Deal.closed_at)
+            .where(Deal.organization_id == organization_id, Deal.id.in_(deal_ids))
+        )
+    }
+    missing = [deal_id for deal_id in deal_ids if deal_id not in current]
+    if missing:
+        raise DealBatchError(f"Deals not found: {missing}", status_code=404)
+
+    moves = [op for op in operations if op.model_fields_set & set(_MOVE_FIELDS)]
+    for op in moves:
+        if op.to_stage_id is None:
+            raise DealBatchError(f"Deal {op.deal_id}: to_stage_id is required to move a deal")
+    stage_ids = {op.to_stage_id for op in moves}
+    wip_limits = dict(db.execute(select(Stage.id, Stage.wip_limit).where(Stage.id.in_(stage_ids))).all())
+    if stage_ids - set(wip_limits):
+        raise DealBatchError(f"Unknown stages: {sorted(stage_ids - set(wip_limits))}")
+    _check_wip_limits(db, organization_id, moves, current, wip_limits)
+    _check_references(db, organization_id, operations)
+
+    # New keys per drop gap; a gap is resolved among the cards that stay put
+    moved_ids = {op.deal_id for op in moves}
+    gaps = defaultdict(list)
+    for op in moves:
+        gaps[(op.to_stage_id, op.position, op.above_deal_id, op.below_deal_id)].append(op.deal_id)
+    placed = []
+    for (stage_id, position, above_id, below_id), gap_deal_ids in gaps.items():
+        if above_id in moved_ids or below_id in moved_ids:
+            raise DealBatchError("A card moved in the batch cannot be the drop target of another move")
+        try:
+            ranks = ranks_for_drop(
+                db, organization_id, stage_id, len(gap_deal_ids), moved_ids,
+                position=position, above_id=above_id, below_id=below_id,
+            )
+        except ValueError as e:
+            raise DealBatchError(str(e))
+        placed.extend({"id": deal_id, "stage_id": stage_id, "rank": rank} for deal_id, rank in zip(gap_deal_ids, ranks))
+    if placed:
+        _update_deal_rows(db, ("stage_id", "rank"), placed)
+
+    patch_groups = defaultdict(list)
+    for op in operations:
+        fields = tuple(field for field in BATCH_PATCH_FIELDS if field in op.model_fields_set)
+        if not fields:
+            continue
+        if "title" in fields and not op.title:
+            raise DealBatchError(f"Deal {op.deal_id}: title cannot be empty")
+        patch_groups[fields].append({"id": op.deal_id, **{field: getattr(op, field) for field in fields}})
+    for fields, rows in patch_groups.items():
+        _update_deal_rows(db, fields, rows)
+
+    # The UPDATEs bypass the unit of work: change tokens and the daily rollup by hand
+    record_changes(db, [(organization_id, scope) for scope in SCOPES_BY_TABLE[Deal.__tablename__]])
+    deltas = defaultdict(dict)
+    for rows in (rows for fields, rows in patch_groups.items() if "value" in fields):
+        for row in rows:
+            old = current[row["id"]]
+            if old.closed_at is not None and (row["value"] or 0) != (old.value or 0):
+                key = (organization_id, old.closed_at.date())
+                deltas[key]["revenue_closed"] = deltas[key].get("revenue_closed", 0) + (row["value"] or 0) - (old.value or 0)
+    apply_deltas(db.connection(), deltas)
+    db.commit()
+
+    new_positions = {row["id"]: row for row in placed}
+    return {
+        "moved": len(placed),
+        "updated": sum(len(rows) for rows in patch_groups.values()),
+        "deals": [
+            {
+                "id": deal_id,
+                "from_stage_id": current[deal_id].stage_id,
+                "stage_id": new_positions[deal_id]["stage_id"] if deal_id in new_positions else current[deal_id].stage_id,
+                "rank": new_positions[deal_id]["rank"] if deal_id in new_positions else current[deal_id].rank,
+            }
+            for deal_id in deal_ids
+        ],
+    }
+
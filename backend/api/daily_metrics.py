@@ -0,0 +1,312 @@
+"""
+Per-organization daily metrics rollup (``org_daily_metrics``).
+
+One row per (organization, UTC day) with the counters the dashboard charts:
+
+    leads_created    leads by created_at day
+    deals_created    deals by created_at day
+    deals_closed     deals by closed_at day
+    revenue_closed   sum of value of those deals
+    activities       deal activities by timestamp day
+
+The rows are maintained incrementally. Every ORM flush that creates, updates
+or deletes a lead, deal or activity works out how the object's contribution
+changed (for example, closing a deal adds 1 and its value to the closing day;
+moving created_at moves the +1 to another day). It then upserts those deltas
+in the same transaction as the write. Reads are O(days) instead of O(rows).
+
+Writes that bypass the ORM unit of work (``query.update()``, raw SQL, bulk
+INSERT ... SELECT) must call ``apply_deltas()`` themselves, or be followed by
+a rebuild:
+
+    python -m api.daily_metrics              # rebuild every organization
+    python -m api.daily_metrics --org 3      # rebuild one organization
+
+app.py imports this module, which registers the flush listener.
+"""
+import argparse
+import logging
+from collections import defaultdict
+from datetime import date, datetime
+from typing import Dict, Iterable, Optional, Sequence, Tuple
+
+from sqlalchemy import cast, delete, event, func, inspect, select
+from sqlalchemy import Date as SQLDate
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from .models import Activity, Deal, Lead, OrgDailyMetric
+from .singleton import share_module
+
+share_module(__name__)
+
+logger = logging.getLogger(__name__)
+
+METRICS = ("leads_created", "deals_created", "deals_closed", "revenue_closed", "activities")
+
+# Attributes whose change can move an object's contribution
+_TRACKED_ATTRIBUTES = {
+    "leads": ("organization_id", "created_at"),
+    "deals": ("organization_id", "created_at", "closed_at", "value"),
+    "activities": ("deal_id", "timestamp"),
+}
+
+Deltas = Dict[Tuple[int, date], Dict[str, float]]
+
+
+def _day(value) -> Optional[date]:
+    if isinstance(value, datetime):
+        return value.date()
+    return value
+
+
+def _add(deltas: Deltas, organization_id, day, sign: int, **counts):
+    if organization_id is None or day is None:
+        return
+    row = deltas[(organization_id, day)]
+    for name, count in counts.items():
+        row[name] = row.get(name, 0) + sign * count
+
+
+def _current(obj, attributes: Sequence[str]) -> dict:
+    return {name: getattr(obj, name) for name in attributes}
+
+
+@event.listens_for(Session, "before_flush")
+def _capture_previous(session, flush_context, instances):
+    """Record tracked values as they are in the database, before the flush writes.
+
+    Attribute history has the old value only if it was loaded when the
+    attribute was set (not after a commit expired the object). The rest are
+    read in one query per table.
+    """
+    previous = {}
+    unknown = defaultdict(list)
+    with session.no_autoflush:
+        for obj in list(session.dirty) + list(session.deleted):
+            attributes = _TRACKED_ATTRIBUTES.get(getattr(obj, "__tablename__", None))
+            state = inspect(obj)
+            if attributes is None or state.key is None:
+                continue
+            values = {}
+            for name in attributes:
+                history = state.attrs[name].history
+                if history.deleted:
+                    values[name] = history.deleted[0]
+                elif history.added:
+                    break  # set while expired: old value never loaded
+                else:
+                    values[name] = getattr(obj, name)
+            else:
+                previous[state] = values
+                continue
+            unknown[type(obj)].append(state)
+
+        for model, states in unknown.items():
+            attributes = _TRACKED_ATTRIBUTES[model.__tablename__]
+            by_id = {state.identity[0]: state for state in states}
+            rows = session.connection().execute(
+                select(model.id, *(getattr(model, name) for name in attributes)).where(model.id.in_(by_id))
+            )
+            for row_id, *values in rows:
+                previous[by_id[row_id]] = dict(zip(attributes, values))
+    session.info["daily_metrics_previous"] = previous
+
+
+def _contribute(deltas: Deltas, table: str, values: dict, sign: int, deal_orgs: Dict[int, int]):
+    if table == "leads":
+        _add(deltas, values["organization_id"], _day(values["created_at"]), sign, leads_created=1)
+    elif table == "deals":
+        _add(deltas, values["organization_id"], _day(values["created_at"]), sign, deals_created=1)
+        if values["closed_at"] is not None:
+            _add(
+                deltas, values["organization_id"], _day(values["closed_at"]), sign,
+                deals_closed=1, revenue_closed=values["value"] or 0,
+            )
+    else:
+        _add(deltas, deal_orgs.get(values["deal_id"]), _day(values["timestamp"]), sign, activities=1)
+
+
+def _flush_deltas(session: Session) -> Deltas:
+    previous = session.info.pop("daily_metrics_previous", {})
+    changes = []  # (table, values, sign)
+    for state_name, objects in (("new", session.new), ("dirty", session.dirty), ("deleted", session.deleted)):
+        for obj in objects:
+            table = getattr(obj, "__tablename__", None)
+            attributes = _TRACKED_ATTRIBUTES.get(table)
+            if attributes is None:
+                continue
+            if state_name == "new":
+                changes.append((table, _current(obj, attributes), 1))
+                continue
+            old = previous.get(inspect(obj))
+            if old is None:
+                continue
+            if state_name == "deleted":
+                changes.append((table, old, -1))
+                continue
+            new = _current(obj, attributes)
+            if new != old:
+                changes.append((table, old, -1))
+                changes.append((table, new, 1))
+
+    deltas: Deltas = defaultdict(dict)
+    if not changes:
+        return deltas
+
+    # Activities belong to an org through their deal; resolved in one query
+    deal_ids = {values["deal_id"] for table, values, _ in changes if table == "activities" and values["deal_id"]}
+    deal_orgs = {}
+    if deal_ids:
+        deal_orgs = dict(session.connection().execute(
+            select(Deal.id, Deal.organization_id).where(Deal.id.in_(deal_ids))
+        ).all())
+        # Deals created in this flush are visible to the query; deleted ones are not
+        for obj in session.deleted:
+            if getattr(obj, "__tablename__", None) == "deals":
+                deal_orgs.setdefault(obj.id, obj.organization_id)
+
+    for table, values, sign in changes:
+        _contribute(deltas, table, values, sign, deal_orgs)
+    return deltas
+
+
+def apply_deltas(connection, deltas: Deltas):
+    """Add ``deltas`` ({(organization_id, day): {metric: delta}}) to the rollup on ``connection``."""
+    rows = [
+        (key, counts) for key, counts in sorted(deltas.items())  # fixed lock order, as in change_tokens
+        if any(counts.values())
+    ]
+    if not rows:
+        return
+    insert = pg_insert if connection.dialect.name == "postgresql" else sqlite_insert
+    table = OrgDailyMetric.__table__
+    now = datetime.utcnow()
+    statement = insert(table).values([
+        {
+            "organization_id": organization_id, "day": day, "updated_at": now,
+            **{name: counts.get(name, 0) for name in METRICS},
+        }
+        for (organization_id, day), counts in rows
+    ])
+    statement = statement.on_conflict_do_update(
+        index_elements=[table.c.organization_id, table.c.day],
+        set_={
+            **{name: table.c[name] + statement.excluded[name] for name in METRICS},
+            "updated_at": statement.excluded.updated_at,
+        },
+    )
+    connection.execute(statement)
+
+
+@event.listens_for(Session, "after_flush")
+def _rollup_after_flush(session, flush_context):
+    deltas = _flush_deltas(session)
+    if deltas:
+        apply_deltas(session.connection(), deltas)
+
+
+# --- reads ------------------------------------------------------------------
+
+def monthly_totals(db: Session, organization_id: int, month_ranges: Sequence[Tuple[datetime, datetime]]) -> dict:
+    """``{metric}_{i}`` sums for each [start, end) range, read from the rollup in one query."""
+    day = OrgDailyMetric.day
+    columns = []
+    for i, (start, end) in enumerate(month_ranges):
+        in_month = (day >= _day(start), day < _day(end))
+        columns.extend(
+            func.coalesce(func.sum(getattr(OrgDailyMetric, name)).filter(*in_month), 0).label(f"{name}_{i}")
+            for name in METRICS
+        )
+    if not columns:
+        return {}
+    statement = select(*columns).where(OrgDailyMetric.organization_id == organization_id)
+    return dict(db.execute(statement).mappings().one())
+
+
+# --- rebuild ----------------------------------------------------------------
+
+def _day_expression(column, dialect_name: str):
+    # SQLite has no DATE type to cast to; date() returns the ISO day
+    return func.date(column) if dialect_name == "sqlite" else cast(column, SQLDate)
+
+
+def compute_rollup(db: Session, organization_ids: Optional[Iterable[int]] = None) -> Deltas:
+    """The rollup recomputed from leads, deals and activities (one grouped query each)."""
+    dialect_name = db.get_bind().dialect.name
+    organization_ids = list(organization_ids) if organization_ids is not None else None
+    totals: Deltas = defaultdict(dict)
+
+    def collect(statement, org_column, *metrics):
+        if organization_ids is not None:
+            statement = statement.where(org_column.in_(organization_ids))
+        for organization_id, day, *values in db.execute(statement):
+            if day is None:
+                continue
+            if isinstance(day, str):
+                day = date.fromisoformat(day)
+            _add(totals, organization_id, day, 1, **dict(zip(metrics, values)))
+
+    lead_day = _day_expression(Lead.created_at, dialect_name)
+    collect(
+        select(Lead.organization_id, lead_day, func.count()).group_by(Lead.organization_id, lead_day),
+        Lead.organization_id, "leads_created",
+    )
+    created_day = _day_expression(Deal.created_at, dialect_name)
+    collect(
+        select(Deal.organization_id, created_day, func.count()).group_by(Deal.organization_id, created_day),
+        Deal.organization_id, "deals_created",
+    )
+    closed_day = _day_expression(Deal.closed_at, dialect_name)
+    collect(
+        select(Deal.organization_id, closed_day, func.count(), func.coalesce(func.sum(Deal.value), 0))
+        .where(Deal.closed_at.isnot(None))
+        .group_by(Deal.organization_id, closed_day),
+        Deal.organization_id, "deals_closed", "revenue_closed",
+    )
+    activity_day = _day_expression(Activity.timestamp, dialect_name)
+    collect(
+        select(Deal.organization_id, activity_day, func.count())
+        .select_from(Activity).join(Deal, Activity.deal_id == Deal.id)
+        .group_by(Deal.organization_id, activity_day),
+        Deal.organization_id, "activities",
+    )
+    return totals
+
+
+def rebuild(db: Session, organization_ids: Optional[Iterable[int]] = None) -> int:
+    """Replace the rollup rows (all, or for ``organization_ids``) with recomputed ones.
+
+    Runs in the caller's transaction; returns the number of rows written.
+    """
+    organization_ids = list(organization_ids) if organization_ids is not None else None
+    totals = compute_rollup(db, organization_ids)
+    statement = delete(OrgDailyMetric)
+    if organization_ids is not None:
+        statement = statement.where(OrgDailyMetric.organization_id.in_(organization_ids))
+    db.execute(statement)
+    apply_deltas(db.connection(), totals)
+    return sum(1 for counts in totals.values() if any(counts.values()))
+
+
+def main(argv=None):
+    from .db import get_session_local
+
+    parser = argparse.ArgumentParser(description="Rebuild the org_daily_metrics rollup from the raw tables")
+    parser.add_argument("--org", type=int, action="append", dest="organization_ids",
+                        help="organization id to rebuild (repeatable; default: all)")
+    args = parser.parse_args(argv)
+
+    db = get_session_local()()
+    try:
+        rows = rebuild(db, args.organization_ids)
+        db.commit()
+    finally:
+        db.close()
+    scope = f"organizations {args.organization_ids}" if args.organization_ids else "all organizations"
+    print(f"Rebuilt org_daily_metrics for {scope}: {rows} rows")
+
+
+if __name__ == "__main__":
+    main()
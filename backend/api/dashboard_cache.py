@@ -0,0 +1,203 @@
+"""
+Per-organization cache of computed dashboard sections.
+
+Entries are keyed by (organization, section), for example (3, "performance").
+
+Callers that answer a request pass the org's change token, the ETag that
+``conditional_get`` sent (api/change_tokens.py). The token is stored with the
+entry, and an entry is fresh only while it matches. The cached body and the
+ETag therefore always describe the same data, including writes made by other
+workers.
+
+Callers without a token (the live stream) fall back to this process's view.
+An entry is fresh until either of these happens:
+
+- a transaction that changed the org's deals, leads, contacts or activities
+  commits in this process. The change-token commit hook for the "dashboard"
+  scope bumps the org's generation, and older entries become stale.
+- ``DASHBOARD_CACHE_TTL_SECONDS`` passes. This is the safety net for writes
+  made by other workers or outside the ORM.
+
+Stampede protection: when an entry is missing or stale, only one caller per
+key recomputes it. Concurrent callers get the stale value straight away, if
+there is one no older than ``DASHBOARD_CACHE_STALE_SECONDS``. Otherwise they
+wait up to ``DASHBOARD_CACHE_WAIT_SECONDS`` for that computation. If it is
+not done by then, they compute the value themselves.
+
+    DASHBOARD_CACHE_TTL_SECONDS     freshness of an entry (default 30; 0 disables the cache)
+    DASHBOARD_CACHE_STALE_SECONDS   how long a stale entry may still be served (default 300)
+    DASHBOARD_CACHE_WAIT_SECONDS    how long to wait for another request's computation (default 10)
+    DASHBOARD_CACHE_SIZE            maximum entries, least recently used evicted first (default 4096)
+"""
+import os
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+from .change_tokens import on_commit
+from .singleton import share_module
+
+share_module(__name__)
+
+DASHBOARD_CACHE_TTL_SECONDS = float(os.getenv("DASHBOARD_CACHE_TTL_SECONDS", "30"))
+DASHBOARD_CACHE_STALE_SECONDS = float(os.getenv("DASHBOARD_CACHE_STALE_SECONDS", "300"))
+DASHBOARD_CACHE_WAIT_SECONDS = float(os.getenv("DASHBOARD_CACHE_WAIT_SECONDS", "10"))
+DASHBOARD_CACHE_SIZE = int(os.getenv("DASHBOARD_CACHE_SIZE", "4096"))
+
+# change_tokens scope whose changes invalidate an org's entries
+INVALIDATING_SCOPE = "dashboard"
+
+
+class _Entry:
+    __slots__ = ("value", "generation", "token", "computed_at")
+
+    def __init__(self, value, generation: int, token: Optional[str], computed_at: float):
+        self.value = value
+        self.generation = generation
+        self.token = token
+        self.computed_at = computed_at
+
+
+class _Computation:
+    """A recomputation in progress; other callers for the key wait on it."""
+
+    __slots__ = ("done", "value", "failed")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.failed = False
+
+
+class DashboardCache:
+    """Bounded LRU of computed sections with write invalidation, TTL and single-flight recompute."""
+
+    def __init__(
+        self,
+        ttl: float = DASHBOARD_CACHE_TTL_SECONDS,
+        stale_ttl: float = DASHBOARD_CACHE_STALE_SECONDS,
+        wait_timeout: float = DASHBOARD_CACHE_WAIT_SECONDS,
+        maxsize: int = DASHBOARD_CACHE_SIZE,
+    ):
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.wait_timeout = wait_timeout
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[Tuple[int, Hashable], _Entry]" = OrderedDict()
+        self._generations: Dict[int, int] = defaultdict(int)
+        self._computing: Dict[Tuple[int, Hashable], _Computation] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.waits = 0
+        self.invalidations = 0
+
+    def _is_fresh(self, entry: _Entry, organization_id: int, token: Optional[str], now: float) -> bool:
+        if token is not None:
+            return entry.token == token
+        return entry.generation == self._generations[organization_id] and now - entry.computed_at < self.ttl
+
+    def get_or_compute(
+        self,
+        organization_id: int,
+        section: Hashable,
+        compute: Callable[[], Any],
+        on_stale: Optional[Callable[[], None]] = None,
+        token: Optional[str] = None,
+    ) -> Any:
+        """Cached ``compute()``; ``on_stale()`` is called when a stale value is returned.
+
+        ``token`` is the org's current change token; an entry stored under
+        another token is a miss.
+        """
+        if self.ttl <= 0 or self.maxsize <= 0:
+            return compute()
+
+        key = (organization_id, section)
+        now = time.monotonic()
+        stale = None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self._is_fresh(entry, organization_id, token, now):
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry.value
+            computation = self._computing.get(key)
+            leader = computation is None
+            if leader:
+                computation = self._computing[key] = _Computation()
+                generation = self._generations[organization_id]
+                self.misses += 1
+            elif entry is not None and now - entry.computed_at < self.stale_ttl:
+                # Someone is already recomputing: serve what we have
+                self.stale_hits += 1
+                stale = entry
+            else:
+                self.waits += 1
+
+        if stale is not None:
+            if on_stale is not None:
+                on_stale()
+            return stale.value
+        if not leader:
+            if computation.done.wait(self.wait_timeout) and not computation.failed:
+                return computation.value
+            return compute()
+
+        try:
+            value = compute()
+        except BaseException:
+            computation.failed = True
+            with self._lock:
+                self._computing.pop(key, None)
+            computation.done.set()
+            raise
+
+        with self._lock:
+            # Stamped with the generation and token seen before computing: a commit
+            # that landed meanwhile leaves this entry stale rather than hiding the write
+            self._entries[key] = _Entry(value, generation, token, now)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+            self._computing.pop(key, None)
+        computation.value = value
+        computation.done.set()
+        return value
+
+    def invalidate(self, organization_id: int):
+        """Mark every entry of the org stale (still servable while one request recomputes)."""
+        with self._lock:
+            self._generations[organization_id] += 1
+            self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "ttl_seconds": self.ttl,
+                "stale_seconds": self.stale_ttl,
+                "hits": self.hits,
+                "stale_hits": self.stale_hits,
+                "misses": self.misses,
+                "waits": self.waits,
+                "invalidations": self.invalidations,
+                "computing": len(self._computing),
+            }
+
+
+dashboard_cache = DashboardCache()
+
+
+@on_commit
+def _invalidate_on_commit(pairs):
+    for organization_id, scope in pairs:
+        if scope == INVALIDATING_SCOPE:
+            dashboard_cache.invalidate(organization_id)
@@ -0,0 +1,311 @@
+"""
+Live dashboard updates over server-sent events.
+
+Clients open one ``GET /api/dashboard/stream`` instead of polling every
+dashboard endpoint. The first event is a ``snapshot`` of the live figures.
+Each later ``delta`` event carries only what changed since the previous one:
+
+    event: delta
+    data: {"metrics": {"active_leads": {"value": 12, "change": 1}}, "activities": [...]}
+
+Pushes follow commits. The change-token commit hook reports the orgs whose
+"dashboard" scope changed, and each of them gets a push scheduled. Bursts are
+coalesced: an org is pushed at most once per
+``DASHBOARD_STREAM_INTERVAL_SECONDS``, and one snapshot load serves every
+subscriber of the org.
+
+The commit hook only sees this process's commits. Writes made by other
+workers are picked up by checking each subscribed org's change token every
+``DASHBOARD_STREAM_POLL_SECONDS`` (one primary-key lookup per org).
+
+    DASHBOARD_STREAM_INTERVAL_SECONDS   minimum gap between pushes to an org (default 2)
+    DASHBOARD_STREAM_POLL_SECONDS       change-token check for other workers' writes (default 15; 0 disables)
+    DASHBOARD_STREAM_KEEPALIVE_SECONDS  comment line sent to idle connections (default 20)
+    DASHBOARD_STREAM_QUEUE_SIZE         events buffered per client before it is resynced (default 32)
+"""
+import asyncio
+import logging
+import os
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Callable, Dict, List, Optional, Set
+
+import orjson
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import Request
+
+from .change_tokens import change_token, on_commit
+from .dashboard_cache import INVALIDATING_SCOPE, dashboard_cache
+from .db import get_session_local
+from .singleton import share_module
+
+share_module(__name__)
+
+logger = logging.getLogger(__name__)
+
+DASHBOARD_STREAM_INTERVAL_SECONDS = float(os.getenv("DASHBOARD_STREAM_INTERVAL_SECONDS", "2"))
+DASHBOARD_STREAM_POLL_SECONDS = float(os.getenv("DASHBOARD_STREAM_POLL_SECONDS", "15"))
+DASHBOARD_STREAM_KEEPALIVE_SECONDS = float(os.getenv("DASHBOARD_STREAM_KEEPALIVE_SECONDS", "20"))
+DASHBOARD_STREAM_QUEUE_SIZE = int(os.getenv("DASHBOARD_STREAM_QUEUE_SIZE", "32"))
+
+SSE_MEDIA_TYPE = "text/event-stream"
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+# Client reconnect delay sent with the first message
+SSE_RETRY_MS = 5000
+
+
+@dataclass
+class LiveSnapshot:
+    """The live figures of one org at one point in time.
+
+    ``activities`` holds the feed items that are new since the previous
+    snapshot, newest first. ``cursor`` is the id of the newest activity seen.
+    ``stale`` is set by loaders that served cached figures older than the
+    latest write; the channel then loads again after the push.
+    """
+
+    metrics: Dict[str, float]
+    activities: List[dict] = field(default_factory=list)
+    cursor: Optional[int] = None
+    token: Optional[str] = None
+    stale: bool = False
+
+    def as_event(self) -> dict:
+        return {"metrics": self.metrics, "activities": self.activities}
+
+    def delta(self, previous: "LiveSnapshot") -> dict:
+        """What changed since ``previous``; empty when nothing did."""
+        changes = {
+            name: {"value": value, "change": value - previous.metrics.get(name, 0)}
+            for name, value in self.metrics.items()
+            if value != previous.metrics.get(name)
+        }
+        delta = {}
+        if changes:
+            delta["metrics"] = changes
+        if self.activities:
+            delta["activities"] = self.activities
+        return delta
+
+
+# load_snapshot(db, organization_id, previous) -> LiveSnapshot, run in a worker thread
+SnapshotLoader = Callable[[Session, int, Optional[LiveSnapshot]], LiveSnapshot]
+
+
+def format_event(event: str, data: dict) -> bytes:
+    return b"event: " + event.encode("utf-8") + b"\ndata: " + orjson.dumps(data) + b"\n\n"
+
+
+class _Subscriber:
+    __slots__ = ("queue",)
+
+    def __init__(self, size: int):
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=size)
+
+    def send(self, event: str, data: dict, current: LiveSnapshot):
+        try:
+            self.queue.put_nowait((event, data))
+        except asyncio.QueueFull:
+            # Too far behind for the deltas to add up: start it over from the current state
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(("snapshot", current.as_event()))
+
+
+class _Channel:
+    """Subscribers of one org and the state the last push brought them to."""
+
+    __slots__ = ("subscribers", "snapshot", "scheduled", "last_push", "publishing", "dirty")
+
+    def __init__(self):
+        self.subscribers: Set[_Subscriber] = set()
+        self.snapshot: Optional[LiveSnapshot] = None
+        self.scheduled: Optional[asyncio.Handle] = None
+        self.last_push = float("-inf")
+        self.publishing: Optional[asyncio.Task] = None
+        self.dirty = False
+
+
+class DashboardStream:
+    """Per-org fan-out of coalesced dashboard deltas to SSE subscribers.
+
+    All state lives on the event loop; commit hooks running in worker threads
+    hand over with ``call_soon_threadsafe``.
+    """
+
+    def __init__(
+        self,
+        load_snapshot: SnapshotLoader,
+        interval: float = DASHBOARD_STREAM_INTERVAL_SECONDS,
+        poll_seconds: float = DASHBOARD_STREAM_POLL_SECONDS,
+        keepalive_seconds: float = DASHBOARD_STREAM_KEEPALIVE_SECONDS,
+        queue_size: int = DASHBOARD_STREAM_QUEUE_SIZE,
+    ):
+        self.load_snapshot = load_snapshot
+        self.interval = interval
+        self.poll_seconds = poll_seconds
+        self.keepalive_seconds = keepalive_seconds
+        self.queue_size = queue_size
+        self._channels: Dict[int, _Channel] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._poller: Optional[asyncio.Task] = None
+        self.pushes = 0
+        self.coalesced = 0
+        on_commit(self._on_commit)
+
+    # --- subscriptions ------------------------------------------------------
+
+    def subscribe(self, organization_id: int) -> _Subscriber:
+        self._loop = asyncio.get_running_loop()
+        channel = self._channels.get(organization_id)
+        if channel is None:
+            channel = self._channels[organization_id] = _Channel()
+        subscriber = _Subscriber(self.queue_size)
+        channel.subscribers.add(subscriber)
+        if channel.snapshot is not None:
+            subscriber.send("snapshot", channel.snapshot.as_event(), channel.snapshot)
+        else:
+            # The first push of a channel is its snapshot
+            self._schedule(organization_id)
+        if self._poller is None and self.poll_seconds > 0:
+            self._poller = self._loop.create_task(self._poll())
+        return subscriber
+
+    def unsubscribe(self, organization_id: int, subscriber: _Subscriber):
+        channel = self._channels.get(organization_id)
+        if channel is None:
+            return
+        channel.subscribers.discard(subscriber)
+        if not channel.subscribers:
+            if channel.scheduled is not None:
+                channel.scheduled.cancel()
+            del self._channels[organization_id]
+
+    async def events(self, organization_id: int, request: Request) -> AsyncIterator[bytes]:
+        """SSE body for one client: the snapshot, then deltas, with keepalive comments."""
+        subscriber = self.subscribe(organization_id)
+        try:
+            yield f"retry: {SSE_RETRY_MS}\n\n".encode("utf-8")
+            while True:
+                try:
+                    event, data = await asyncio.wait_for(subscriber.queue.get(), self.keepalive_seconds)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        break
+                    yield b": keepalive\n\n"
+                    continue
+                yield format_event(event, data)
+        finally:
+            self.unsubscribe(organization_id, subscriber)
+
+    # --- pushes -------------------------------------------------------------
+
+    def _on_commit(self, pairs):
+        loop = self._loop
+        if loop is None or loop.is_closed():
+            return
+        for organization_id, scope in pairs:
+            if scope == INVALIDATING_SCOPE and organization_id in self._channels:
+                loop.call_soon_threadsafe(self._schedule, organization_id)
+
+    def _schedule(self, organization_id: int):
+        channel = self._channels.get(organization_id)
+        if channel is None:
+            return
+        if channel.publishing is not None:
+            channel.dirty = True
+            return
+        if channel.scheduled is not None:
+            self.coalesced += 1
+            return
+        delay = max(0.0, channel.last_push + self.interval - self._loop.time())
+        channel.scheduled = self._loop.call_later(delay, self._start_publish, organization_id, channel)
+
+    def _start_publish(self, organization_id: int, channel: _Channel):
+        channel.scheduled = None
+        if self._channels.get(organization_id) is channel:
+            channel.publishing = self._loop.create_task(self._publish(organization_id, channel))
+
+    async def _publish(self, organization_id: int, channel: _Channel):
+        channel.last_push = self._loop.time()
+        try:
+            previous = channel.snapshot
+            try:
+                snapshot = await run_in_threadpool(self._load, organization_id, previous)
+            except Exception:
+                logger.exception(f"Live dashboard snapshot for organization {organization_id} failed")
+                return
+            channel.snapshot = snapshot
+            if snapshot.stale:
+                # Another request is recomputing the figures; come back for them
+                channel.dirty = True
+            if previous is None:
+                event, data = "snapshot", snapshot.as_event()
+            else:
+                event, data = "delta", snapshot.delta(previous)
+                if not data:
+                    return
+            self.pushes += 1
+            for subscriber in list(channel.subscribers):
+                subscriber.send(event, data, snapshot)
+        finally:
+            channel.publishing = None
+            if channel.dirty:
+                channel.dirty = False
+                self._schedule(organization_id)
+
+    def _load(self, organization_id: int, previous: Optional[LiveSnapshot]) -> LiveSnapshot:
+        db = get_session_local()()
+        try:
+            # Read first: a write landing during the load shows up as a token change
+            token = change_token(db, organization_id, (INVALIDATING_SCOPE,))
+            snapshot = self.load_snapshot(db, organization_id, previous)
+            snapshot.token = token
+            return snapshot
+        finally:
+            db.close()
+
+    # --- other workers' writes -------------------------------------------------
+
+    def _read_tokens(self, organization_ids: List[int]) -> Dict[int, str]:
+        db = get_session_local()()
+        try:
+            return {
+                organization_id: change_token(db, organization_id, (INVALIDATING_SCOPE,))
+                for organization_id in organization_ids
+            }
+        finally:
+            db.close()
+
+    async def _poll(self):
+        try:
+            while self._channels:
+                await asyncio.sleep(self.poll_seconds)
+                organization_ids = [
+                    organization_id for organization_id, channel in self._channels.items()
+                    if channel.snapshot is not None
+                ]
+                if not organization_ids:
+                    continue
+                try:
+                    tokens = await run_in_threadpool(self._read_tokens, organization_ids)
+                except Exception:
+                    logger.exception("Live dashboard change-token check failed")
+                    continue
+                for organization_id, token in tokens.items():
+                    channel = self._channels.get(organization_id)
+                    if channel is not None and channel.snapshot is not None and channel.snapshot.token != token:
+                        # Written elsewhere: this process's cached sections are stale too
+                        dashboard_cache.invalidate(organization_id)
+                        self._schedule(organization_id)
+        finally:
+            self._poller = None
+
+    def stats(self) -> dict:
+        return {
+            "organizations": len(self._channels),
+            "subscribers": sum(len(channel.subscribers) for channel in self._channels.values()),
+            "pushes": self.pushes,
+            "coalesced": self.coalesced,
+            "interval_seconds": self.interval,
+        }
@@ -1,6 +1,36 @@
+"""
+Database engine and session factory.
+
+There is exactly one engine per process. app.py, the routers, the WebSocket
+handlers and the deployment entry points (main.py) all go through
+``get_engine()``/``get_db()`` so they share a single connection pool.
+
+``async def`` handlers use ``get_async_db()`` instead, which yields an
+``AsyncSession`` on an asyncpg-backed engine so queries do not block the event
+loop. Both engines are sized by the same settings; the async pool only opens
+connections once an async handler is hit.
+
+Pool behaviour is configured through environment variables:
+
+    DB_POOL_SIZE              persistent connections kept open (default 10)
+    DB_MAX_OVERFLOW           extra connections allowed under burst (default 20)
+    DB_POOL_TIMEOUT           seconds to wait for a free connection (default 30)
+    DB_POOL_RECYCLE           recycle connections older than N seconds (default 1800)
+    DB_POOL_PRE_PING          test connections on checkout (default true)
+    DB_STATEMENT_TIMEOUT_MS   per-statement timeout, 0 disables (default 30000)
+"""
 import os
-from sqlalchemy import create_engine
+import threading
+import time
+
+from sqlalchemy import create_engine, exc, text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+from .singleton import share_module
+
+share_module(__name__)
 
 # Use environment variable for database URL (Railway provides DATABASE_URL)
 # Default to local PostgreSQL if no DATABASE_URL is set
@@ -13,20 +43,193 @@ if DATABASE_URL.startswith("postgres://"):
     DATABASE_URL = DATABASE_URL.replace("postgres://", "postgresql://", 1)
     print(f"Fixed DATABASE_URL: {DATABASE_URL}")
 
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+POOL_SIZE = _env_int("DB_POOL_SIZE", 10)
+MAX_OVERFLOW = _env_int("DB_MAX_OVERFLOW", 20)
+POOL_TIMEOUT = _env_int("DB_POOL_TIMEOUT", 30)
+POOL_RECYCLE = _env_int("DB_POOL_RECYCLE", 1800)
+POOL_PRE_PING = _env_bool("DB_POOL_PRE_PING", True)
+STATEMENT_TIMEOUT_MS = _env_int("DB_STATEMENT_TIMEOUT_MS", 30000)
+
+
+class PoolStats:
+    """Checkout counters and latency histogram for the shared pool."""
+
+    # Upper bounds (milliseconds) of the checkout latency buckets
+    CHECKOUT_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.checkouts = 0
+            self.timeouts = 0
+            self.checkout_seconds_total = 0.0
+            self.checkout_seconds_max = 0.0
+            # One slot per bucket plus the +Inf bucket
+            self.bucket_counts = [0] * (len(self.CHECKOUT_BUCKETS_MS) + 1)
+
+    def observe_checkout(self, seconds: float):
+        elapsed_ms = seconds * 1000
+        index = len(self.CHECKOUT_BUCKETS_MS)
+        for i, bound in enumerate(self.CHECKOUT_BUCKETS_MS):
+            if elapsed_ms <= bound:
+                index = i
+                break
+        with self._lock:
+            self.checkouts += 1
+            self.checkout_seconds_total += seconds
+            if seconds > self.checkout_seconds_max:
+                self.checkout_seconds_max = seconds
+            self.bucket_counts[index] += 1
+
+    def record_timeout(self):
+        with self._lock:
+            self.timeouts += 1
+
+    def snapshot(self, pool=None) -> dict:
+        with self._lock:
+            checkouts = self.checkouts
+            total = self.checkout_seconds_total
+            histogram = {}
+            cumulative = 0
+            for bound, count in zip(self.CHECKOUT_BUCKETS_MS, self.bucket_counts):
+                cumulative += count
+                histogram[f"le_{bound}ms"] = cumulative
+            histogram["le_inf"] = cumulative + self.bucket_counts[-1]
+            data = {
+                "checkouts": checkouts,
+                "timeouts": self.timeouts,
+                "wait_seconds_total": round(total, 6),
+                "wait_ms_avg": round((total / checkouts) * 1000, 3) if checkouts else 0.0,
+                "wait_ms_max": round(self.checkout_seconds_max * 1000, 3),
+                "checkout_latency_histogram": histogram,
+            }
+        if isinstance(pool, QueuePool):
+            data.update({
+                "pool_size": pool.size(),
+                "checked_out": pool.checkedout(),
+                "checked_in": pool.checkedin(),
+                "overflow": pool.overflow(),
+                "max_overflow": MAX_OVERFLOW,
+            })
+        return data
+
+
+pool_stats = PoolStats()
+async_pool_stats = PoolStats()
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that records how long callers wait for a connection."""
+
+    stats = pool_stats
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            self.stats.record_timeout()
+            raise
+        self.stats.observe_checkout(time.perf_counter() - start)
+        return connection
+
+
+class InstrumentedAsyncQueuePool(InstrumentedQueuePool, AsyncAdaptedQueuePool):
+    """Async flavour of InstrumentedQueuePool used by the asyncpg engine."""
+
+    stats = async_pool_stats
+
+
+def create_db_engine(database_url: str = DATABASE_URL, **overrides):
+    """Create an engine with the configured pool settings.
+
+    Only ``get_engine()`` should call this for the application database; it is
+    exposed for scripts and tests that need an engine for another URL.
+    """
+    if database_url.startswith("sqlite"):
+        return create_engine(database_url, **overrides)
+
+    options = {
+        "poolclass": InstrumentedQueuePool,
+        "pool_size": POOL_SIZE,
+        "max_overflow": MAX_OVERFLOW,
+        "pool_timeout": POOL_TIMEOUT,
+        "pool_recycle": POOL_RECYCLE,
+        "pool_pre_ping": POOL_PRE_PING,
+    }
+    if STATEMENT_TIMEOUT_MS > 0 and database_url.startswith("postgresql"):
+        options["connect_args"] = {"options": f"-c statement_timeout={STATEMENT_TIMEOUT_MS}"}
+    options.update(overrides)
+    return create_engine(database_url, **options)
+
+
+def to_async_url(database_url: str) -> str:
+    """Map a sync driver URL onto its async driver (psycopg2 -> asyncpg)."""
+    for prefix in ("postgresql+psycopg2://", "postgresql://"):
+        if database_url.startswith(prefix):
+            return "postgresql+asyncpg://" + database_url[len(prefix):]
+    if database_url.startswith("sqlite://"):
+        return "sqlite+aiosqlite://" + database_url[len("sqlite://"):]
+    return database_url
+
+
+def create_async_db_engine(database_url: str = DATABASE_URL, **overrides):
+    """Async counterpart of create_db_engine()."""
+    async_url = to_async_url(database_url)
+    if async_url.startswith("sqlite"):
+        return create_async_engine(async_url, **overrides)
+
+    options = {
+        "poolclass": InstrumentedAsyncQueuePool,
+        "pool_size": POOL_SIZE,
+        "max_overflow": MAX_OVERFLOW,
+        "pool_timeout": POOL_TIMEOUT,
+        "pool_recycle": POOL_RECYCLE,
+        "pool_pre_ping": POOL_PRE_PING,
+    }
+    if STATEMENT_TIMEOUT_MS > 0 and async_url.startswith("postgresql+asyncpg"):
+        options["connect_args"] = {"server_settings": {"statement_timeout": str(STATEMENT_TIMEOUT_MS)}}
+    options.update(overrides)
+    return create_async_engine(async_url, **options)
+
+
 # Create engine lazily to avoid connection issues during import
 engine = None
 SessionLocal = None
+_engine_lock = threading.RLock()
 
 def get_engine():
     global engine
     if engine is None:
-        engine = create_engine(DATABASE_URL)
+        with _engine_lock:
+            if engine is None:
+                engine = create_db_engine(DATABASE_URL)
     return engine
 
 def get_session_local():
     global SessionLocal
     if SessionLocal is None:
-        SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=get_engine())
+        with _engine_lock:
+            if SessionLocal is None:
+                SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=get_engine())
     return SessionLocal
 
 def get_db():
@@ -34,4 +237,55 @@ def get_db():
     try:
         yield db
     finally:
-        db.close() 
\ No newline at end of file
+        db.close()
+
+async_engine = None
+AsyncSessionLocal = None
+
+def get_async_engine():
+    global async_engine
+    if async_engine is None:
+        with _engine_lock:
+            if async_engine is None:
+                async_engine = create_async_db_engine(DATABASE_URL)
+    return async_engine
+
+def get_async_session_local():
+    global AsyncSessionLocal
+    if AsyncSessionLocal is None:
+        with _engine_lock:
+            if AsyncSessionLocal is None:
+                # expire_on_commit=False: attributes stay readable after commit
+                # without an implicit (and, under asyncio, illegal) lazy refresh
+                AsyncSessionLocal = async_sessionmaker(
+                    bind=get_async_engine(), class_=AsyncSession,
+                    autoflush=False, expire_on_commit=False,
+                )
+    return AsyncSessionLocal
+
+async def get_async_db():
+    async with get_async_session_local()() as db:
+        yield db
+
+def check_database():
+    """Open a pooled connection and run SELECT 1; used to warm the pool at startup."""
+    db_engine = get_engine()
+    with db_engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+    return db_engine
+
+def get_pool_stats() -> dict:
+    """Live pool gauges plus checkout counters, for the admin endpoint."""
+    data = pool_stats.snapshot(engine.pool if engine is not None else None)
+    data["async"] = async_pool_stats.snapshot(
+        async_engine.sync_engine.pool if async_engine is not None else None
+    )
+    data["configured"] = {
+        "pool_size": POOL_SIZE,
+        "max_overflow": MAX_OVERFLOW,
+        "pool_timeout": POOL_TIMEOUT,
+        "pool_recycle": POOL_RECYCLE,
+        "pre_ping": POOL_PRE_PING,
+        "statement_timeout_ms": STATEMENT_TIMEOUT_MS,
+    }
+    return data
@@ -0,0 +1,306 @@
+"""
+Manual card order within a Kanban stage (``deals.rank``).
+
+Ranks are base-36 strings compared byte-wise (COLLATE "C" on Postgres) and
+read as fractions: "i" sits halfway between "" and "z", and "i8" sits just
+after "i". There is always room for a key between two others, so moving a
+card writes only that card:
+
+    new rank = rank_between(rank of the card below, rank of the card above)
+
+Cards are listed by rank DESC, then id DESC, through the
+(organization_id, stage_id, rank, id) index. Every deal has a rank: the
+migration that added the column ranked existing deals newest first, and
+deals created or moved to another stage without a drop target go on top:
+
+    new rank = rank_between(top rank of the stage, None)
+
+Repeated drops into the same gap, or onto the top, make the keys grow by
+about one character every five moves. When a write produces a key longer
+than ``DEAL_RANK_MAX_LENGTH``, the stage is rebalanced in the background:
+every card gets an evenly spaced short key, and the order is unchanged.
+Stages can also be rebalanced by hand:
+
+    python -m api.deal_ranking              # every stage of every organization
+    python -m api.deal_ranking --org 3      # one organization
+
+On Postgres, moves take a shared and rebalances an exclusive transaction
+advisory lock on (organization, stage), so a move never computes a key from
+ranks that a rebalance is replacing.
+"""
+import argparse
+import logging
+import os
+from typing import Collection, List, Optional, Tuple
+
+from sqlalchemy import and_, func, or_, select, update
+from sqlalchemy.orm import Session
+
+from .change_tokens import record_changes
+from .models import Deal
+from .pagination import encode_cursor, keyset_filter, keyset_order
+from .singleton import share_module
+
+share_module(__name__)
+
+logger = logging.getLogger(__name__)
+
+DEAL_RANK_MAX_LENGTH = int(os.getenv("DEAL_RANK_MAX_LENGTH", "16"))
+
+ALPHABET = "0123456789abcdefghijklmnopqrstuvwxyz"
+BASE = len(ALPHABET)
+_DIGITS = {digit: value for value, digit in enumerate(ALPHABET)}
+
+
+# --- keys -------------------------------------------------------------------
+
+def rank_between(low: Optional[str], high: Optional[str]) -> str:
+    """A key strictly between ``low`` and ``high`` (None: unbounded).
+
+    Keys never end in "0", so there is always room below one.
+    """
+    if low is not None and high is not None and not low < high:
+        raise ValueError(f"rank {low!r} is not below {high!r}")
+    low = low or ""
+    digits = []
+    i = 0
+    while True:
+        lo = _DIGITS[low[i]] if i < len(low) else 0
+        hi = _DIGITS[high[i]] if high is not None and i < len(high) else BASE
+        if lo == hi:
+            digits.append(ALPHABET[lo])
+        else:
+            mid = (lo + hi) // 2
+            if mid > lo:
+                digits.append(ALPHABET[mid])
+                return "".join(digits)
+            # Adjacent digits: keep low's and look for room further right,
+            # where high no longer constrains us
+            digits.append(ALPHABET[lo])
+            high = None
+        i += 1
+
+
+def ranks_between(low: Optional[str], high: Optional[str], count: int) -> List[str]:
+    """``count`` ascending keys between ``low`` and ``high``, spread by bisection."""
+    if count <= 0:
+        return []
+    mid = rank_between(low, high)
+    half = count // 2
+    return ranks_between(low, mid, half) + [mid] + ranks_between(mid, high, count - half - 1)
+
+
+def spread_ranks(count: int) -> List[str]:
+    """``count`` ascending, evenly spaced keys of the shortest fixed width."""
+    width = 1
+    while BASE ** width <= count:
+        width += 1
+    step = BASE ** width / (count + 1)
+    ranks = []
+    for i in range(1, count + 1):
+        value = int(i * step)
+        digits = []
+        for _ in range(width):
+            value, digit = divmod(value, BASE)
+            digits.append(ALPHABET[digit])
+        ranks.append("".join(reversed(digits)).rstrip("0"))
+    return ranks
+
+
+def needs_rebalance(rank: Optional[str]) -> bool:
+    return rank is not None and len(rank) > DEAL_RANK_MAX_LENGTH
+
+
+# --- placement --------------------------------------------------------------
+
+def lock_stage(db: Session, organization_id: int, stage_id: Optional[int], exclusive: bool = False):
+    """Transaction-scoped advisory lock on one stage's ordering (Postgres only)."""
+    if db.get_bind().dialect.name != "postgresql":
+        return
+    lock = func.pg_advisory_xact_lock if exclusive else func.pg_advisory_xact_lock_shared
+    db.execute(select(lock(organization_id, stage_id or 0)))
+
+
+def _stage_cards(organization_id: int, stage_id: Optional[int], exclude_ids: Collection[int]):
+    return select(Deal.id, Deal.rank).where(
+        Deal.organization_id == organization_id, Deal.stage_id == stage_id, Deal.id.notin_(exclude_ids)
+    )
+
+
+def _card_below(db: Session, organization_id, stage_id, exclude_ids, card) -> Optional[Tuple[int, Optional[str]]]:
+    cursor = encode_cursor(card.rank, card.id)
+    return db.execute(
+        _stage_cards(organization_id, stage_id, exclude_ids)
+        .where(keyset_filter(Deal.rank, Deal.id, cursor))
+        .order_by(*keyset_order(Deal.rank, Deal.id)).limit(1)
+    ).first()
+
+
+def _card_above(db: Session, organization_id, stage_id, exclude_ids, card) -> Optional[Tuple[int, Optional[str]]]:
+    # keyset_filter() reversed: the rows listed before (card.rank, card.id)
+    if card.rank is None:
+        before = and_(Deal.rank.is_(None), Deal.id > card.id)
+    else:
+        before = or_(Deal.rank.is_(None), Deal.rank > card.rank, and_(Deal.rank == card.rank, Deal.id > card.id))
+    return db.execute(
+        _stage_cards(organization_id, stage_id, exclude_ids)
+        .where(before)
+        .order_by(Deal.rank.asc().nulls_last(), Deal.id.asc()).limit(1)
+    ).first()
+
+
+def _neighbours(db: Session, organization_id, stage_id, exclude_ids, position, above_id, below_id):
+    """(card above, card below) the drop target; either may be None."""
+    if above_id is not None or below_id is not None:
+        anchor_id = above_id if above_id is not None else below_id
+        anchor = db.execute(_stage_cards(organization_id, stage_id, exclude_ids).where(Deal.id == anchor_id)).first()
+        if anchor is None:
+            raise ValueError(f"Deal {anchor_id} is not in the target stage")
+        if above_id is not None:
+            return anchor, _card_below(db, organization_id, stage_id, exclude_ids, anchor)
+        return _card_above(db, organization_id, stage_id, exclude_ids, anchor), anchor
+
+    position = max(position or 0, 0)
+    rows = db.execute(
+        _stage_cards(organization_id, stage_id, exclude_ids)
+        .order_by(*keyset_order(Deal.rank, Deal.id))
+        .offset(max(position - 1, 0)).limit(2 if position else 1)
+    ).all()
+    if position == 0:
+        return None, rows[0] if rows else None
+    return (rows[0] if rows else None), (rows[1] if len(rows) > 1 else None)
+
+
+def ranks_for_drop(
+    db: Session,
+    organization_id: int,
+    stage_id: Optional[int],
+    count: int,
+    exclude_ids: Collection[int],
+    position: Optional[int] = None,
+    above_id: Optional[int] = None,
+    below_id: Optional[int] = None,
+) -> List[str]:
+    """Keys for ``count`` cards dropped together into one gap, topmost first.
+
+    The gap is resolved among the stage's cards other than ``exclude_ids``
+    (the cards being moved): under ``above_id``, over ``below_id``, at
+    0-based ``position``, or at the top. Raises ValueError for an anchor that
+    is not in the stage. Takes the stage's shared lock.
+    """
+    lock_stage(db, organization_id, stage_id)
+    above, below = _neighbours(db, organization_id, stage_id, exclude_ids, position, above_id, below_id)
+    low = below.rank if below is not None else None
+    high = above.rank if above is not None else None
+    return ranks_between(low, high, count)[::-1]
+
+
+def top_rank(db: Session, organization_id: int, stage_id: Optional[int]) -> str:
+    """A key above every card of the stage, for deals that land on top.
+
+    Takes the stage's shared lock.
+    """
+    lock_stage(db, organization_id, stage_id)
+    top = db.execute(
+        select(func.max(Deal.rank)).where(Deal.organization_id == organization_id, Deal.stage_id == stage_id)
+    ).scalar()
+    return rank_between(top, None)
+
+
+def place_deal(
+    db: Session,
+    deal: Deal,
+    stage_id: Optional[int],
+    position: Optional[int] = None,
+    above_id: Optional[int] = None,
+    below_id: Optional[int] = None,
+) -> str:
+    """Put ``deal`` into ``stage_id`` between two cards and set its rank (not flushed).
+
+    The drop target is the card it goes under (``above_id``), the card it
+    goes over (``below_id``), or a 0-based ``position``. With none of them
+    the deal goes to the top. Raises ValueError for a card that is not in
+    the stage.
+    """
+    (rank,) = ranks_for_drop(
+        db, deal.organization_id, stage_id, 1, (deal.id,),
+        position=position, above_id=above_id, below_id=below_id,
+    )
+    deal.stage_id = stage_id
+    deal.rank = rank
+    return rank
+
+
+# --- rebalance --------------------------------------------------------------
+
+def rebalance_stage(db: Session, organization_id: int, stage_id: Optional[int]) -> List[dict]:
+    """Replace the stage's keys with evenly spaced short ones.
+
+    Runs in the caller's transaction. Returns the rows written, as
+    ``{"id", "rank"}`` dicts.
+    """
+    lock_stage(db, organization_id, stage_id, exclusive=True)
+    cards = db.execute(
+        select(Deal.id, Deal.rank)
+        .where(Deal.organization_id == organization_id, Deal.stage_id == stage_id)
+        .order_by(*keyset_order(Deal.rank, Deal.id))
+    ).all()
+    ranks = spread_ranks(len(cards))[::-1]  # listed highest first
+    changed = [{"id": card.id, "rank": rank} for card, rank in zip(cards, ranks) if card.rank != rank]
+    if changed:
+        db.execute(update(Deal), changed)
+        # Page cursors carry ranks; clients holding one must refetch
+        record_changes(db, [(organization_id, "board")])
+    return changed
+
+
+def rebalance_in_background(organization_id: int, stage_id: Optional[int]):
+    """Rebalance in its own session; for BackgroundTasks after a move.
+
+    The new ranks are pushed to the org's board viewers once committed, so
+    their cards keep sorting against the keys the next move writes.
+    """
+    from .db import get_session_local
+    from .websocket import manager as ws_manager
+
+    db = get_session_local()()
+    try:
+        changed = rebalance_stage(db, organization_id, stage_id)
+        db.commit()
+        logger.info(f"Rebalanced stage {stage_id} of organization {organization_id}: {len(changed)} ranks rewritten")
+        ws_manager.publish_board_deltas(organization_id, [
+            {"id": row["id"], "from_stage_id": stage_id, "stage_id": stage_id, "rank": row["rank"]}
+            for row in changed
+        ])
+    except Exception:
+        db.rollback()
+        logger.exception(f"Rebalancing stage {stage_id} of organization {organization_id} failed")
+    finally:
+        db.close()
+
+
+def main(argv=None):
+    from .db import get_session_local
+
+    parser = argparse.ArgumentParser(description="Rebalance Kanban card ranks (deals.rank)")
+    parser.add_argument("--org", type=int, action="append", dest="organization_ids",
+                        help="organization id to rebalance (repeatable; default: all)")
+    args = parser.parse_args(argv)
+
+    db = get_session_local()()
+    try:
+        statement = select(Deal.organization_id, Deal.stage_id).distinct()
+        if args.organization_ids:
+            statement = statement.where(Deal.organization_id.in_(args.organization_ids))
+        stages = db.execute(statement).all()
+        rows = 0
+        for organization_id, stage_id in stages:
+            rows += len(rebalance_stage(db, organization_id, stage_id))
+            db.commit()
+    finally:
+        db.close()
+    print(f"Rebalanced {len(stages)} stages: {rows} ranks rewritten")
+
+
+if __name__ == "__main__":
+    main()
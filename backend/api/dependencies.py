@@ -3,6 +3,7 @@ from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from .db import get_session_local
 from .models import User
+from .user_cache import UserSnapshot, user_cache
 import jwt
 import os
 import logging
@@ -24,7 +25,9 @@ def get_db():
 
 def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security), db: Session = Depends(get_db)):
     """
-    Dependency that gets the current authenticated user from JWT token
+    Dependency that gets the current authenticated user from JWT token.
+    Returns a UserSnapshot (id, name, email, role, organization_id, avatar_url),
+    served from user_cache when possible.
     """
     try:
         SECRET_KEY = os.getenv("SECRET_KEY", "your-secret-key-change-in-production")
@@ -47,18 +50,20 @@ def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(securit
                 headers={"WWW-Authenticate": "Bearer"},
             )
         
-        user = db.query(User).filter(User.id == int(user_id)).first()
-        if user is None:
+        user = user_cache.get(int(user_id))
+        if user is not None:
+            return user
+        
+        db_user = db.query(User).filter(User.id == int(user_id)).first()
+        if db_user is None:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="User not found",
                 headers={"WWW-Authenticate": "Bearer"},
             )
         
-        # Eager property access to avoid lazy loading post-session
-        _ = user.id; _ = user.name; _ = user.email; _ = user.role; _ = user.organization_id; _ = user.avatar_url
-        
-        return user
+        # Immutable snapshot: safe to cache and never lazy-loads after the session closes
+        return user_cache.put(UserSnapshot.from_user(db_user))
     except jwt.PyJWTError as e:
         logger.warning(f"JWT error: {e}")
         raise HTTPException(
@@ -73,3 +78,14 @@ def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(securit
             detail="Authentication failed",
             headers={"WWW-Authenticate": "Bearer"},
         )
+
+def require_admin(current_user: User = Depends(get_current_user)):
+    """
+    Dependency that only lets organization admins through (diagnostic endpoints)
+    """
+    if (current_user.role or "").lower() != "admin":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin privileges required",
+        )
+    return current_user
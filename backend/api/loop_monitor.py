@@ -0,0 +1,228 @@
+"""
+Event-loop stall detector.
+
+Opt-in instrumentation that finds code blocking the asyncio event loop: sync
+SQLAlchemy inside ``async def`` handlers, sync OpenAI/Stripe SDK calls, bcrypt,
+and so on. A heartbeat coroutine ticks on the loop while a watchdog thread
+checks how long ago the last tick was. When the loop has been stuck for longer
+than the threshold the watchdog samples the loop thread's stack, works out the
+route being served and the first application frame on the stack, and records
+the stall under that (route, call site) pair.
+
+Enable with environment variables:
+
+    LOOP_MONITOR_ENABLED      turn the detector on (default false)
+    LOOP_STALL_THRESHOLD_MS   lag that counts as a stall (default 100)
+
+Findings are logged as they happen and served by ``GET /api/admin/loop/stalls``.
+"""
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+
+from .singleton import share_module
+
+share_module(__name__)
+
+logger = logging.getLogger(__name__)
+
+LOOP_MONITOR_ENABLED = os.getenv("LOOP_MONITOR_ENABLED", "false").strip().lower() in ("1", "true", "yes", "on")
+STALL_THRESHOLD_MS = float(os.getenv("LOOP_STALL_THRESHOLD_MS", "100"))
+
+# Frames under this directory are "ours"; everything else is library code
+_BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_MAX_STACK_FRAMES = 25
+
+
+def _is_app_frame(filename: str) -> bool:
+    return filename.startswith(_BACKEND_DIR) and "site-packages" not in filename
+
+
+def _frame_label(frame) -> str:
+    filename = frame.f_code.co_filename
+    if filename.startswith(_BACKEND_DIR):
+        filename = os.path.relpath(filename, _BACKEND_DIR)
+    return f"{filename}:{frame.f_lineno} in {frame.f_code.co_name}"
+
+
+def _library_name(frame) -> str:
+    module = frame.f_globals.get("__name__", "") or "?"
+    return module.split(".")[0]
+
+
+def _find_route(frame) -> str:
+    """Walk outwards looking for the ASGI scope of the request being served."""
+    while frame is not None:
+        try:
+            scope = frame.f_locals.get("scope")
+        except Exception:
+            scope = None
+        if isinstance(scope, dict) and scope.get("type") in ("http", "websocket"):
+            route = scope.get("route")
+            path = getattr(route, "path", None)
+            if path:
+                return f"{scope.get('method', 'WS')} {path}"
+            if scope.get("path"):
+                # Fallback when the router has not matched yet (middleware)
+                return f"{scope.get('method', 'WS')} {scope['path']}"
+        frame = frame.f_back
+    return "<no request>"
+
+
+def _analyse_stack(frame) -> Tuple[str, str, str, list]:
+    """Return (route, call_site, blocking_in, formatted_stack) for a frame."""
+    route = _find_route(frame)
+
+    call_site = None
+    blocking_in = None
+    inner = None
+    walker = frame
+    while walker is not None:
+        if _is_app_frame(walker.f_code.co_filename):
+            call_site = _frame_label(walker)
+            if inner is not None:
+                blocking_in = _library_name(inner)
+            break
+        inner = walker
+        walker = walker.f_back
+
+    stack = traceback.format_stack(frame, limit=_MAX_STACK_FRAMES)
+    return route, call_site or _frame_label(frame), blocking_in or _library_name(frame), stack
+
+
+class LoopStallMonitor:
+    """Heartbeat + watchdog pair that samples the loop thread when it stalls."""
+
+    def __init__(self, threshold_ms: float = STALL_THRESHOLD_MS):
+        self.threshold = threshold_ms / 1000.0
+        # Tick often enough that a stall is noticed well before it ends
+        self.interval = max(self.threshold / 4, 0.005)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._loop = None
+        self._loop_thread_id = None
+        self._heartbeat_task = None
+        self._watchdog = None
+        self._last_beat = time.perf_counter()
+        # Sample taken by the watchdog for the stall in progress, if any
+        self._pending: Optional[Tuple[str, str, str, list]] = None
+        self.started_at = None
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.stalls: Dict[Tuple[str, str], dict] = {}
+            self.total_stalls = 0
+            self.max_lag_ms = 0.0
+
+    @property
+    def running(self) -> bool:
+        return self._heartbeat_task is not None and not self._heartbeat_task.done()
+
+    def start(self, loop: Optional[asyncio.AbstractEventLoop] = None):
+        if self.running:
+            return
+        self._loop = loop or asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._stop.clear()
+        self._last_beat = time.perf_counter()
+        self.started_at = datetime.utcnow()
+        self._heartbeat_task = self._loop.create_task(self._heartbeat())
+        self._watchdog = threading.Thread(target=self._watch, name="loop-stall-watchdog", daemon=True)
+        self._watchdog.start()
+        logger.info("Event-loop stall detector started (threshold %.0f ms)", self.threshold * 1000)
+
+    async def stop(self):
+        self._stop.set()
+        if self._heartbeat_task is not None:
+            self._heartbeat_task.cancel()
+            try:
+                await self._heartbeat_task
+            except asyncio.CancelledError:
+                pass
+            self._heartbeat_task = None
+
+    async def _heartbeat(self):
+        while not self._stop.is_set():
+            before = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            now = time.perf_counter()
+            self._last_beat = now
+            lag = now - before - self.interval
+            if lag >= self.threshold:
+                self._record(lag)
+
+    def _watch(self):
+        sampled_beat = None
+        while not self._stop.wait(self.interval):
+            last_beat = self._last_beat
+            if time.perf_counter() - last_beat < self.threshold or sampled_beat == last_beat:
+                continue
+            # One sample per stall: the loop is stuck on the same callback
+            sampled_beat = last_beat
+            frame = sys._current_frames().get(self._loop_thread_id)
+            if frame is None:
+                continue
+            try:
+                self._pending = _analyse_stack(frame)
+            except Exception:  # never let diagnostics take the watchdog down
+                logger.debug("Failed to sample event loop stack", exc_info=True)
+            finally:
+                del frame
+
+    def _record(self, lag: float):
+        sample, self._pending = self._pending, None
+        if sample is None:
+            # The stall ended before the watchdog got a look at it
+            sample = ("<unknown>", "<not sampled>", "<unknown>", [])
+        route, call_site, blocking_in, stack = sample
+        lag_ms = lag * 1000
+        with self._lock:
+            self.total_stalls += 1
+            self.max_lag_ms = max(self.max_lag_ms, lag_ms)
+            entry = self.stalls.get((route, call_site))
+            if entry is None:
+                entry = self.stalls[(route, call_site)] = {
+                    "route": route,
+                    "call_site": call_site,
+                    "blocking_in": blocking_in,
+                    "count": 0,
+                    "total_ms": 0.0,
+                    "max_ms": 0.0,
+                }
+            entry["count"] += 1
+            entry["total_ms"] += lag_ms
+            entry["max_ms"] = max(entry["max_ms"], lag_ms)
+            entry["last_seen"] = datetime.utcnow().isoformat()
+            entry["last_stack"] = stack
+        logger.warning(
+            "Event loop blocked for %.1f ms on %s at %s (%s)",
+            lag_ms, route, call_site, blocking_in,
+        )
+
+    def report(self) -> dict:
+        with self._lock:
+            entries = sorted(
+                (dict(entry, total_ms=round(entry["total_ms"], 1), max_ms=round(entry["max_ms"], 1))
+                 for entry in self.stalls.values()),
+                key=lambda entry: entry["total_ms"],
+                reverse=True,
+            )
+            return {
+                "enabled": LOOP_MONITOR_ENABLED,
+                "running": self.running,
+                "threshold_ms": self.threshold * 1000,
+                "started_at": self.started_at.isoformat() if self.started_at else None,
+                "total_stalls": self.total_stalls,
+                "max_lag_ms": round(self.max_lag_ms, 1),
+                "stalls": entries,
+            }
+
+
+loop_monitor = LoopStallMonitor()
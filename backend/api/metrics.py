@@ -0,0 +1,197 @@
+"""
+Prometheus metrics.
+
+Served in the text exposition format at ``GET /metrics``:
+
+- HTTP request latency histogram, response counter and in-flight gauge,
+  labelled by method and route template (``/api/deals/{deal_id}``, never the
+  raw path)
+- database pool gauges and checkout wait histogram for the sync and async
+  pools (read from api/db.py at scrape time)
+- LLM call latency, errors and token counters (ai/providers/openai_provider.py)
+- WebSocket connection, room and Kanban board counts (api/websocket.py)
+
+Recording is kept cheap: ``instrument_routes()`` wraps each route once at
+startup with label children that are already bound, so a request never builds
+label tuples or looks up children - it picks its children by method and
+updates them.
+"""
+import time
+
+from prometheus_client import CollectorRegistry, Counter, Gauge, Histogram, generate_latest, CONTENT_TYPE_LATEST
+from prometheus_client.core import GaugeMetricFamily, CounterMetricFamily, HistogramMetricFamily
+from starlette.routing import Route
+
+from .singleton import share_module
+
+share_module(__name__)
+
+registry = CollectorRegistry()
+
+HTTP_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+LLM_LATENCY_BUCKETS = (0.25, 0.5, 1.0, 2.0, 4.0, 8.0, 15.0, 30.0, 60.0)
+
+http_request_duration = Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route template",
+    ["method", "route"], buckets=HTTP_LATENCY_BUCKETS, registry=registry,
+)
+http_responses = Counter(
+    "http_responses_total", "HTTP responses by route template and status class",
+    ["method", "route", "status"], registry=registry,
+)
+http_requests_in_flight = Gauge(
+    "http_requests_in_flight", "HTTP requests currently being served",
+    ["method", "route"], registry=registry,
+)
+
+llm_request_duration = Histogram(
+    "llm_request_duration_seconds", "LLM API call latency",
+    ["provider", "model"], buckets=LLM_LATENCY_BUCKETS, registry=registry,
+)
+llm_request_errors = Counter(
+    "llm_request_errors_total", "LLM API calls that raised",
+    ["provider", "model"], registry=registry,
+)
+llm_tokens = Counter(
+    "llm_tokens_total", "LLM tokens consumed",
+    ["provider", "model", "kind"], registry=registry,
+)
+
+websocket_connections = Gauge(
+    "websocket_connections", "Open WebSocket connections", registry=registry,
+)
+websocket_rooms = Gauge(
+    "websocket_rooms", "Chat rooms with at least one WebSocket connection", registry=registry,
+)
+websocket_boards = Gauge(
+    "websocket_boards", "Kanban boards with at least one WebSocket subscriber", registry=registry,
+)
+
+_STATUS_CLASSES = ("1xx", "2xx", "3xx", "4xx", "5xx")
+
+
+class _RouteChildren:
+    """Label children for one (method, route template) pair."""
+
+    __slots__ = ("duration", "in_flight", "responses")
+
+    def __init__(self, method: str, path: str):
+        self.duration = http_request_duration.labels(method, path)
+        self.in_flight = http_requests_in_flight.labels(method, path)
+        # Indexed by the first digit of the status code
+        self.responses = [http_responses.labels(method, path, status) for status in _STATUS_CLASSES]
+
+
+def _instrument(endpoint_app, path: str, methods):
+    children = {method: _RouteChildren(method, path) for method in methods}
+
+    async def instrumented(scope, receive, send):
+        route = children.get(scope.get("method"))
+        if route is None:
+            await endpoint_app(scope, receive, send)
+            return
+
+        status = [5]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"] // 100
+            await send(message)
+
+        route.in_flight.inc()
+        start = time.perf_counter()
+        try:
+            await endpoint_app(scope, receive, send_wrapper)
+        finally:
+            route.duration.observe(time.perf_counter() - start)
+            route.in_flight.dec()
+            route.responses[min(max(status[0], 1), 5) - 1].inc()
+
+    instrumented.__metrics_wrapped__ = True
+    return instrumented
+
+
+def instrument_routes(app) -> int:
+    """Wrap every HTTP route of ``app`` with pre-bound metric children.
+
+    Call once all routers are included (app.py does it at startup). Returns
+    the number of routes wrapped; already wrapped routes are skipped.
+    """
+    wrapped = 0
+    for route in app.router.routes:
+        if not isinstance(route, Route) or getattr(route.app, "__metrics_wrapped__", False):
+            continue
+        route.app = _instrument(route.app, route.path, route.methods or ())
+        wrapped += 1
+    return wrapped
+
+
+class LLMMetrics:
+    """Label children for one provider/model pair."""
+
+    __slots__ = ("duration", "errors", "prompt_tokens", "completion_tokens")
+
+    def __init__(self, provider: str, model: str):
+        self.duration = llm_request_duration.labels(provider, model)
+        self.errors = llm_request_errors.labels(provider, model)
+        self.prompt_tokens = llm_tokens.labels(provider, model, "prompt")
+        self.completion_tokens = llm_tokens.labels(provider, model, "completion")
+
+
+class _DatabasePoolCollector:
+    """Reads pool gauges from api/db.py at scrape time."""
+
+    def describe(self):
+        # Nothing to check for name clashes; avoids a collect() on register
+        return []
+
+    def collect(self):
+        from .db import get_pool_stats, PoolStats
+
+        stats = get_pool_stats()
+        pools = {"sync": stats, "async": stats.get("async", {})}
+
+        gauges = {
+            key: GaugeMetricFamily(f"db_pool_{key}", help_text, labels=["pool"])
+            for key, help_text in (
+                ("size", "Configured persistent connections"),
+                ("checked_out", "Connections currently in use"),
+                ("checked_in", "Idle connections in the pool"),
+                ("overflow", "Connections open beyond pool_size"),
+            )
+        }
+        checkouts = CounterMetricFamily("db_pool_checkouts", "Connection checkouts", labels=["pool"])
+        timeouts = CounterMetricFamily("db_pool_timeouts", "Checkouts that timed out", labels=["pool"])
+        wait = HistogramMetricFamily(
+            "db_pool_checkout_wait_seconds", "Time spent waiting for a connection", labels=["pool"]
+        )
+
+        for name, data in pools.items():
+            if "pool_size" in data:
+                gauges["size"].add_metric([name], data["pool_size"])
+                gauges["checked_out"].add_metric([name], data["checked_out"])
+                gauges["checked_in"].add_metric([name], data["checked_in"])
+                # QueuePool counts overflow from -pool_size until the pool is full
+                gauges["overflow"].add_metric([name], max(data["overflow"], 0))
+            checkouts.add_metric([name], data.get("checkouts", 0))
+            timeouts.add_metric([name], data.get("timeouts", 0))
+            histogram = data.get("checkout_latency_histogram")
+            if histogram:
+                buckets = [
+                    (str(bound / 1000), histogram[f"le_{bound}ms"]) for bound in PoolStats.CHECKOUT_BUCKETS_MS
+                ]
+                buckets.append(("+Inf", histogram["le_inf"]))
+                wait.add_metric([name], buckets, data.get("wait_seconds_total", 0.0))
+
+        yield from gauges.values()
+        yield checkouts
+        yield timeouts
+        yield wait
+
+
+registry.register(_DatabasePoolCollector())
+
+
+def render_metrics():
+    """Return (body, content type) for the /metrics endpoint."""
+    return generate_latest(registry), CONTENT_TYPE_LATEST
@@ -1,7 +1,9 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, Boolean, ForeignKey, Table, Text, JSON
-from sqlalchemy.orm import relationship, declarative_base
+from sqlalchemy import BigInteger, Column, Integer, String, Float, Date, DateTime, Boolean, ForeignKey, Table, Text, JSON, Index, text
+from sqlalchemy.orm import relationship, declarative_base, validates
 from datetime import datetime
 
+from .normalization import normalize_email, normalize_phone
+
 Base = declarative_base()
 
 # Association tables
@@ -13,7 +15,9 @@ DealTag = Table(
 Watcher = Table(
     'watcher', Base.metadata,
     Column('deal_id', Integer, ForeignKey('deals.id'), primary_key=True),
-    Column('user_id', Integer, ForeignKey('users.id'), primary_key=True)
+    Column('user_id', Integer, ForeignKey('users.id'), primary_key=True),
+    # The primary key covers lookups by deal; "deals I watch" needs user first
+    Index('ix_watcher_user_id', 'user_id'),
 )
 
 class Organization(Base):
@@ -76,10 +80,19 @@ class User(Base):
 
 class Contact(Base):
     __tablename__ = 'contacts'
+    __table_args__ = (
+        Index('ix_contacts_org_created_at', 'organization_id', 'created_at'),
+        # Duplicate detection (bulk import, lead capture) looks contacts up by normalized key
+        Index('ix_contacts_org_email_normalized', 'organization_id', 'email_normalized'),
+        Index('ix_contacts_org_phone_normalized', 'organization_id', 'phone_normalized'),
+    )
     id = Column(Integer, primary_key=True)
     name = Column(String, nullable=False)
     email = Column(String)
     phone = Column(String)
+    # Maintained from email/phone (see api/normalization.py)
+    email_normalized = Column(String)
+    phone_normalized = Column(String)
     company = Column(String)
     owner_id = Column(Integer, ForeignKey('users.id'))
     organization_id = Column(Integer, ForeignKey('organizations.id'), nullable=False)
@@ -97,8 +110,23 @@ class Contact(Base):
     payments = relationship('Payment',back_populates='contact')
     # subscriptions = relationship('Subscription')
 
+    @validates('email')
+    def _set_email_normalized(self, key, value):
+        self.email_normalized = normalize_email(value)
+        return value
+
+    @validates('phone')
+    def _set_phone_normalized(self, key, value):
+        self.phone_normalized = normalize_phone(value)
+        return value
+
 class Lead(Base):
     __tablename__ = 'leads'
+    __table_args__ = (
+        Index('ix_leads_org_status', 'organization_id', 'status'),
+        Index('ix_leads_org_created_at', 'organization_id', 'created_at'),
+        Index('ix_leads_org_owner', 'organization_id', 'owner_id'),
+    )
     id = Column(Integer, primary_key=True)
     title = Column(String, nullable=False)
     contact_id = Column(Integer, ForeignKey('contacts.id'))
@@ -132,6 +160,19 @@ class Lead(Base):
 
 class Deal(Base):
     __tablename__ = 'deals'
+    __table_args__ = (
+        Index('ix_deals_org_stage', 'organization_id', 'stage_id'),
+        # Kanban stage pages in manual card order (api/deal_ranking.py)
+        Index('ix_deals_org_stage_rank', 'organization_id', 'stage_id', 'rank', 'id'),
+        Index('ix_deals_org_created_at', 'organization_id', 'created_at'),
+        Index('ix_deals_org_owner', 'organization_id', 'owner_id'),
+        Index('ix_deals_contact_org_created_at', 'contact_id', 'organization_id', 'created_at'),
+        # Closed-deal counts and revenue sums only ever look at closed rows
+        Index('ix_deals_org_closed_at', 'organization_id', 'closed_at',
+              postgresql_where=text('closed_at IS NOT NULL'), postgresql_include=['value']),
+        Index('ix_deals_org_reminder', 'organization_id',
+              postgresql_where=text('reminder_date IS NOT NULL')),
+    )
     id = Column(Integer, primary_key=True)
     title = Column(String, nullable=False)
     value = Column(Float)
@@ -147,6 +188,8 @@ class Deal(Base):
     status = Column(String, default='open')  # open, won, lost
     outcome_reason = Column(String)  # reason for won/lost
     customer_account_id = Column(Integer, ForeignKey('customer_accounts.id'), nullable=True)
+    # Position within the stage: fractional key compared byte-wise (api/deal_ranking.py)
+    rank = Column(String().with_variant(String(collation='C'), 'postgresql'))
     # Relationships
     owner = relationship('User', back_populates='deals')
     stage = relationship('Stage', back_populates='deals')
@@ -171,6 +214,10 @@ class Stage(Base):
 
 class Activity(Base):
     __tablename__ = 'activities'
+    __table_args__ = (
+        Index('ix_activities_deal_timestamp', 'deal_id', 'timestamp'),
+        Index('ix_activities_timestamp', 'timestamp'),
+    )
     id = Column(Integer, primary_key=True)
     deal_id = Column(Integer, ForeignKey('deals.id'))
     user_id = Column(Integer, ForeignKey('users.id'))
@@ -262,6 +309,11 @@ class EmailCampaign(Base):
 
 class EmailLog(Base):
     __tablename__ = 'email_logs'
+    __table_args__ = (
+        Index('ix_email_logs_sent_at', 'sent_at'),
+        Index('ix_email_logs_campaign_sent_at', 'campaign_id', 'sent_at'),
+        Index('ix_email_logs_status', 'status'),
+    )
     id = Column(Integer, primary_key=True)
     campaign_id = Column(Integer, ForeignKey('email_campaigns.id'))
     recipient_type = Column(String)  # lead, contact, deal
@@ -347,6 +399,11 @@ class ChatParticipant(Base):
 
 class ChatMessage(Base):
     __tablename__ = 'chat_messages'
+    __table_args__ = (
+        # Room history pages: keyset on (created_at, id) over live messages
+        Index('ix_chat_messages_room_created_at', 'room_id', 'created_at',
+              postgresql_where=text('deleted_at IS NULL')),
+    )
     id = Column(Integer, primary_key=True)
     room_id = Column(Integer, ForeignKey('chat_rooms.id'), nullable=False)
     sender_id = Column(Integer, ForeignKey('users.id'), nullable=False)
@@ -1222,6 +1279,11 @@ class PBXExtension(Base):
 
 class Call(Base):
     __tablename__ = 'calls'
+    __table_args__ = (
+        Index('ix_calls_org_start_time', 'organization_id', 'start_time'),
+        Index('ix_calls_org_status_start_time', 'organization_id', 'status', 'start_time'),
+        Index('ix_calls_org_agent_start_time', 'organization_id', 'agent_id', 'start_time'),
+    )
     id = Column(Integer, primary_key=True)
     organization_id = Column(Integer, ForeignKey('organizations.id'), nullable=False)
     provider_id = Column(Integer, ForeignKey('pbx_providers.id'), nullable=False)
@@ -1704,4 +1766,24 @@ class StripeSubscription(Base):
     customer = relationship('Contact')
     organization = relationship('Organization')
     plan = relationship('StripeSubscriptionPlan')
-    payments = relationship('StripePayment')
\ No newline at end of file
+    payments = relationship('StripePayment')
+
+class OrgChangeVersion(Base):
+    """Per-organization change counters behind ETags (see api/change_tokens.py)"""
+    __tablename__ = 'org_change_versions'
+    organization_id = Column(Integer, primary_key=True)  # 0 = rows shared by all orgs (stages)
+    scope = Column(String(32), primary_key=True)  # contacts, leads, board, dashboard
+    version = Column(BigInteger, nullable=False, default=1)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class OrgDailyMetric(Base):
+    """Per-organization daily counters maintained on write (see api/daily_metrics.py)"""
+    __tablename__ = 'org_daily_metrics'
+    organization_id = Column(Integer, primary_key=True)
+    day = Column(Date, primary_key=True)  # UTC day of created_at / closed_at / timestamp
+    leads_created = Column(Integer, nullable=False, default=0)
+    deals_created = Column(Integer, nullable=False, default=0)
+    deals_closed = Column(Integer, nullable=False, default=0)
+    revenue_closed = Column(Float, nullable=False, default=0)
+    activities = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -0,0 +1,41 @@
+"""
+Normalized contact keys used for deduplication.
+
+``contacts.email_normalized`` and ``contacts.phone_normalized`` are kept in
+step with ``email``/``phone`` by the Contact model and are indexed per
+organization, so "does this org already have this person" is an index lookup.
+The SQL expressions below produce the same values inside the database (the
+migration backfill and the bulk import merge use them).
+"""
+import re
+from typing import Optional
+
+_EMAIL = re.compile(r"^[^@\s]+@[^@\s]+\.[^@\s]+$")
+_NON_DIGITS = re.compile(r"\D")
+
+MIN_PHONE_DIGITS = 7
+MAX_PHONE_DIGITS = 15  # E.164
+
+EMAIL_NORMALIZED_SQL = "NULLIF(lower(btrim({column})), '')"
+PHONE_NORMALIZED_SQL = "NULLIF(regexp_replace({column}, '[^0-9]', '', 'g'), '')"
+
+
+def normalize_email(email: Optional[str]) -> Optional[str]:
+    if email is None:
+        return None
+    return email.strip().lower() or None
+
+
+def normalize_phone(phone: Optional[str]) -> Optional[str]:
+    """Digits only: '+1 (555) 010-2030' -> '15550102030'."""
+    if phone is None:
+        return None
+    return _NON_DIGITS.sub("", phone) or None
+
+
+def is_valid_email(normalized: str) -> bool:
+    return bool(_EMAIL.match(normalized))
+
+
+def is_valid_phone(normalized: str) -> bool:
+    return MIN_PHONE_DIGITS <= len(normalized) <= MAX_PHONE_DIGITS
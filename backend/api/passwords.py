@@ -0,0 +1,74 @@
+"""
+Password hashing and verification.
+
+bcrypt is deliberately slow (100-300 ms of CPU per check at the usual costs),
+so the async helpers run it on a small dedicated thread pool instead of the
+event loop. bcrypt releases the GIL while hashing, so the pool gives real
+parallelism up to its size, and because the pool is bounded a login burst
+queues there instead of starving the request threadpool.
+
+    BCRYPT_ROUNDS            cost factor for new hashes (default 12)
+    PASSWORD_HASH_WORKERS    size of the hashing pool (default min(4, CPUs))
+
+Hashes made with a different cost, and legacy plaintext values, are reported
+by ``needs_rehash()`` so login can upgrade them after a successful check.
+"""
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import bcrypt
+
+from .singleton import share_module
+
+share_module(__name__)
+
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+
+_executor = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash")
+
+
+def hash_password(plain_password: str, rounds: int = None) -> str:
+    """Hash a password with bcrypt at the configured cost."""
+    salt = bcrypt.gensalt(rounds=rounds or BCRYPT_ROUNDS)
+    return bcrypt.hashpw(plain_password.encode("utf-8"), salt).decode("utf-8")
+
+
+def verify_password(plain_password: str, hashed_password: str) -> bool:
+    """Verify a password against its hash.
+    Fast-deploy fallback: if stored value is not a bcrypt hash, compare plaintext.
+    """
+    if not hashed_password:
+        return False
+    try:
+        return bcrypt.checkpw(plain_password.encode("utf-8"), hashed_password.encode("utf-8"))
+    except Exception:
+        # Fallback for legacy/plaintext data to avoid 500s in new environments
+        return plain_password == hashed_password
+
+
+def hash_cost(hashed_password: str):
+    """Cost factor of a bcrypt hash ("$2b$12$...") or None if it is not one."""
+    parts = (hashed_password or "").split("$")
+    if len(parts) < 4 or parts[1] not in ("2a", "2b", "2y"):
+        return None
+    try:
+        return int(parts[2])
+    except ValueError:
+        return None
+
+
+def needs_rehash(hashed_password: str) -> bool:
+    """True for plaintext values and hashes made with a different cost."""
+    return hash_cost(hashed_password) != BCRYPT_ROUNDS
+
+
+async def hash_password_async(plain_password: str) -> str:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor, hash_password, plain_password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor, verify_password, plain_password, hashed_password)
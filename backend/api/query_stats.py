@@ -0,0 +1,217 @@
+"""
+Per-request SQL query counting and N+1 detection.
+
+Engine-level ``before_cursor_execute``/``after_cursor_execute`` listeners feed
+every statement into the collector of the request currently being served
+(tracked through a context variable, so it follows the request into the
+threadpool for sync handlers and into the greenlet used by AsyncSession).
+
+For each request the middleware records the statement count, the total time
+spent in the database and any statement shape repeated at least
+``QUERY_N_PLUS_ONE_THRESHOLD`` times (the usual signature of lazy loads in a
+loop). Outside production the numbers are also returned as ``X-DB-Queries``
+and ``X-DB-Time`` (milliseconds) response headers.
+
+    ENVIRONMENT                   "production" hides the headers (default development)
+    QUERY_N_PLUS_ONE_THRESHOLD    repeats of one statement that count as N+1 (default 5)
+
+Per-route aggregates are served by ``GET /api/admin/db/queries``.
+"""
+import logging
+import os
+import re
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from .singleton import share_module
+
+share_module(__name__)
+
+logger = logging.getLogger(__name__)
+
+ENVIRONMENT = os.getenv("ENVIRONMENT", os.getenv("RAILWAY_ENVIRONMENT_NAME", "development")).strip().lower()
+EXPOSE_HEADERS = ENVIRONMENT != "production"
+N_PLUS_ONE_THRESHOLD = int(os.getenv("QUERY_N_PLUS_ONE_THRESHOLD", "5"))
+
+# Keep reported statement shapes readable
+_MAX_SHAPE_LENGTH = 300
+_WHITESPACE = re.compile(r"\s+")
+
+
+class RequestQueries:
+    """Statements executed while serving one request."""
+
+    __slots__ = ("count", "seconds", "shapes")
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.shapes = Counter()
+
+    def record(self, statement: str, seconds: float):
+        self.count += 1
+        self.seconds += seconds
+        self.shapes[statement] += 1
+
+    def repeated_shapes(self, threshold: int = N_PLUS_ONE_THRESHOLD):
+        return [(shape, count) for shape, count in self.shapes.most_common() if count >= threshold]
+
+
+_current: ContextVar[Optional[RequestQueries]] = ContextVar("request_queries", default=None)
+
+
+def current_queries() -> Optional[RequestQueries]:
+    return _current.get()
+
+
+@contextmanager
+def collect_queries():
+    """Count the statements run inside the block (tests, scripts)."""
+    collector = RequestQueries()
+    token = _current.set(collector)
+    try:
+        yield collector
+    finally:
+        _current.reset(token)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current.get() is not None:
+        conn.info.setdefault("query_stats_start", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    collector = _current.get()
+    if collector is None:
+        return
+    starts = conn.info.get("query_stats_start")
+    if not starts:
+        return
+    collector.record(statement, time.perf_counter() - starts.pop())
+
+
+def _shape(statement: str) -> str:
+    shape = _WHITESPACE.sub(" ", statement).strip()
+    if len(shape) > _MAX_SHAPE_LENGTH:
+        shape = shape[:_MAX_SHAPE_LENGTH] + "..."
+    return shape
+
+
+class QueryStats:
+    """Per-route aggregates across requests."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.routes = {}
+
+    def observe(self, route: str, collector: RequestQueries):
+        repeated = collector.repeated_shapes()
+        with self._lock:
+            entry = self.routes.get(route)
+            if entry is None:
+                entry = self.routes[route] = {
+                    "route": route,
+                    "requests": 0,
+                    "queries_total": 0,
+                    "queries_max": 0,
+                    "db_seconds_total": 0.0,
+                    "db_seconds_max": 0.0,
+                    "n_plus_one_requests": 0,
+                    "n_plus_one": {},
+                }
+            entry["requests"] += 1
+            entry["queries_total"] += collector.count
+            entry["queries_max"] = max(entry["queries_max"], collector.count)
+            entry["db_seconds_total"] += collector.seconds
+            entry["db_seconds_max"] = max(entry["db_seconds_max"], collector.seconds)
+            if repeated:
+                entry["n_plus_one_requests"] += 1
+                for statement, count in repeated:
+                    shape = _shape(statement)
+                    entry["n_plus_one"][shape] = max(entry["n_plus_one"].get(shape, 0), count)
+                first_seen = entry["n_plus_one_requests"] == 1
+            else:
+                first_seen = False
+        if first_seen:
+            statement, count = repeated[0]
+            logger.warning(
+                "Possible N+1 on %s: %d statements, one shape repeated %d times: %s",
+                route, collector.count, count, _shape(statement),
+            )
+
+    def summary(self, limit: int = 20) -> dict:
+        with self._lock:
+            routes = []
+            for entry in self.routes.values():
+                requests = entry["requests"]
+                routes.append({
+                    "route": entry["route"],
+                    "requests": requests,
+                    "queries_avg": round(entry["queries_total"] / requests, 2),
+                    "queries_max": entry["queries_max"],
+                    "db_ms_avg": round(entry["db_seconds_total"] / requests * 1000, 3),
+                    "db_ms_max": round(entry["db_seconds_max"] * 1000, 3),
+                    "n_plus_one_requests": entry["n_plus_one_requests"],
+                    "n_plus_one": [
+                        {"statement": shape, "repeats": repeats}
+                        for shape, repeats in sorted(entry["n_plus_one"].items(), key=lambda item: -item[1])
+                    ],
+                })
+        routes.sort(key=lambda route: (route["queries_max"], route["queries_avg"]), reverse=True)
+        return {
+            "n_plus_one_threshold": N_PLUS_ONE_THRESHOLD,
+            "routes": routes[:limit],
+        }
+
+
+query_stats = QueryStats()
+
+
+def _route_name(scope) -> str:
+    route = scope.get("route")
+    path = getattr(route, "path", None) or scope.get("path", "")
+    return f"{scope.get('method', '')} {path}"
+
+
+class QueryStatsMiddleware:
+    """ASGI middleware that scopes a RequestQueries collector to each request."""
+
+    def __init__(self, app, expose_headers: bool = EXPOSE_HEADERS):
+        self.app = app
+        self.expose_headers = expose_headers
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        collector = RequestQueries()
+        token = _current.set(collector)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start" and self.expose_headers:
+                headers = list(message.get("headers", []))
+                headers.append((b"x-db-queries", str(collector.count).encode()))
+                headers.append((b"x-db-time", f"{collector.seconds * 1000:.1f}".encode()))
+                message = dict(message, headers=headers)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current.reset(token)
+            if collector.count:
+                query_stats.observe(_route_name(scope), collector)
@@ -0,0 +1,69 @@
+"""
+Admin diagnostics endpoints (connection pool, query counts, event-loop stalls,
+service startup, dashboard cache)
+"""
+from fastapi import APIRouter, Depends, Query
+
+from ..dashboard_cache import dashboard_cache
+from ..db import get_pool_stats
+from ..dependencies import require_admin
+from ..loop_monitor import loop_monitor
+from ..models import User
+from ..query_stats import query_stats
+from ..services.registry import registry
+
+router = APIRouter(prefix="/api/admin", tags=["admin"])
+
+
+@router.get("/db/pool")
+def get_db_pool_stats(current_user: User = Depends(require_admin)):
+    """Live connection pool gauges and checkout latency histogram"""
+    return get_pool_stats()
+
+
+@router.get("/db/queries")
+def get_query_summary(
+    limit: int = Query(20, ge=1, le=200, description="Number of routes to return"),
+    current_user: User = Depends(require_admin)
+):
+    """Worst routes by SQL statement count, with suspected N+1 statement shapes"""
+    return query_stats.summary(limit=limit)
+
+
+@router.delete("/db/queries")
+def reset_query_summary(current_user: User = Depends(require_admin)):
+    """Clear the per-route query statistics"""
+    query_stats.reset()
+    return {"message": "Query statistics cleared"}
+
+
+@router.get("/loop/stalls")
+def get_loop_stalls(current_user: User = Depends(require_admin)):
+    """Event-loop stalls aggregated by route and call site (LOOP_MONITOR_ENABLED)"""
+    return loop_monitor.report()
+
+
+@router.delete("/loop/stalls")
+def reset_loop_stalls(current_user: User = Depends(require_admin)):
+    """Clear the collected stall report"""
+    loop_monitor.reset()
+    return {"message": "Loop stall report cleared"}
+
+
+@router.get("/startup")
+def get_startup_report(current_user: User = Depends(require_admin)):
+    """Service registry state and per-router/service startup timings"""
+    return {**registry.status(), "startup": registry.startup_report()}
+
+
+@router.get("/cache/dashboard")
+def get_dashboard_cache_stats(current_user: User = Depends(require_admin)):
+    """Dashboard cache size, hit/stale/miss counters and invalidations"""
+    return dashboard_cache.stats()
+
+
+@router.delete("/cache/dashboard")
+def clear_dashboard_cache(current_user: User = Depends(require_admin)):
+    """Drop every cached dashboard section"""
+    dashboard_cache.clear()
+    return {"message": "Dashboard cache cleared"}
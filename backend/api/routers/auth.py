@@ -5,11 +5,11 @@ from pydantic import BaseModel
 from datetime import datetime, timedelta
 import jwt
 import os
-import bcrypt
 
 from api.db import get_db
 from api.models import User
 from api.dependencies import get_current_user
+from api.passwords import needs_rehash, hash_password_async, verify_password_async
 
 router = APIRouter(prefix="/api/auth", tags=["authentication"])
 
@@ -37,16 +37,6 @@ class UserResponse(BaseModel):
     organization_id: int
     avatar_url: str = None
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    """Verify a password against its hash.
-    Fast-deploy fallback: if stored value is not a bcrypt hash, compare plaintext.
-    """
-    try:
-        return bcrypt.checkpw(plain_password.encode('utf-8'), hashed_password.encode('utf-8'))
-    except Exception:
-        # Fallback for legacy/plaintext data to avoid 500s in new environments
-        return plain_password == hashed_password
-
 def create_access_token(data: dict, expires_delta: timedelta = None):
     """Create a JWT access token"""
     to_encode = data.copy()
@@ -85,16 +75,24 @@ async def login(request: Request, db: Session = Depends(get_db)):
         # Generic response
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid email or password")
 
-    # Verify password with safe fallback; any error -> treat as mismatch
+    # Verify password off the event loop (bcrypt is CPU-bound); any error -> treat as mismatch
     ok: bool = False
     try:
-        ok = verify_password(login_data.password, user.password_hash)
+        ok = await verify_password_async(login_data.password, user.password_hash)
     except Exception:
         ok = (login_data.password == (user.password_hash or ""))
 
     if not ok:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid email or password")
 
+    # Upgrade plaintext values and hashes made with another BCRYPT_ROUNDS
+    if needs_rehash(user.password_hash):
+        try:
+            user.password_hash = await hash_password_async(login_data.password)
+            db.commit()
+        except Exception:
+            db.rollback()
+
     # Create access token
     try:
         access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
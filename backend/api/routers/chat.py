@@ -1,11 +1,13 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 from datetime import datetime
 
-from backend.api.db import get_db
+from backend.api.db import get_async_db
 from backend.api.models import User, ChatRoom, ChatMessage, ChatParticipant, Organization
 from backend.api.dependencies import get_current_user
+from backend.api.pagination import MAX_PAGE_SIZE, keyset_order, next_page_headers, paginate, split_page
 from backend.api.schemas.chat import (
     ChatRoomCreate, ChatRoomResponse, ChatMessageCreate,
     ChatMessageResponse, ChatParticipantResponse, ChatRoomList
@@ -16,14 +18,14 @@ router = APIRouter(prefix="/chat", tags=["chat"])
 @router.get("/rooms", response_model=List[ChatRoomResponse])
 async def get_user_rooms(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get all chat rooms for the current user"""
-    rooms = db.query(ChatRoom).join(ChatParticipant).filter(
+    rooms = (await db.execute(select(ChatRoom).join(ChatParticipant).filter(
         ChatParticipant.user_id == current_user.id,
         ChatParticipant.is_active == True,
         ChatRoom.is_active == True
-    ).all()
+    ))).scalars().all()
     
     return rooms
 
@@ -31,7 +33,7 @@ async def get_user_rooms(
 async def create_room(
     room_data: ChatRoomCreate,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Create a new chat room"""
     # Check if user has permission to create rooms in this organization
@@ -50,7 +52,7 @@ async def create_room(
         created_by_id=current_user.id
     )
     db.add(room)
-    db.flush()  # Get the room ID
+    await db.flush()  # Get the room ID
     
     # Add creator as admin participant
     creator_participant = ChatParticipant(
@@ -70,8 +72,8 @@ async def create_room(
             )
             db.add(participant)
     
-    db.commit()
-    db.refresh(room)
+    await db.commit()
+    await db.refresh(room)
     
     return room
 
@@ -79,15 +81,15 @@ async def create_room(
 async def get_room(
     room_id: int,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get a specific chat room"""
     # Check if user is a participant
-    participant = db.query(ChatParticipant).filter(
+    participant = (await db.execute(select(ChatParticipant).filter(
         ChatParticipant.room_id == room_id,
         ChatParticipant.user_id == current_user.id,
         ChatParticipant.is_active == True
-    ).first()
+    ))).scalars().first()
     
     if not participant:
         raise HTTPException(
@@ -95,7 +97,7 @@ async def get_room(
             detail="Room not found or access denied"
         )
     
-    room = db.query(ChatRoom).filter(ChatRoom.id == room_id).first()
+    room = (await db.execute(select(ChatRoom).filter(ChatRoom.id == room_id))).scalars().first()
     if not room:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -107,18 +109,23 @@ async def get_room(
 @router.get("/rooms/{room_id}/messages", response_model=List[ChatMessageResponse])
 async def get_room_messages(
     room_id: int,
-    limit: int = 50,
-    offset: int = 0,
+    request: Request,
+    response: Response,
+    limit: int = Query(50, ge=1, le=MAX_PAGE_SIZE),
+    offset: int = Query(0, ge=0, description="Messages to skip (prefer cursor)"),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from X-Next-Cursor; replaces offset"),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """Get messages for a specific room"""
+    """Get messages for a specific room, newest first.
+    X-Next-Cursor/Link point at older messages when there are more.
+    """
     # Check if user is a participant
-    participant = db.query(ChatParticipant).filter(
+    participant = (await db.execute(select(ChatParticipant).filter(
         ChatParticipant.room_id == room_id,
         ChatParticipant.user_id == current_user.id,
         ChatParticipant.is_active == True
-    ).first()
+    ))).scalars().first()
     
     if not participant:
         raise HTTPException(
@@ -126,14 +133,22 @@ async def get_room_messages(
             detail="Room not found or access denied"
         )
     
-    messages = db.query(ChatMessage).filter(
+    statement = select(ChatMessage).filter(
         ChatMessage.room_id == room_id,
         ChatMessage.deleted_at.is_(None)
-    ).order_by(ChatMessage.created_at.desc()).offset(offset).limit(limit).all()
+    )
+    if cursor:
+        statement = paginate(statement, ChatMessage.created_at, ChatMessage.id, cursor, limit)
+    else:
+        statement = statement.order_by(
+            *keyset_order(ChatMessage.created_at, ChatMessage.id)
+        ).offset(offset).limit(limit + 1)
+    messages, next_cursor = split_page((await db.execute(statement)).scalars().all(), limit, "created_at")
+    response.headers.update(next_page_headers(request, next_cursor, limit))
     
     # Update last read timestamp
     participant.last_read_at = datetime.utcnow()
-    db.commit()
+    await db.commit()
     
     return messages
 
@@ -142,15 +157,15 @@ async def send_message(
     room_id: int,
     message_data: ChatMessageCreate,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Send a message to a room"""
     # Check if user is a participant
-    participant = db.query(ChatParticipant).filter(
+    participant = (await db.execute(select(ChatParticipant).filter(
         ChatParticipant.room_id == room_id,
         ChatParticipant.user_id == current_user.id,
         ChatParticipant.is_active == True
-    ).first()
+    ))).scalars().first()
     
     if not participant:
         raise HTTPException(
@@ -167,8 +182,8 @@ async def send_message(
         reply_to_id=message_data.reply_to_id
     )
     db.add(message)
-    db.commit()
-    db.refresh(message)
+    await db.commit()
+    await db.refresh(message)
     
     return message
 
@@ -176,15 +191,15 @@ async def send_message(
 async def get_room_participants(
     room_id: int,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get participants of a room"""
     # Check if user is a participant
-    participant = db.query(ChatParticipant).filter(
+    participant = (await db.execute(select(ChatParticipant).filter(
         ChatParticipant.room_id == room_id,
         ChatParticipant.user_id == current_user.id,
         ChatParticipant.is_active == True
-    ).first()
+    ))).scalars().first()
     
     if not participant:
         raise HTTPException(
@@ -192,10 +207,10 @@ async def get_room_participants(
             detail="Room not found or access denied"
         )
     
-    participants = db.query(ChatParticipant).filter(
+    participants = (await db.execute(select(ChatParticipant).filter(
         ChatParticipant.room_id == room_id,
         ChatParticipant.is_active == True
-    ).all()
+    ))).scalars().all()
     
     return participants
 
@@ -204,16 +219,16 @@ async def add_participant(
     room_id: int,
     user_id: int,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Add a participant to a room"""
     # Check if current user is admin of the room
-    admin_participant = db.query(ChatParticipant).filter(
+    admin_participant = (await db.execute(select(ChatParticipant).filter(
         ChatParticipant.room_id == room_id,
         ChatParticipant.user_id == current_user.id,
         ChatParticipant.role == "admin",
         ChatParticipant.is_active == True
-    ).first()
+    ))).scalars().first()
     
     if not admin_participant:
         raise HTTPException(
@@ -222,7 +237,7 @@ async def add_participant(
         )
     
     # Check if user exists and is in the same organization
-    user = db.query(User).filter(User.id == user_id).first()
+    user = (await db.execute(select(User).filter(User.id == user_id))).scalars().first()
     if not user or user.organization_id != current_user.organization_id:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -230,10 +245,10 @@ async def add_participant(
         )
     
     # Check if user is already a participant
-    existing_participant = db.query(ChatParticipant).filter(
+    existing_participant = (await db.execute(select(ChatParticipant).filter(
         ChatParticipant.room_id == room_id,
         ChatParticipant.user_id == user_id
-    ).first()
+    ))).scalars().first()
     
     if existing_participant:
         if existing_participant.is_active:
@@ -254,7 +269,7 @@ async def add_participant(
         )
         db.add(participant)
     
-    db.commit()
+    await db.commit()
     
     return {"message": "Participant added successfully"}
 
@@ -263,17 +278,17 @@ async def remove_participant(
     room_id: int,
     user_id: int,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Remove a participant from a room"""
     # Check if current user is admin or removing themselves
     if user_id != current_user.id:
-        admin_participant = db.query(ChatParticipant).filter(
+        admin_participant = (await db.execute(select(ChatParticipant).filter(
             ChatParticipant.room_id == room_id,
             ChatParticipant.user_id == current_user.id,
             ChatParticipant.role == "admin",
             ChatParticipant.is_active == True
-        ).first()
+        ))).scalars().first()
         
         if not admin_participant:
             raise HTTPException(
@@ -282,11 +297,11 @@ async def remove_participant(
             )
     
     # Find and deactivate participant
-    participant = db.query(ChatParticipant).filter(
+    participant = (await db.execute(select(ChatParticipant).filter(
         ChatParticipant.room_id == room_id,
         ChatParticipant.user_id == user_id,
         ChatParticipant.is_active == True
-    ).first()
+    ))).scalars().first()
     
     if not participant:
         raise HTTPException(
@@ -295,7 +310,7 @@ async def remove_participant(
         )
     
     participant.is_active = False
-    db.commit()
+    await db.commit()
     
     return {"message": "Participant removed successfully"}
 
@@ -303,7 +318,7 @@ async def remove_participant(
 async def get_organization_users(
     org_id: int,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get all users in an organization for adding to chat rooms"""
     # Check if user is in the same organization
@@ -313,7 +328,7 @@ async def get_organization_users(
             detail="Access denied to organization users"
         )
     
-    users = db.query(User).filter(User.organization_id == org_id).all()
+    users = (await db.execute(select(User).filter(User.organization_id == org_id))).scalars().all()
     
     return [
         {
@@ -1,9 +1,14 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from sqlalchemy import func, and_, extract
+from sqlalchemy import case, exists, func, select
 from datetime import datetime, timedelta
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Sequence
 from api.dependencies import get_db, get_current_user
+from api.change_tokens import conditional_get
+from api.daily_metrics import monthly_totals
+from api.dashboard_cache import dashboard_cache
+from api.dashboard_stream import SSE_HEADERS, SSE_MEDIA_TYPE, DashboardStream, LiveSnapshot
 from api.models import Deal, Lead, Contact, User, Activity, Stage
 from api.schemas.dashboard import (
     DashboardMetrics,
@@ -18,218 +23,253 @@ logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api/dashboard", tags=["dashboard"])
 
-@router.get("/metrics", response_model=DashboardMetrics)
-def get_dashboard_metrics(current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    """Get dashboard metrics including active leads, closed deals, revenue, and AI score"""
+# Each endpoint sends an ETag from the org's "dashboard" change token and
+# answers If-None-Match with 304 before running its queries. The activity feed
+# renders relative times, so its token also rolls over every minute.
+# Computed sections are cached per organization (api/dashboard_cache.py) under
+# that ETag, so a cached body is never sent with a newer token. /stream pushes
+# the same figures to subscribed clients over SSE (api/dashboard_stream.py).
+
+# Lead statuses as the dashboard groups them. The case variants are the values
+# the UI and older imports store; anything else is in no bucket.
+LEAD_STATUS_BUCKETS = {
+    "qualified": ("qualified", "Qualified", "Proposal Sent"),
+    "nurturing": ("contacted", "Contacted", "Negotiation"),
+    "cold": ("new", "New"),
+    "hot": ("hot", "Hot", "Won"),
+}
+# Buckets counted as "active leads" on the metrics card
+ACTIVE_LEAD_BUCKETS = ("cold", "nurturing", "qualified")
+
+LEAD_QUALITY_COLORS = {"qualified": "#22c55e", "nurturing": "#fbbf24", "cold": "#64748b", "hot": "#a21caf"}
+
+PERFORMANCE_MONTHS = 6
+REVENUE_TARGET = 1000000  # $1M target
+
+lead_status_bucket = case(
+    *[(Lead.status.in_(statuses), bucket) for bucket, statuses in LEAD_STATUS_BUCKETS.items()],
+    else_=None,
+)
+
+
+def performance_months(now: datetime = None) -> List[datetime]:
+    """First day of each month on the performance chart: six months starting 180 days ago."""
+    current = (now or datetime.now()) - timedelta(days=180)
+    months = []
+    for _ in range(PERFORMANCE_MONTHS):
+        months.append(current.replace(day=1, hour=0, minute=0, second=0, microsecond=0))
+        current = (current + timedelta(days=32)).replace(day=1)
+    return months
+
+
+def _month_ranges(months: Sequence[datetime]):
+    """Half-open [start, next month) ranges, i.e. date_trunc('month') buckets."""
+    return [(start, (start + timedelta(days=32)).replace(day=1)) for start in months]
+
+
+def _aggregate_row(db: Session, statement, label: str) -> Dict[str, Any]:
     try:
-        # Active leads count (case-insensitive and includes more statuses)
-        try:
-            active_leads = db.query(Lead).filter(
-                Lead.status.in_(['new', 'New', 'contacted', 'Contacted', 'qualified', 'Qualified', 'Proposal Sent', 'Negotiation']),
-                Lead.organization_id == current_user.organization_id
-            ).count()
-        except Exception as e:
-            logger.warning(f"active_leads query failed: {e}")
-            active_leads = 0
-        
-        # Closed deals count (deals with closed_at date)
-        try:
-            closed_deals = db.query(Deal).filter(
-                Deal.closed_at.isnot(None),
-                Deal.organization_id == current_user.organization_id
-            ).count()
-        except Exception as e:
-            logger.warning(f"closed_deals query failed: {e}")
-            closed_deals = 0
-        
-        # Total revenue from closed deals
-        try:
-            total_revenue = db.query(func.sum(Deal.value)).filter(
-                Deal.closed_at.isnot(None),
-                Deal.organization_id == current_user.organization_id
-            ).scalar() or 0
-        except Exception as e:
-            logger.warning(f"total_revenue query failed: {e}")
-            total_revenue = 0
-        
-        # Calculate AI score based on various factors
-        try:
-            total_deals = db.query(Deal).filter(Deal.organization_id == current_user.organization_id).count()
-        except Exception as e:
-            logger.warning(f"total_deals query failed: {e}")
-            total_deals = 0
-        try:
-            deals_with_activities = db.query(Deal).join(Activity, isouter=True).filter(
-                Deal.organization_id == current_user.organization_id,
-                Activity.id.isnot(None)
-            ).distinct().count()
-        except Exception as e:
-            logger.warning(f"deals_with_activities query failed: {e}")
-            deals_with_activities = 0
-        try:
-            deals_with_reminders = db.query(Deal).filter(
-                Deal.reminder_date.isnot(None),
-                Deal.organization_id == current_user.organization_id
-            ).count()
-        except Exception as e:
-            logger.warning(f"deals_with_reminders query failed: {e}")
-            deals_with_reminders = 0
-        
-        ai_score = 0
-        if total_deals > 0:
-            activity_score = (deals_with_activities / total_deals) * 40
-            reminder_score = (deals_with_reminders / total_deals) * 30
-            revenue_score = min((total_revenue / 1000000) * 30, 30)  # Cap at 30 points
-            ai_score = min(int(activity_score + reminder_score + revenue_score), 100)
-        
-        # Calculate quality score for leads
-        try:
-            qualified_leads = db.query(Lead).filter(
-                Lead.status == 'qualified',
-                Lead.organization_id == current_user.organization_id
-            ).count()
-        except Exception as e:
-            logger.warning(f"qualified_leads query failed: {e}")
-            qualified_leads = 0
-        lead_quality_score = (qualified_leads / max(active_leads, 1)) * 10
-        
-        # Calculate conversion rate
-        conversion_rate = (closed_deals / max(active_leads + closed_deals, 1)) * 100
-        
-        # Calculate revenue target achievement
-        revenue_target = 1000000  # $1M target
-        target_achievement = (total_revenue / max(revenue_target, 1)) * 100
-        
-        return DashboardMetrics(
-            active_leads=active_leads,
-            closed_deals=closed_deals,
-            total_revenue=int(total_revenue),
-            ai_score=int(ai_score),
-            lead_quality_score=round(lead_quality_score, 1),
-            conversion_rate=round(conversion_rate, 1),
-            target_achievement=round(target_achievement, 1)
+        return dict(db.execute(statement).mappings().one())
+    except Exception as e:
+        logger.warning(f"{label} aggregates query failed: {e}")
+        return {}
+
+
+def lead_aggregates(db: Session, organization_id: int) -> Dict[str, Any]:
+    """Lead status figures, in one pass over the org's leads."""
+    columns = [
+        func.count().filter(lead_status_bucket == bucket).label(bucket) for bucket in LEAD_STATUS_BUCKETS
+    ]
+    # The quality score has always counted the exact lower-case status only
+    columns.append(func.count().filter(Lead.status == 'qualified').label("qualified_exact"))
+    statement = select(*columns).select_from(Lead).where(Lead.organization_id == organization_id)
+    return _aggregate_row(db, statement, "lead")
+
+
+def deal_aggregates(db: Session, organization_id: int) -> Dict[str, Any]:
+    """Deal totals, in one pass over the org's deals."""
+    closed = Deal.closed_at.isnot(None)
+    has_activity = exists().where(Activity.deal_id == Deal.id)
+    columns = [
+        func.count().label("total_deals"),
+        func.count().filter(closed).label("closed_deals"),
+        func.sum(Deal.value).filter(closed).label("total_revenue"),
+        func.count().filter(Deal.reminder_date.isnot(None)).label("deals_with_reminders"),
+        func.count().filter(has_activity).label("deals_with_activities"),
+    ]
+    statement = select(*columns).select_from(Deal).where(Deal.organization_id == organization_id)
+    return _aggregate_row(db, statement, "deal")
+
+
+def build_metrics(leads: Dict[str, Any], deals: Dict[str, Any]) -> DashboardMetrics:
+    active_leads = sum(leads.get(bucket) or 0 for bucket in ACTIVE_LEAD_BUCKETS)
+    closed_deals = deals.get("closed_deals") or 0
+    total_revenue = deals.get("total_revenue") or 0
+    total_deals = deals.get("total_deals") or 0
+
+    # AI score from activity coverage, reminders and revenue
+    ai_score = 0
+    if total_deals > 0:
+        activity_score = ((deals.get("deals_with_activities") or 0) / total_deals) * 40
+        reminder_score = ((deals.get("deals_with_reminders") or 0) / total_deals) * 30
+        revenue_score = min((total_revenue / 1000000) * 30, 30)  # Cap at 30 points
+        ai_score = min(int(activity_score + reminder_score + revenue_score), 100)
+
+    lead_quality_score = ((leads.get("qualified_exact") or 0) / max(active_leads, 1)) * 10
+    conversion_rate = (closed_deals / max(active_leads + closed_deals, 1)) * 100
+    target_achievement = (total_revenue / max(REVENUE_TARGET, 1)) * 100
+
+    return DashboardMetrics(
+        active_leads=active_leads,
+        closed_deals=closed_deals,
+        total_revenue=int(total_revenue),
+        ai_score=int(ai_score),
+        lead_quality_score=round(lead_quality_score, 1),
+        conversion_rate=round(conversion_rate, 1),
+        target_achievement=round(target_achievement, 1)
+    )
+
+
+def monthly_performance(db: Session, organization_id: int, months: Sequence[datetime]) -> Dict[str, Any]:
+    """Per-month leads, deals and closed revenue from the daily rollup (O(days), not O(rows))."""
+    try:
+        return monthly_totals(db, organization_id, _month_ranges(months))
+    except Exception as e:
+        logger.warning(f"monthly rollup query failed: {e}")
+        return {}
+
+
+def build_performance(months: Sequence[datetime], totals: Dict[str, Any]) -> List[PerformanceData]:
+    return [
+        PerformanceData(
+            month=month.strftime("%b"),
+            leads=int(totals.get(f"leads_created_{i}") or 0),
+            deals=int(totals.get(f"deals_created_{i}") or 0),
+            revenue=int(totals.get(f"revenue_closed_{i}") or 0)
         )
+        for i, month in enumerate(months)
+    ]
+
+
+def build_lead_quality(leads: Dict[str, Any]) -> List[LeadQualityData]:
+    counts = {bucket: leads.get(bucket) or 0 for bucket in LEAD_STATUS_BUCKETS}
+    total_leads = sum(counts.values())
+    return [
+        LeadQualityData(
+            name=bucket.capitalize(),
+            value=int((count / total_leads) * 100) if total_leads else 0,
+            color=LEAD_QUALITY_COLORS[bucket]
+        )
+        for bucket, count in counts.items()
+    ]
+
+def _cached(response: Response, organization_id: int, section: str, compute):
+    # conditional_get has put the org's change token on the response; the entry
+    # is stored under it and any other token is a miss
+    token = response.headers.get("etag") if response is not None else None
+
+    def served_stale():
+        # The ETag names the current data, so a stale body must not be stored under it
+        if response is not None and "etag" in response.headers:
+            del response.headers["etag"]
+
+    return dashboard_cache.get_or_compute(organization_id, section, compute, on_stale=served_stale, token=token)
+
+
+def compute_metrics(db: Session, organization_id: int) -> DashboardMetrics:
+    return build_metrics(lead_aggregates(db, organization_id), deal_aggregates(db, organization_id))
+
+
+def compute_performance(db: Session, organization_id: int) -> List[PerformanceData]:
+    months = performance_months()
+    return build_performance(months, monthly_performance(db, organization_id, months))
+
+
+def compute_lead_quality(db: Session, organization_id: int) -> List[LeadQualityData]:
+    return build_lead_quality(lead_aggregates(db, organization_id))
+
+
+@router.get("/metrics", response_model=DashboardMetrics, dependencies=[Depends(conditional_get("dashboard"))])
+def get_dashboard_metrics(current_user: User = Depends(get_current_user), db: Session = Depends(get_db), response: Response = None):
+    """Get dashboard metrics including active leads, closed deals, revenue, and AI score"""
+    try:
+        organization_id = current_user.organization_id
+        return _cached(response, organization_id, "metrics", lambda: compute_metrics(db, organization_id))
     except Exception as e:
         logger.error(f"Error fetching dashboard metrics: {e}")
         raise HTTPException(status_code=500, detail=f"Error fetching dashboard metrics: {str(e)}")
 
-@router.get("/performance", response_model=List[PerformanceData])
-def get_performance_data(current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+@router.get("/performance", response_model=List[PerformanceData], dependencies=[Depends(conditional_get("dashboard"))])
+def get_performance_data(current_user: User = Depends(get_current_user), db: Session = Depends(get_db), response: Response = None):
     """Get performance data for the last 6 months"""
     try:
-        end_date = datetime.now()
-        start_date = end_date - timedelta(days=180)
-        
-        performance_data = []
-        current_date = start_date
-        
-        for i in range(6):
-            month_start = current_date.replace(day=1)
-            month_end = (month_start + timedelta(days=32)).replace(day=1) - timedelta(days=1)
-            try:
-                leads_count = db.query(Lead).filter(
-                    and_(
-                        Lead.created_at >= month_start,
-                        Lead.created_at <= month_end,
-                        Lead.organization_id == current_user.organization_id
-                    )
-                ).count()
-            except Exception as e:
-                logger.warning(f"leads_count month {i} failed: {e}")
-                leads_count = 0
-            try:
-                deals_count = db.query(Deal).filter(
-                    and_(
-                        Deal.created_at >= month_start,
-                        Deal.created_at <= month_end,
-                        Deal.organization_id == current_user.organization_id
-                    )
-                ).count()
-            except Exception as e:
-                logger.warning(f"deals_count month {i} failed: {e}")
-                deals_count = 0
-            try:
-                revenue = db.query(func.sum(Deal.value)).filter(
-                    and_(
-                        Deal.closed_at.isnot(None),
-                        Deal.closed_at >= month_start,
-                        Deal.closed_at <= month_end,
-                        Deal.organization_id == current_user.organization_id
-                    )
-                ).scalar() or 0
-            except Exception as e:
-                logger.warning(f"revenue month {i} failed: {e}")
-                revenue = 0
-            performance_data.append(PerformanceData(
-                month=month_start.strftime("%b"),
-                leads=leads_count,
-                deals=deals_count,
-                revenue=int(revenue)
-            ))
-            current_date = (current_date + timedelta(days=32)).replace(day=1)
-        
-        return performance_data
+        organization_id = current_user.organization_id
+        return _cached(response, organization_id, "performance", lambda: compute_performance(db, organization_id))
     except Exception as e:
         logger.error(f"Error fetching performance data: {e}")
         raise HTTPException(status_code=500, detail=f"Error fetching performance data: {str(e)}")
 
-@router.get("/lead-quality", response_model=List[LeadQualityData])
-def get_lead_quality_data(current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+@router.get("/lead-quality", response_model=List[LeadQualityData], dependencies=[Depends(conditional_get("dashboard"))])
+def get_lead_quality_data(current_user: User = Depends(get_current_user), db: Session = Depends(get_db), response: Response = None):
     """Get lead quality distribution data"""
     try:
-        try:
-            qualified_count = db.query(Lead).filter(
-                Lead.status.in_(['qualified', 'Qualified', 'Proposal Sent']),
-                Lead.organization_id == current_user.organization_id
-            ).count()
-        except Exception as e:
-            logger.warning(f"qualified_count failed: {e}")
-            qualified_count = 0
-        try:
-            nurturing_count = db.query(Lead).filter(
-                Lead.status.in_(['contacted', 'Contacted', 'Negotiation']),
-                Lead.organization_id == current_user.organization_id
-            ).count()
-        except Exception as e:
-            logger.warning(f"nurturing_count failed: {e}")
-            nurturing_count = 0
-        try:
-            cold_count = db.query(Lead).filter(
-                Lead.status.in_(['new', 'New']),
-                Lead.organization_id == current_user.organization_id
-            ).count()
-        except Exception as e:
-            logger.warning(f"cold_count failed: {e}")
-            cold_count = 0
-        try:
-            hot_count = db.query(Lead).filter(
-                Lead.status.in_(['hot', 'Hot', 'Won']),
-                Lead.organization_id == current_user.organization_id
-            ).count()
-        except Exception as e:
-            logger.warning(f"hot_count failed: {e}")
-            hot_count = 0
-        
-        total_leads = qualified_count + nurturing_count + cold_count + hot_count
-        if total_leads == 0:
-            return [
-                LeadQualityData(name="Qualified", value=0, color="#22c55e"),
-                LeadQualityData(name="Nurturing", value=0, color="#fbbf24"),
-                LeadQualityData(name="Cold", value=0, color="#64748b"),
-                LeadQualityData(name="Hot", value=0, color="#a21caf")
-            ]
-        
-        return [
-            LeadQualityData(name="Qualified", value=int((qualified_count / total_leads) * 100), color="#22c55e"),
-            LeadQualityData(name="Nurturing", value=int((nurturing_count / total_leads) * 100), color="#fbbf24"),
-            LeadQualityData(name="Cold", value=int((cold_count / total_leads) * 100), color="#64748b"),
-            LeadQualityData(name="Hot", value=int((hot_count / total_leads) * 100), color="#a21caf")
-        ]
+        organization_id = current_user.organization_id
+        return _cached(response, organization_id, "lead_quality", lambda: compute_lead_quality(db, organization_id))
     except Exception as e:
         logger.error(f"Error fetching lead quality data: {e}")
         raise HTTPException(status_code=500, detail=f"Error fetching lead quality data: {str(e)}")
 
-@router.get("/activity-feed", response_model=List[ActivityFeedItem])
+ACTIVITY_ICONS = {
+    'deal_moved': 'CheckCircle',
+    'deal_created': 'Plus',
+    'deal_closed': 'CheckCircle',
+    'lead_created': 'UserPlus',
+    'contact_added': 'UserPlus',
+    'reminder_set': 'Clock',
+    'note_added': 'MessageCircle',
+    'ai_insight': 'Zap'
+}
+ACTIVITY_COLORS = {
+    'deal_moved': 'yellow',
+    'deal_created': 'green',
+    'deal_closed': 'green',
+    'lead_created': 'blue',
+    'contact_added': 'blue',
+    'reminder_set': 'orange',
+    'note_added': 'blue',
+    'ai_insight': 'pink'
+}
+
+
+def activity_feed_item(activity: Activity) -> ActivityFeedItem:
+    icon = ACTIVITY_ICONS.get(getattr(activity, 'type', '') or '', 'MessageCircle')
+    color = ACTIVITY_COLORS.get(getattr(activity, 'type', '') or '', 'blue')
+    ts = getattr(activity, 'timestamp', None)
+    if ts is None:
+        time_ago = "just now"
+    else:
+        try:
+            time_diff = datetime.now() - ts
+            if time_diff.days > 0:
+                time_ago = f"{time_diff.days} day{'s' if time_diff.days > 1 else ''} ago"
+            elif time_diff.seconds > 3600:
+                hours = time_diff.seconds // 3600
+                time_ago = f"{hours} hour{'s' if hours > 1 else ''} ago"
+            else:
+                minutes = max(1, time_diff.seconds // 60)
+                time_ago = f"{minutes} min ago"
+        except Exception:
+            time_ago = "just now"
+    title = getattr(activity, 'message', None) or 'Activity'
+    return ActivityFeedItem(
+        icon=icon,
+        color=f"bg-{color}-100",
+        title=title,
+        time=time_ago
+    )
+
+
+@router.get("/activity-feed", response_model=List[ActivityFeedItem], dependencies=[Depends(conditional_get("dashboard", refresh_seconds=60))])
 def get_activity_feed(current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
     """Get recent activity feed for dashboard"""
     try:
@@ -239,72 +279,65 @@ def get_activity_feed(current_user: User = Depends(get_current_user), db: Sessio
             Activity.timestamp.desc().nullslast()
         ).limit(10).all()
         
-        activity_feed = []
-        for activity in activities:
-            icon_map = {
-                'deal_moved': 'CheckCircle',
-                'deal_created': 'Plus',
-                'deal_closed': 'CheckCircle',
-                'lead_created': 'UserPlus',
-                'contact_added': 'UserPlus',
-                'reminder_set': 'Clock',
-                'note_added': 'MessageCircle',
-                'ai_insight': 'Zap'
-            }
-            color_map = {
-                'deal_moved': 'yellow',
-                'deal_created': 'green',
-                'deal_closed': 'green',
-                'lead_created': 'blue',
-                'contact_added': 'blue',
-                'reminder_set': 'orange',
-                'note_added': 'blue',
-                'ai_insight': 'pink'
-            }
-            icon = icon_map.get(getattr(activity, 'type', '') or '', 'MessageCircle')
-            color = color_map.get(getattr(activity, 'type', '') or '', 'blue')
-            ts = getattr(activity, 'timestamp', None)
-            if ts is None:
-                time_ago = "just now"
-            else:
-                try:
-                    time_diff = datetime.now() - ts
-                    if time_diff.days > 0:
-                        time_ago = f"{time_diff.days} day{'s' if time_diff.days > 1 else ''} ago"
-                    elif time_diff.seconds > 3600:
-                        hours = time_diff.seconds // 3600
-                        time_ago = f"{hours} hour{'s' if hours > 1 else ''} ago"
-                    else:
-                        minutes = max(1, time_diff.seconds // 60)
-                        time_ago = f"{minutes} min ago"
-                except Exception:
-                    time_ago = "just now"
-            title = getattr(activity, 'message', None) or 'Activity'
-            activity_feed.append(ActivityFeedItem(
-                icon=icon,
-                color=f"bg-{color}-100",
-                title=title,
-                time=time_ago
-            ))
-        return activity_feed
+        return [activity_feed_item(activity) for activity in activities]
     except Exception as e:
         logger.error(f"Error fetching activity feed: {e}")
         raise HTTPException(status_code=500, detail=f"Error fetching activity feed: {str(e)}")
 
-@router.get("/", response_model=DashboardData)
-def get_dashboard_data(current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+def compute_dashboard(db: Session, current_user: User) -> DashboardData:
+    # One aggregate query per table feeds all the chart sections
+    organization_id = current_user.organization_id
+    leads = lead_aggregates(db, organization_id)
+    deals = deal_aggregates(db, organization_id)
+    return DashboardData(
+        metrics=build_metrics(leads, deals),
+        performance=compute_performance(db, organization_id),
+        lead_quality=build_lead_quality(leads),
+        activity_feed=get_activity_feed(current_user, db)
+    )
+
+@router.get("/", response_model=DashboardData, dependencies=[Depends(conditional_get("dashboard", refresh_seconds=60))])
+def get_dashboard_data(current_user: User = Depends(get_current_user), db: Session = Depends(get_db), response: Response = None):
     """Get all dashboard data in one endpoint"""
     try:
-        metrics = get_dashboard_metrics(current_user, db)
-        performance = get_performance_data(current_user, db)
-        lead_quality = get_lead_quality_data(current_user, db)
-        activity_feed = get_activity_feed(current_user, db)
-        return DashboardData(
-            metrics=metrics,
-            performance=performance,
-            lead_quality=lead_quality,
-            activity_feed=activity_feed
-        )
+        return _cached(response, current_user.organization_id, "dashboard", lambda: compute_dashboard(db, current_user))
     except Exception as e:
         logger.error(f"Error fetching dashboard data: {e}")
-        raise HTTPException(status_code=500, detail=f"Error fetching dashboard data: {str(e)}") 
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Error fetching dashboard data: {str(e)}") 
+
+# --- live stream --------------------------------------------------------------
+
+LIVE_ACTIVITY_LIMIT = 10
+
+
+def load_live_snapshot(db: Session, organization_id: int, previous: Optional[LiveSnapshot]) -> LiveSnapshot:
+    """Metrics card figures plus the activities added since ``previous``."""
+    served_stale = []
+    metrics = dashboard_cache.get_or_compute(
+        organization_id, "metrics", lambda: compute_metrics(db, organization_id),
+        on_stale=lambda: served_stale.append(True),
+    )
+    query = db.query(Activity).join(Deal, Activity.deal_id == Deal.id).filter(Deal.organization_id == organization_id)
+    if previous is not None and previous.cursor is not None:
+        query = query.filter(Activity.id > previous.cursor)
+    activities = query.order_by(Activity.id.desc()).limit(LIVE_ACTIVITY_LIMIT).all()
+    cursor = activities[0].id if activities else (previous.cursor if previous is not None else None)
+    return LiveSnapshot(
+        metrics=metrics.model_dump(),
+        activities=[activity_feed_item(activity).model_dump() for activity in activities],
+        cursor=cursor,
+        stale=bool(served_stale),
+    )
+
+
+live_stream = DashboardStream(load_live_snapshot)
+
+
+@router.get("/stream")
+async def stream_dashboard(request: Request, current_user: User = Depends(get_current_user)):
+    """Server-sent events: a snapshot of the metrics and activity feed, then deltas as writes commit"""
+    return StreamingResponse(
+        live_stream.events(current_user.organization_id, request),
+        media_type=SSE_MEDIA_TYPE,
+        headers=SSE_HEADERS,
+    )
@@ -0,0 +1,60 @@
+"""
+Bulk import of contacts and leads from CSV or NDJSON uploads.
+
+    POST /api/imports/contacts?update_existing=true   (multipart field "file")
+    POST /api/imports/leads
+
+See api/services/bulk_import.py for the column list, dedupe rules and report.
+"""
+from pathlib import Path
+from typing import Optional
+
+from fastapi import APIRouter, Depends, File, HTTPException, Query, UploadFile, status
+from sqlalchemy.orm import Session
+
+from ..dependencies import get_current_user, get_db
+from ..models import User
+from ..services.bulk_import import CONTACT_FIELDS, IMPORTS, LEAD_FIELDS, ImportFormatError, run_import
+
+router = APIRouter(prefix="/api/imports", tags=["imports"])
+
+_FORMATS_BY_SUFFIX = {".csv": "csv", ".ndjson": "ndjson", ".jsonl": "ndjson"}
+
+
+@router.get("/{entity}/columns")
+def import_columns(entity: str, current_user: User = Depends(get_current_user)):
+    """Columns accepted for an import"""
+    if entity not in IMPORTS:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Unknown import '{entity}'")
+    return {"entity": entity, "columns": list(CONTACT_FIELDS if entity == "contacts" else LEAD_FIELDS)}
+
+
+@router.post("/{entity}")
+def import_entity(
+    entity: str,
+    file: UploadFile = File(...),
+    format: Optional[str] = Query(None, pattern="^(csv|ndjson)$", description="Defaults to the file extension"),
+    update_existing: bool = Query(False, description="Contacts: update matched contacts instead of skipping them"),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """Import contacts or leads; returns counts and per-row errors"""
+    if entity not in IMPORTS:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Unknown import '{entity}'")
+    file_format = format or _FORMATS_BY_SUFFIX.get(Path(file.filename or "").suffix.lower())
+    if file_format is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Pass format=csv|ndjson or upload a .csv, .ndjson or .jsonl file",
+        )
+
+    try:
+        report = run_import(db, entity, file.file, file_format, current_user, update_existing=update_existing)
+        db.commit()
+    except ImportFormatError as e:
+        db.rollback()
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except Exception:
+        db.rollback()
+        raise
+    return report.as_dict()
@@ -1,17 +1,25 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Request
+from fastapi.encoders import jsonable_encoder
 from sqlalchemy.orm import Session
 from typing import List, Optional
+from backend.api.crud import kanban as kanban_crud
 from backend.api.crud.kanban import (
-    get_kanban_board,
+    BOARD_PAGE_SIZE, MAX_BOARD_PAGE_SIZE, DealFilters,
+    get_kanban_board, get_kanban_board_columns, get_stage_deals, get_deal_card,
     get_stage, get_stages, create_stage, update_stage, delete_stage,
-    get_deal, create_deal, update_deal, delete_deal, move_deal
+    move_deal, DealBatchError, apply_deal_batch
 )
 from backend.api.schemas.kanban import (
     StageBase, StageCreate, StageUpdate, StageOut,
     DealBase, DealCreate, DealUpdate, DealOut,
-    DealMoveRequest, KanbanBoard
+    DealMoveRequest, DealBatchRequest, DealBatchResult, KanbanBoard, KanbanBoardColumns
 )
 from backend.api.dependencies import get_db, get_current_user
+from backend.api.fast_json import json_response
+from backend.api.change_tokens import conditional_get, etag_headers
+from backend.api.pagination import next_page_headers
+from backend.api.deal_ranking import needs_rebalance, rebalance_in_background
+from backend.api.websocket import manager as ws_manager
 from backend.api.models import Deal, User
 
 router = APIRouter(
@@ -21,12 +29,63 @@ router = APIRouter(
 )
 
 @router.get("/board", response_model=KanbanBoard)
-def get_board(current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+def get_board(
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+    etag: str = Depends(conditional_get("board")),
+):
     """
-    Get the complete Kanban board with all stages and deals
+    Get the complete Kanban board with all stages and deals.
+    Answers If-None-Match with 304 before building the board.
     """
     board = get_kanban_board(db, organization_id=current_user.organization_id)
-    return board
+    # Rows already have the KanbanBoard shape; encode them without re-validation
+    return json_response(board, headers=etag_headers(etag))
+
+def deal_filters(
+    owner_id: Optional[int] = Query(None, description="Only deals owned by this user"),
+    tag_id: Optional[int] = Query(None, description="Only deals with this tag"),
+    min_value: Optional[float] = Query(None, description="Minimum deal value"),
+    max_value: Optional[float] = Query(None, description="Maximum deal value"),
+    search: Optional[str] = Query(None, min_length=1, max_length=100, description="Text in the deal title"),
+) -> DealFilters:
+    if min_value is not None and max_value is not None and min_value > max_value:
+        raise HTTPException(status_code=400, detail="min_value must not exceed max_value")
+    return DealFilters(owner_id=owner_id, tag_id=tag_id, min_value=min_value, max_value=max_value, search=search)
+
+@router.get("/board/columns", response_model=KanbanBoardColumns)
+def get_board_columns(
+    per_stage: int = Query(BOARD_PAGE_SIZE, ge=1, le=MAX_BOARD_PAGE_SIZE, description="Cards per stage"),
+    filters: DealFilters = Depends(deal_filters),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+    etag: str = Depends(conditional_get("board")),
+):
+    """
+    Lazy-loading board: each stage's deal count and value sum plus its first
+    cards. Further cards come from /stages/{stage_id}/deals with the stage's
+    next_cursor. The cost does not grow with the number of deals in the org.
+    """
+    board = get_kanban_board_columns(db, current_user.organization_id, filters, per_stage)
+    return json_response(board, headers=etag_headers(etag))
+
+@router.get("/stages/{stage_id}/deals", response_model=List[DealOut])
+def read_stage_deals(
+    stage_id: int,
+    request: Request,
+    limit: int = Query(BOARD_PAGE_SIZE, ge=1, le=MAX_BOARD_PAGE_SIZE, description="Number of cards to return"),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from next_cursor or X-Next-Cursor"),
+    filters: DealFilters = Depends(deal_filters),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+    etag: str = Depends(conditional_get("board")),
+):
+    """
+    Next page of a stage's cards, with the same filters as the board.
+    X-Next-Cursor/Link are sent while more cards follow.
+    """
+    deals, next_cursor = get_stage_deals(db, current_user.organization_id, stage_id, filters, cursor, limit)
+    return json_response(deals, headers={**etag_headers(etag), **next_page_headers(request, next_cursor, limit)})
 
 # Stage endpoints
 @router.post("/stages/", response_model=StageOut)
@@ -75,41 +134,58 @@ def delete_stage(stage_id: int, db: Session = Depends(get_db)):
         raise HTTPException(status_code=404, detail="Stage not found")
     return {"status": "success", "message": "Stage deleted successfully"}
 
+# Board deltas: every committed deal write is pushed to the org's board
+# viewers over the WebSocket manager (see ConnectionManager.publish_board_deltas)
+def deal_delta(deal_id: int, from_stage_id, stage_id, rank=None, changes: Optional[dict] = None,
+               deleted: bool = False) -> dict:
+    delta = {"id": deal_id, "from_stage_id": from_stage_id, "stage_id": stage_id, "rank": rank}
+    if changes:
+        delta["changes"] = jsonable_encoder(changes)
+    if deleted:
+        delta["deleted"] = True
+    return delta
+
 # Deal endpoints
 @router.post("/deals/", response_model=DealOut)
-def create_deal(deal: DealCreate, db: Session = Depends(get_db)) -> DealOut:
+def create_deal(deal: DealCreate, background_tasks: BackgroundTasks, db: Session = Depends(get_db)) -> DealOut:
     """
-    Create a new deal in the Kanban board
+    Create a new deal on top of its stage in the Kanban board
     """
-    return create_deal(db=db, deal=deal)
+    db_deal = kanban_crud.create_deal(db=db, deal=deal)
+    if needs_rebalance(db_deal.rank):
+        background_tasks.add_task(rebalance_in_background, db_deal.organization_id, db_deal.stage_id)
+    ws_manager.publish_board_deltas(db_deal.organization_id, [
+        deal_delta(db_deal.id, None, db_deal.stage_id, db_deal.rank, changes=deal.dict())
+    ])
+    return db_deal
 
 @router.get("/deals/{deal_id}", response_model=DealOut)
 def read_deal(deal_id: int, db: Session = Depends(get_db)) -> DealOut:
     """
     Get a specific deal by ID
     """
-    db_deal = get_deal(db, deal_id=deal_id)
-    if not db_deal:
+    deal_card = get_deal_card(db, deal_id)
+    if not deal_card:
         raise HTTPException(status_code=404, detail="Deal not found")
-    
-    # Convert the result to a dictionary and handle the unpacked fields
-    deal_data = db_deal[0].__dict__
-    deal_data["contact_name"] = db_deal[1]
-    deal_data["owner_name"] = db_deal[2]
-    deal_data["stage_name"] = db_deal[3]
-    
-    return deal_data
+    return deal_card
 
 @router.put("/deals/{deal_id}", response_model=DealOut)
 def update_deal(
-    deal_id: int, deal: DealUpdate, db: Session = Depends(get_db)
+    deal_id: int, deal: DealUpdate, background_tasks: BackgroundTasks, db: Session = Depends(get_db)
 ) -> DealOut:
     """
     Update a deal's details
     """
-    db_deal = update_deal(db=db, deal_id=deal_id, deal=deal)
+    db_deal = db.get(Deal, deal_id)
     if db_deal is None:
         raise HTTPException(status_code=404, detail="Deal not found")
+    from_stage_id = db_deal.stage_id
+    db_deal = kanban_crud.update_deal(db=db, deal_id=deal_id, deal=deal)
+    if needs_rebalance(db_deal.rank):
+        background_tasks.add_task(rebalance_in_background, db_deal.organization_id, db_deal.stage_id)
+    ws_manager.publish_board_deltas(db_deal.organization_id, [
+        deal_delta(deal_id, from_stage_id, db_deal.stage_id, db_deal.rank, changes=deal.dict(exclude_unset=True))
+    ])
     return db_deal
 
 @router.delete("/deals/{deal_id}", response_model=dict)
@@ -117,52 +193,81 @@ def delete_deal(deal_id: int, db: Session = Depends(get_db)):
     """
     Delete a deal
     """
-    if not delete_deal(db=db, deal_id=deal_id):
+    db_deal = db.get(Deal, deal_id)
+    if db_deal is None:
         raise HTTPException(status_code=404, detail="Deal not found")
+    organization_id, from_stage_id = db_deal.organization_id, db_deal.stage_id
+    kanban_crud.delete_deal(db=db, deal_id=deal_id)
+    ws_manager.publish_board_deltas(organization_id, [deal_delta(deal_id, from_stage_id, None, deleted=True)])
     return {"status": "success", "message": "Deal deleted successfully"}
 
+@router.post("/deals/batch", response_model=DealBatchResult)
+def batch_update_deals(
+    batch: DealBatchRequest,
+    background_tasks: BackgroundTasks,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+) -> DealBatchResult:
+    """
+    Move and/or patch many deals in one transaction: all operations apply or
+    none do. Exceeding a stage's WIP limit is a 409 listing the stages.
+    """
+    try:
+        result = apply_deal_batch(db, current_user.organization_id, batch.operations)
+    except DealBatchError as e:
+        db.rollback()
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+    for stage_id in {deal["stage_id"] for deal in result["deals"] if needs_rebalance(deal["rank"])}:
+        background_tasks.add_task(rebalance_in_background, current_user.organization_id, stage_id)
+    patched = {
+        op.deal_id: op.dict(include=set(kanban_crud.BATCH_PATCH_FIELDS) & op.model_fields_set)
+        for op in batch.operations
+    }
+    ws_manager.publish_board_deltas(current_user.organization_id, [
+        deal_delta(deal["id"], deal["from_stage_id"], deal["stage_id"], deal["rank"], changes=patched[deal["id"]])
+        for deal in result["deals"]
+    ])
+    return result
+
 @router.post("/deals/{deal_id}/move", response_model=DealOut)
 def move_deal_to_stage(
     deal_id: int,
     move_request: DealMoveRequest,
+    background_tasks: BackgroundTasks,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ) -> DealOut:
     """
-    Move a deal to a different stage and optionally specify its position
+    Move a deal to a different stage and place it under above_deal_id, over
+    below_deal_id or at position (top of the stage by default)
     """
-    db_deal = move_deal(
-        db=db,
-        deal_id=deal_id,
-        new_stage_id=move_request.to_stage_id,
-        new_position=move_request.position
-    )
+    previous = db.get(Deal, deal_id)
+    from_stage_id = previous.stage_id if previous is not None else None
+    try:
+        db_deal = move_deal(
+            db=db,
+            deal_id=deal_id,
+            new_stage_id=move_request.to_stage_id,
+            new_position=move_request.position,
+            above_deal_id=move_request.above_deal_id,
+            below_deal_id=move_request.below_deal_id,
+            organization_id=current_user.organization_id
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     if db_deal is None:
         raise HTTPException(status_code=404, detail="Deal not found")
+    if needs_rebalance(db_deal.rank):
+        background_tasks.add_task(rebalance_in_background, db_deal.organization_id, db_deal.stage_id)
+    ws_manager.publish_board_deltas(db_deal.organization_id, [
+        deal_delta(deal_id, from_stage_id, db_deal.stage_id, db_deal.rank)
+    ])
 
     # Return the deal with related data
-    deal_with_data = get_deal(db, deal_id)
-    if not deal_with_data:
+    deal_card = get_deal_card(db, deal_id)
+    if not deal_card:
         raise HTTPException(status_code=404, detail="Deal not found after move")
-
-    # Convert to proper format
-    deal, contact_name, owner_name, stage_name = deal_with_data
-    deal_dict = {
-        "id": deal.id,
-        "title": deal.title,
-        "description": deal.description,
-        "value": deal.value,
-        "contact_id": deal.contact_id,
-        "owner_id": deal.owner_id,
-        "stage_id": deal.stage_id,
-        "reminder_date": deal.reminder_date,
-        "created_at": deal.created_at,
-        "contact_name": contact_name,
-        "owner_name": owner_name,
-        "stage_name": stage_name,
-        "watchers": [user.name for user in deal.watchers]
-    }
-    return deal_dict
+    return deal_card
 
 @router.post("/deals/{deal_id}/watch", response_model=DealOut)
 def add_watcher(deal_id: int, db: Session = Depends(get_db)):
@@ -174,25 +279,11 @@ def add_watcher(deal_id: int, db: Session = Depends(get_db)):
     if user not in deal.watchers:
         deal.watchers.append(user)
         db.commit()
-        db.refresh(deal)
-    
-    # Convert to proper format for response
-    deal_dict = {
-        "id": deal.id,
-        "title": deal.title,
-        "description": deal.description,
-        "value": deal.value,
-        "contact_id": deal.contact_id,
-        "owner_id": deal.owner_id,
-        "stage_id": deal.stage_id,
-        "reminder_date": deal.reminder_date,
-        "created_at": deal.created_at,
-        "contact_name": None,
-        "owner_name": None,
-        "stage_name": None,
-        "watchers": [user.name for user in deal.watchers]
-    }
-    return deal_dict
+    deal_card = get_deal_card(db, deal_id)
+    ws_manager.publish_board_deltas(deal.organization_id, [
+        deal_delta(deal_id, deal.stage_id, deal.stage_id, deal.rank, changes={"watchers": deal_card["watchers"]})
+    ])
+    return deal_card
 
 @router.delete("/deals/{deal_id}/watch", response_model=DealOut)
 def remove_watcher(deal_id: int, db: Session = Depends(get_db)):
@@ -204,22 +295,8 @@ def remove_watcher(deal_id: int, db: Session = Depends(get_db)):
     if user in deal.watchers:
         deal.watchers.remove(user)
         db.commit()
-        db.refresh(deal)
-    
-    # Convert to proper format for response
-    deal_dict = {
-        "id": deal.id,
-        "title": deal.title,
-        "description": deal.description,
-        "value": deal.value,
-        "contact_id": deal.contact_id,
-        "owner_id": deal.owner_id,
-        "stage_id": deal.stage_id,
-        "reminder_date": deal.reminder_date,
-        "created_at": deal.created_at,
-        "contact_name": None,
-        "owner_name": None,
-        "stage_name": None,
-        "watchers": [user.name for user in deal.watchers]
-    }
-    return deal_dict
+    deal_card = get_deal_card(db, deal_id)
+    ws_manager.publish_board_deltas(deal.organization_id, [
+        deal_delta(deal_id, deal.stage_id, deal.stage_id, deal.rank, changes={"watchers": deal_card["watchers"]})
+    ])
+    return deal_card
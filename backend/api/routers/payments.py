@@ -4,11 +4,12 @@ Handles all payment-related endpoints including Stripe integration
 """
 
 from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks
-from sqlalchemy.orm import Session
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 import logging
 
-from api.db import get_db
+from api.db import get_async_db
 from api.models import PaymentMethod, StripePayment, StripeSubscription, StripeSubscriptionPlan, Contact, Invoice, User
 from api.schemas.payments import (
     PaymentMethodCreate, PaymentMethodUpdate, PaymentMethodResponse,
@@ -30,16 +31,16 @@ router = APIRouter(prefix="/payments", tags=["payments"])
 @router.post("/payment-methods", response_model=PaymentMethodResponse)
 async def create_payment_method(
     payment_method_data: PaymentMethodCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Create a new payment method for a customer"""
     try:
         # Get the contact
-        contact = db.query(Contact).filter(
+        contact = (await db.execute(select(Contact).filter(
             Contact.id == payment_method_data.customer_id,
             Contact.organization_id == current_user.organization_id
-        ).first()
+        ))).scalars().first()
         
         if not contact:
             raise HTTPException(status_code=404, detail="Contact not found")
@@ -56,8 +57,8 @@ async def create_payment_method(
             raise HTTPException(status_code=400, detail="Failed to create payment method")
         
         db.add(db_payment_method)
-        db.commit()
-        db.refresh(db_payment_method)
+        await db.commit()
+        await db.refresh(db_payment_method)
         
         logger.info(f"Created payment method: {db_payment_method.id}")
         return db_payment_method
@@ -69,19 +70,19 @@ async def create_payment_method(
 @router.get("/payment-methods", response_model=List[PaymentMethodResponse])
 async def get_payment_methods(
     customer_id: Optional[int] = None,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get payment methods for a customer or organization"""
     try:
-        query = db.query(PaymentMethod).filter(
+        query = select(PaymentMethod).filter(
             PaymentMethod.organization_id == current_user.organization_id
         )
         
         if customer_id:
             query = query.filter(PaymentMethod.customer_id == customer_id)
         
-        payment_methods = query.all()
+        payment_methods = (await db.execute(query)).scalars().all()
         return payment_methods
         
     except Exception as e:
@@ -92,15 +93,15 @@ async def get_payment_methods(
 async def update_payment_method(
     payment_method_id: int,
     payment_method_data: PaymentMethodUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Update a payment method"""
     try:
-        payment_method = db.query(PaymentMethod).filter(
+        payment_method = (await db.execute(select(PaymentMethod).filter(
             PaymentMethod.id == payment_method_id,
             PaymentMethod.organization_id == current_user.organization_id
-        ).first()
+        ))).scalars().first()
         
         if not payment_method:
             raise HTTPException(status_code=404, detail="Payment method not found")
@@ -109,15 +110,15 @@ async def update_payment_method(
         if payment_method_data.is_default is not None:
             # If setting as default, unset other defaults first
             if payment_method_data.is_default:
-                db.query(PaymentMethod).filter(
+                await db.execute(update(PaymentMethod).where(
                     PaymentMethod.organization_id == current_user.organization_id,
                     PaymentMethod.customer_id == payment_method.customer_id
-                ).update({"is_default": False})
+                ).values(is_default=False))
             
             payment_method.is_default = payment_method_data.is_default
         
-        db.commit()
-        db.refresh(payment_method)
+        await db.commit()
+        await db.refresh(payment_method)
         
         logger.info(f"Updated payment method: {payment_method_id}")
         return payment_method
@@ -129,15 +130,15 @@ async def update_payment_method(
 @router.delete("/payment-methods/{payment_method_id}")
 async def delete_payment_method(
     payment_method_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Delete a payment method"""
     try:
-        payment_method = db.query(PaymentMethod).filter(
+        payment_method = (await db.execute(select(PaymentMethod).filter(
             PaymentMethod.id == payment_method_id,
             PaymentMethod.organization_id == current_user.organization_id
-        ).first()
+        ))).scalars().first()
         
         if not payment_method:
             raise HTTPException(status_code=404, detail="Payment method not found")
@@ -148,8 +149,8 @@ async def delete_payment_method(
         )
         
         if success:
-            db.delete(payment_method)
-            db.commit()
+            await db.delete(payment_method)
+            await db.commit()
             logger.info(f"Deleted payment method: {payment_method_id}")
             return {"message": "Payment method deleted successfully"}
         else:
@@ -164,35 +165,35 @@ async def delete_payment_method(
 async def create_payment(
     payment_data: PaymentCreate,
     background_tasks: BackgroundTasks,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Create a new payment"""
     try:
         # Validate customer exists
-        customer = db.query(Contact).filter(
+        customer = (await db.execute(select(Contact).filter(
             Contact.id == payment_data.customer_id,
             Contact.organization_id == current_user.organization_id
-        ).first()
+        ))).scalars().first()
         
         if not customer:
             raise HTTPException(status_code=404, detail="Customer not found")
         
         # If this is an invoice payment, process it
         if payment_data.invoice_id:
-            invoice = db.query(Invoice).filter(
+            invoice = (await db.execute(select(Invoice).filter(
                 Invoice.id == payment_data.invoice_id,
                 Invoice.organization_id == current_user.organization_id
-            ).first()
+            ))).scalars().first()
             
             if not invoice:
                 raise HTTPException(status_code=404, detail="Invoice not found")
             
             # Get payment method
-            payment_method = db.query(PaymentMethod).filter(
+            payment_method = (await db.execute(select(PaymentMethod).filter(
                 PaymentMethod.id == payment_data.payment_method_id,
                 PaymentMethod.organization_id == current_user.organization_id
-            ).first()
+            ))).scalars().first()
             
             if not payment_method:
                 raise HTTPException(status_code=404, detail="Payment method not found")
@@ -200,6 +201,7 @@ async def create_payment(
             # Process the payment
             payment = await stripe_service.process_invoice_payment(
                 invoice=invoice,
+                contact=customer,
                 payment_method_id=payment_method.stripe_payment_method_id,
                 db=db
             )
@@ -207,6 +209,8 @@ async def create_payment(
             if not payment:
                 raise HTTPException(status_code=400, detail="Failed to process payment")
             
+            await db.commit()
+            await db.refresh(payment)
             return payment
         
         # For non-invoice payments, create a simple payment record
@@ -221,8 +225,8 @@ async def create_payment(
         )
         
         db.add(payment)
-        db.commit()
-        db.refresh(payment)
+        await db.commit()
+        await db.refresh(payment)
         
         logger.info(f"Created payment: {payment.id}")
         return payment
@@ -237,12 +241,12 @@ async def get_payments(
     status: Optional[str] = None,
     limit: int = 100,
     offset: int = 0,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get payments with optional filtering"""
     try:
-        query = db.query(StripePayment).filter(
+        query = select(StripePayment).filter(
             StripePayment.organization_id == current_user.organization_id
         )
         
@@ -252,7 +256,7 @@ async def get_payments(
         if status:
             query = query.filter(StripePayment.status == status)
         
-        payments = query.offset(offset).limit(limit).all()
+        payments = (await db.execute(query.offset(offset).limit(limit))).scalars().all()
         return payments
         
     except Exception as e:
@@ -263,16 +267,16 @@ async def get_payments(
 @router.post("/payment-intents", response_model=PaymentIntentResponse)
 async def create_payment_intent(
     intent_data: PaymentIntentCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Create a payment intent for frontend payment processing"""
     try:
         # Validate customer exists
-        customer = db.query(Contact).filter(
+        customer = (await db.execute(select(Contact).filter(
             Contact.id == intent_data.customer_id,
             Contact.organization_id == current_user.organization_id
-        ).first()
+        ))).scalars().first()
         
         if not customer:
             raise HTTPException(status_code=404, detail="Customer not found")
@@ -316,7 +320,7 @@ async def create_payment_intent(
 @router.post("/subscription-plans", response_model=SubscriptionPlanResponse)
 async def create_subscription_plan(
     plan_data: SubscriptionPlanCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Create a new subscription plan"""
@@ -348,8 +352,8 @@ async def create_subscription_plan(
         )
         
         db.add(plan)
-        db.commit()
-        db.refresh(plan)
+        await db.commit()
+        await db.refresh(plan)
         
         logger.info(f"Created subscription plan: {plan.id}")
         return plan
@@ -361,17 +365,17 @@ async def create_subscription_plan(
 @router.get("/subscription-plans", response_model=List[SubscriptionPlanResponse])
 async def get_subscription_plans(
     active_only: bool = True,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get subscription plans"""
     try:
-        query = db.query(StripeSubscriptionPlan)
+        query = select(StripeSubscriptionPlan)
         
         if active_only:
             query = query.filter(StripeSubscriptionPlan.is_active == True)
         
-        plans = query.all()
+        plans = (await db.execute(query)).scalars().all()
         return plans
         
     except Exception as e:
@@ -381,14 +385,14 @@ async def get_subscription_plans(
 # Analytics
 @router.get("/analytics", response_model=PaymentAnalytics)
 async def get_payment_analytics(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get payment analytics"""
     try:
-        payments = db.query(StripePayment).filter(
+        payments = (await db.execute(select(StripePayment).filter(
             StripePayment.organization_id == current_user.organization_id
-        ).all()
+        ))).scalars().all()
         
         total_payments = len(payments)
         successful_payments = len([p for p in payments if p.status == "succeeded"])
@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks, Query
+from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks, Query, Request
 from sqlalchemy.orm import Session
 from sqlalchemy import and_, or_, desc, func
 from typing import List, Optional, Dict, Any
@@ -8,6 +8,8 @@ import logging
 
 from ..db import get_db
 from ..dependencies import get_current_user
+from ..fast_json import json_response, rows_to_dicts, schema_columns
+from ..pagination import keyset_order, next_page_headers, paginate, split_page
 from ..models import (
     User, Organization, PBXProvider, PBXExtension, Call, CallActivity, 
     CallQueue, CallQueueMember, CallCampaign, CampaignCall, CallAnalytics,
@@ -410,18 +412,23 @@ def delete_pbx_extension(
 # Call Management
 @router.get("/calls", response_model=List[CallResponse])
 def get_calls(
+    request: Request,
     provider_id: Optional[int] = Query(None, description="Filter by provider ID"),
     agent_id: Optional[int] = Query(None, description="Filter by agent ID"),
     status: Optional[str] = Query(None, description="Filter by call status"),
     direction: Optional[str] = Query(None, description="Filter by call direction"),
     start_date: Optional[datetime] = Query(None, description="Filter by start date"),
     end_date: Optional[datetime] = Query(None, description="Filter by end date"),
-    limit: int = Query(100, description="Number of calls to return"),
-    offset: int = Query(0, description="Number of calls to skip"),
+    limit: int = Query(100, ge=1, description="Number of calls to return"),
+    offset: int = Query(0, ge=0, description="Number of calls to skip (prefer cursor)"),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from X-Next-Cursor; replaces offset"),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    """Get calls for the organization with optional filters"""
+    """Get calls for the organization with optional filters, newest first.
+    Every page carries X-Next-Cursor/Link when more calls follow; passing the
+    cursor back seeks by (start_time, id) instead of scanning past OFFSET rows.
+    """
     try:
         query = db.query(Call).filter(
             Call.organization_id == current_user.organization_id
@@ -445,9 +452,18 @@ def get_calls(
         if end_date:
             query = query.filter(Call.start_time <= end_date)
         
-        calls = query.order_by(desc(Call.start_time)).offset(offset).limit(limit).all()
-        
-        return calls
+        # Select only the CallResponse columns and encode them with orjson
+        # instead of loading Call objects and re-validating each one
+        statement = query.with_entities(*schema_columns(Call, CallResponse)).statement
+        if cursor:
+            statement = paginate(statement, Call.start_time, Call.id, cursor, limit)
+        else:
+            statement = statement.order_by(*keyset_order(Call.start_time, Call.id)).offset(offset).limit(limit + 1)
+
+        calls, next_cursor = split_page(rows_to_dicts(db.execute(statement)), limit, "start_time")
+        return json_response(calls, headers=next_page_headers(request, next_cursor, limit))
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error fetching calls: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to fetch calls: {str(e)}")
@@ -5,6 +5,8 @@ from sqlalchemy.orm import Session
 from api.db import get_db
 from api.dependencies import get_current_user
 from api.models import User
+from api.passwords import hash_password
+from api.user_cache import user_cache
 
 router = APIRouter(prefix="/api/users", tags=["users"])
 
@@ -12,7 +14,7 @@ router = APIRouter(prefix="/api/users", tags=["users"])
 class CreateUserRequest(BaseModel):
     name: str
     email: EmailStr
-    password: str  # plaintext; in a real system we'd hash here or call existing auth util
+    password: str
 
 
 class UserOut(BaseModel):
@@ -45,17 +47,19 @@ def create_user(payload: CreateUserRequest, current_user: User = Depends(get_cur
     if existing:
         raise HTTPException(status_code=400, detail="A user with this email already exists in the organization")
 
-    # For fast fix, store password as-is in password_hash; in production, hash it
+    # Sync handler, so this already runs in the threadpool rather than on the loop
     new_user = User(
         name=payload.name,
         email=payload.email,
-        password_hash=payload.password,
+        password_hash=hash_password(payload.password),
         role="member",
         organization_id=current_user.organization_id,
     )
     db.add(new_user)
     db.commit()
     db.refresh(new_user)
+    # Ids can be reused after a delete; never serve a stale snapshot for one
+    user_cache.invalidate(new_user.id)
     return new_user
 
 
@@ -75,6 +79,7 @@ def delete_user(user_id: int, current_user: User = Depends(get_current_user), db
 
     db.delete(user)
     db.commit()
+    user_cache.invalidate(user_id)
     return None
 
 
@@ -0,0 +1,298 @@
+"""
+Boot-time schema check.
+
+Instead of running ``Base.metadata.create_all()`` on every process start (one
+catalog round trip per table, from every worker), the app checks three values
+in one query:
+
+- the Alembic head of the code against ``alembic_version``
+- a hash of the compiled model DDL against the one recorded in
+  ``schema_fingerprint``: the models have not changed since the database was
+  verified
+- a hash of the live catalog (columns, types, defaults, indexes, constraints),
+  computed by the database in that same query, against the recorded one: the
+  schema has not changed since it was verified
+
+The recorded values are only written after the database has been compared
+with the models (Alembic autogenerate comparison) and found to match: by
+alembic/env.py when an upgrade reaches head, on the first boot of a database
+at head that has no record yet, and by ``--stamp``. If the comparison finds
+differences nothing is recorded and the boot fails listing them. Otherwise no
+DDL introspection happens at boot.
+
+    SCHEMA_CHECK    strict (default) - raise on mismatch
+                    warn             - log the mismatch and keep booting
+                    off              - skip the check
+
+Run ``python -m api.schema_check`` from backend/ to print both sides, or with
+``--stamp`` to compare the database with the models and record it after a
+manual schema fix.
+"""
+import hashlib
+import logging
+import os
+import sys
+from datetime import datetime
+from functools import lru_cache
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.schema import CreateIndex, CreateTable
+
+from .models import Base
+
+logger = logging.getLogger(__name__)
+
+SCHEMA_CHECK = os.getenv("SCHEMA_CHECK", "strict").lower()
+
+ALEMBIC_INI = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "alembic.ini")
+
+FINGERPRINT_TABLE = "schema_fingerprint"
+# Bookkeeping tables left out of the catalog fingerprint and the comparison
+_BOOKKEEPING_TABLES = ("alembic_version", FINGERPRINT_TABLE)
+
+# One line per column, index and constraint of the current schema, hashed by
+# the server so the boot query returns 32 characters
+_PG_CATALOG_FINGERPRINT = f"""
+SELECT md5(string_agg(item, E'\\n' ORDER BY item)) FROM (
+    SELECT c.relname || '.' || a.attname || ' ' || format_type(a.atttypid, a.atttypmod)
+           || coalesce(' COLLATE ' || co.collname, '')
+           || CASE WHEN a.attnotnull THEN ' NOT NULL' ELSE '' END
+           || coalesce(' DEFAULT ' || pg_get_expr(d.adbin, d.adrelid), '') AS item
+    FROM pg_class c
+    JOIN pg_namespace n ON n.oid = c.relnamespace
+    JOIN pg_attribute a ON a.attrelid = c.oid AND a.attnum > 0 AND NOT a.attisdropped
+    LEFT JOIN pg_collation co ON co.oid = a.attcollation
+    LEFT JOIN pg_attrdef d ON d.adrelid = c.oid AND d.adnum = a.attnum
+    WHERE n.nspname = current_schema() AND c.relkind IN ('r', 'p')
+      AND c.relname NOT IN {_BOOKKEEPING_TABLES}
+    UNION ALL
+    SELECT indexdef FROM pg_indexes
+    WHERE schemaname = current_schema() AND tablename NOT IN {_BOOKKEEPING_TABLES}
+    UNION ALL
+    SELECT c.relname || ' ' || con.conname || ' ' || pg_get_constraintdef(con.oid)
+    FROM pg_constraint con
+    JOIN pg_class c ON c.oid = con.conrelid
+    JOIN pg_namespace n ON n.oid = c.relnamespace
+    WHERE n.nspname = current_schema() AND c.relname NOT IN {_BOOKKEEPING_TABLES}
+) AS catalog
+"""
+
+
+class SchemaMismatchError(RuntimeError):
+    """The database schema does not match the models this build was made for."""
+
+
+def metadata_fingerprint(metadata=Base.metadata) -> str:
+    """SHA-256 of the PostgreSQL DDL for every table and index in ``metadata``."""
+    dialect = postgresql.dialect()
+    digest = hashlib.sha256()
+    for table in sorted(metadata.tables.values(), key=lambda t: t.name):
+        digest.update(str(CreateTable(table).compile(dialect=dialect)).encode("utf-8"))
+        for index in sorted(table.indexes, key=lambda i: i.name or ""):
+            digest.update(str(CreateIndex(index).compile(dialect=dialect)).encode("utf-8"))
+    return digest.hexdigest()
+
+
+@lru_cache(maxsize=1)
+def alembic_head() -> str:
+    """Head revision of the migrations shipped with this build."""
+    from alembic.config import Config
+    from alembic.script import ScriptDirectory
+
+    heads = ScriptDirectory.from_config(Config(ALEMBIC_INI)).get_heads()
+    if len(heads) != 1:
+        raise SchemaMismatchError(f"Expected a single Alembic head, found {heads}; add a merge migration")
+    return heads[0]
+
+
+@lru_cache(maxsize=1)
+def expected_fingerprint() -> dict:
+    return {"revision": alembic_head(), "fingerprint": metadata_fingerprint()}
+
+
+def _sqlite_catalog_fingerprint(connection: Connection) -> str:
+    rows = connection.execute(text(
+        "SELECT sql FROM sqlite_master WHERE sql IS NOT NULL AND tbl_name NOT IN "
+        f"{_BOOKKEEPING_TABLES} ORDER BY type, name"
+    )).scalars()
+    return hashlib.md5("\n".join(rows).encode("utf-8")).hexdigest()
+
+
+def catalog_fingerprint(connection: Connection) -> str:
+    """Hash of the schema as the database has it (PostgreSQL; SQLite for tests)."""
+    if connection.dialect.name == "postgresql":
+        return connection.execute(text(_PG_CATALOG_FINGERPRINT)).scalar()
+    return _sqlite_catalog_fingerprint(connection)
+
+
+def read_recorded(connection: Connection) -> dict:
+    """Recorded revision and fingerprints (None where missing) and the live catalog fingerprint."""
+    postgres = connection.dialect.name == "postgresql"
+    row = connection.execute(text(
+        "SELECT "
+        "(SELECT version_num FROM alembic_version LIMIT 1) AS revision, "
+        f"(SELECT fingerprint FROM {FINGERPRINT_TABLE} ORDER BY recorded_at DESC LIMIT 1) AS fingerprint, "
+        f"(SELECT catalog_fingerprint FROM {FINGERPRINT_TABLE} ORDER BY recorded_at DESC LIMIT 1) "
+        "AS recorded_catalog"
+        + (f", ({_PG_CATALOG_FINGERPRINT}) AS catalog" if postgres else "")
+    )).first()
+    return {
+        "revision": row.revision,
+        "fingerprint": row.fingerprint,
+        "recorded_catalog": row.recorded_catalog,
+        "catalog": row.catalog if postgres else _sqlite_catalog_fingerprint(connection),
+    }
+
+
+def _is_compared(obj, name, type_, reflected, compare_to) -> bool:
+    # Tables the models do not know about (old leftovers, bookkeeping) do not break the app
+    return not (type_ == "table" and reflected and compare_to is None)
+
+
+def schema_differences(connection: Connection, metadata=Base.metadata) -> list:
+    """What Alembic autogenerate would change to make the database match ``metadata``."""
+    from alembic.autogenerate import compare_metadata
+    from alembic.migration import MigrationContext
+
+    context = MigrationContext.configure(connection, opts={"include_object": _is_compared})
+    return compare_metadata(context, metadata)
+
+
+def record_fingerprint(connection: Connection, revision: str = None) -> list:
+    """Compare the database with the models and, if they match, record both fingerprints.
+
+    Returns the differences; when there are any, the previous record is
+    removed and nothing is recorded, so the next boot fails listing them.
+    """
+    differences = schema_differences(connection)
+    connection.execute(text(f"DELETE FROM {FINGERPRINT_TABLE}"))
+    if differences:
+        logger.warning(
+            f"Database schema differs from the models; no fingerprint recorded: {_describe(differences)}"
+        )
+        return differences
+    connection.execute(
+        text(
+            f"INSERT INTO {FINGERPRINT_TABLE} (revision, fingerprint, catalog_fingerprint, recorded_at) "
+            "VALUES (:revision, :fingerprint, :catalog_fingerprint, :recorded_at)"
+        ),
+        {
+            "revision": revision or alembic_head(),
+            "fingerprint": metadata_fingerprint(),
+            "catalog_fingerprint": catalog_fingerprint(connection),
+            "recorded_at": datetime.utcnow(),
+        },
+    )
+    return []
+
+
+def _describe(differences: list, limit: int = 10) -> str:
+    shown = "; ".join(str(difference)[:200] for difference in differences[:limit])
+    more = len(differences) - limit
+    return shown + (f"; ... {more} more" if more > 0 else "")
+
+
+def verify_schema(engine) -> dict:
+    """Compare the database with this build; raises SchemaMismatchError on mismatch.
+
+    Returns a dict with the expected and recorded values and whether the
+    fingerprint was stamped on this boot.
+    """
+    expected = expected_fingerprint()
+    with engine.connect() as conn:
+        try:
+            recorded = read_recorded(conn)
+        except Exception as e:
+            conn.rollback()
+            raise SchemaMismatchError(
+                f"Could not read the schema version ({e.__class__.__name__}: {e}). "
+                "Run 'alembic upgrade head' against this database."
+            ) from e
+
+        result = {"expected": expected, "recorded": recorded, "stamped": False}
+
+        if recorded["revision"] != expected["revision"]:
+            raise SchemaMismatchError(
+                f"Database is at migration {recorded['revision']!r} but this build expects "
+                f"{expected['revision']!r}. Run 'alembic upgrade head' before starting the app."
+            )
+
+        if recorded["fingerprint"] is None or recorded["recorded_catalog"] is None:
+            # At head but never verified: compare once (introspects) and record
+            differences = record_fingerprint(conn, expected["revision"])
+            conn.commit()
+            if differences:
+                raise SchemaMismatchError(
+                    f"Database schema does not match the models: {_describe(differences)}. "
+                    "Generate and apply a migration."
+                )
+            result["stamped"] = True
+        elif recorded["fingerprint"] != expected["fingerprint"]:
+            raise SchemaMismatchError(
+                "Models in api/models.py changed without a migration (schema fingerprint "
+                f"{recorded['fingerprint'][:12]} recorded, {expected['fingerprint'][:12]} expected). "
+                "Generate and apply a migration, or run 'python -m api.schema_check --stamp' "
+                "if the database was fixed by hand."
+            )
+        elif recorded["catalog"] != recorded["recorded_catalog"]:
+            raise SchemaMismatchError(
+                "The database schema changed since it was checked against the models (catalog "
+                f"fingerprint {recorded['recorded_catalog'][:12]} recorded, {recorded['catalog'][:12]} now). "
+                "Run 'alembic upgrade head', or 'python -m api.schema_check --stamp' to compare "
+                "the database with the models again."
+            )
+    return result
+
+
+def check_schema_on_boot(engine):
+    """Lifespan hook: verify_schema() honouring SCHEMA_CHECK."""
+    if SCHEMA_CHECK == "off":
+        logger.info("Schema check disabled (SCHEMA_CHECK=off)")
+        return None
+    try:
+        result = verify_schema(engine)
+    except SchemaMismatchError as e:
+        if SCHEMA_CHECK == "warn":
+            logger.warning(f"Schema mismatch (SCHEMA_CHECK=warn, continuing): {e}")
+            return None
+        raise
+    logger.info(
+        f"Schema check passed at {result['expected']['revision']}"
+        + (" (fingerprint recorded)" if result["stamped"] else "")
+    )
+    return result
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    from .db import get_engine
+
+    engine = get_engine()
+    expected = expected_fingerprint()
+    if "--stamp" in argv:
+        with engine.begin() as conn:
+            differences = record_fingerprint(conn, expected["revision"])
+        if differences:
+            print("Database schema does not match the models; nothing recorded:")
+            for difference in differences:
+                print(f"  {difference}")
+            return 1
+        print(f"Recorded fingerprint {expected['fingerprint']} for {expected['revision']}")
+        return 0
+    with engine.connect() as conn:
+        recorded = read_recorded(conn)
+    print(f"expected  revision={expected['revision']} fingerprint={expected['fingerprint']}")
+    print(f"recorded  revision={recorded['revision']} fingerprint={recorded['fingerprint']}")
+    print(f"catalog   recorded={recorded['recorded_catalog']} now={recorded['catalog']}")
+    matches = (
+        recorded["revision"] == expected["revision"]
+        and recorded["fingerprint"] == expected["fingerprint"]
+        and recorded["catalog"] == recorded["recorded_catalog"]
+    )
+    return 0 if matches else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -40,6 +40,11 @@ class DealUpdate(DealBase):
     title: Optional[str] = None
     stage_id: Optional[int] = None
 
+class TagOut(BaseModel):
+    id: int
+    label: str
+    color: Optional[str] = None
+
 class DealOut(DealBase):
     id: int
     created_at: Optional[datetime] = None
@@ -47,15 +52,56 @@ class DealOut(DealBase):
     contact_name: Optional[str] = None
     owner_name: Optional[str] = None
     stage_name: Optional[str] = None
+    rank: Optional[str] = None
     watchers: Optional[List[str]] = []
+    tags: Optional[List[TagOut]] = []
     
     class Config:
         from_attributes = True
 
 class DealMoveRequest(BaseModel):
     to_stage_id: int
-    position: Optional[int] = None
+    position: Optional[int] = Field(None, ge=0, description="0-based index in the target stage")
+    above_deal_id: Optional[int] = Field(None, description="Card the deal is dropped under")
+    below_deal_id: Optional[int] = Field(None, description="Card the deal is dropped over")
 
 class KanbanBoard(BaseModel):
     stages: List[StageOut]
     deals: List[DealOut]
+
+class StageColumn(StageOut):
+    deal_count: int
+    value_sum: float
+    deals: List[DealOut]
+    next_cursor: Optional[str] = None
+
+class KanbanBoardColumns(BaseModel):
+    stages: List[StageColumn]
+
+class DealBatchOperation(BaseModel):
+    deal_id: int
+    # Move: target stage and the drop target within it (top by default)
+    to_stage_id: Optional[int] = None
+    position: Optional[int] = Field(None, ge=0, description="0-based index among the stage's cards not in the batch")
+    above_deal_id: Optional[int] = Field(None, description="Card the deal is dropped under")
+    below_deal_id: Optional[int] = Field(None, description="Card the deal is dropped over")
+    # Field patches: only the fields sent are written
+    title: Optional[str] = None
+    description: Optional[str] = None
+    value: Optional[float] = None
+    contact_id: Optional[int] = None
+    owner_id: Optional[int] = None
+    reminder_date: Optional[datetime] = None
+
+class DealBatchRequest(BaseModel):
+    operations: List[DealBatchOperation] = Field(..., min_length=1, max_length=1000)
+
+class DealBatchItem(BaseModel):
+    id: int
+    stage_id: Optional[int] = None
+    rank: Optional[str] = None
+
+class DealBatchResult(BaseModel):
+    moved: int
+    updated: int
+    deals: List[DealBatchItem]
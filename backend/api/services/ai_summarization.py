@@ -10,6 +10,8 @@ from datetime import datetime
 import openai
 from dotenv import load_dotenv
 
+from .registry import registry
+
 # Load environment variables
 load_dotenv()
 
@@ -281,5 +283,5 @@ Ticket Content:
         }
 
 
-# Global instance
-ai_summarization_service = AISummarizationService()
\ No newline at end of file
+# Built on first use (see api/services/registry.py)
+ai_summarization_service = registry.lazy("ai_summarization", AISummarizationService)
\ No newline at end of file
@@ -12,6 +12,8 @@ from pydantic import BaseModel
 import pickle
 import hashlib
 
+from .registry import registry
+
 logger = logging.getLogger(__name__)
 
 class DocumentMetadata(BaseModel):
@@ -450,5 +452,5 @@ class DocumentProcessingService:
             metadata.processing_status = "failed"
             self._save_metadata(metadata)
 
-# Global service instance
-document_processing_service = DocumentProcessingService()
\ No newline at end of file
+# Built on first use (see api/services/registry.py)
+document_processing_service = registry.lazy("document_processing", DocumentProcessingService)
\ No newline at end of file
@@ -25,6 +25,8 @@ from api.db import get_db
 from api.models import User, Organization
 from sqlalchemy.orm import Session
 
+from .registry import registry
+
 logger = logging.getLogger(__name__)
 
 class DocumentChunk:
@@ -440,5 +442,5 @@ Answer:"""
 
         return min(avg_score + confidence_boost, 1.0)
 
-# Global RAG service instance
-rag_service = RAGService()
\ No newline at end of file
+# Built on first use (see api/services/registry.py)
+rag_service = registry.lazy("rag", RAGService)
\ No newline at end of file
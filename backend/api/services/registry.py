@@ -0,0 +1,160 @@
+"""
+Lazy service registry.
+
+Service modules used to build their clients at import time (RAGService talked
+to Pinecone, StripeService set the global API key, ...). That made cold starts
+slow, and a missing API key raised during import and silently dropped every
+router that imported the module.
+
+Modules now register a factory and export a lazy proxy instead:
+
+    rag_service = registry.lazy("rag", RAGService)
+
+The proxy builds the service on first attribute access, so
+``from api.services.rag_service import rag_service`` keeps working. Services
+registered as critical are built by ``warm()`` at startup, and the app only
+reports ready (``GET /api/ready``) once all of them have been built.
+The registry also collects a startup-time breakdown (router imports and
+service construction) that main.py logs.
+"""
+import asyncio
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from fastapi import HTTPException, status
+
+from ..singleton import share_module
+
+share_module(__name__)
+
+logger = logging.getLogger(__name__)
+
+
+class ServiceUnavailable(HTTPException):
+    """Raised when a service cannot be constructed (e.g. missing API key)."""
+
+    def __init__(self, name: str, error: Exception):
+        super().__init__(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=f"Service '{name}' is unavailable: {error}",
+        )
+
+
+class _Entry:
+    __slots__ = ("name", "factory", "critical", "instance", "error", "init_seconds", "lock")
+
+    def __init__(self, name: str, factory: Callable[[], Any], critical: bool):
+        self.name = name
+        self.factory = factory
+        self.critical = critical
+        self.instance = None
+        self.error: Optional[Exception] = None
+        self.init_seconds: Optional[float] = None
+        self.lock = threading.Lock()
+
+
+class LazyService:
+    """Stand-in that forwards attribute access to the service once built."""
+
+    __slots__ = ("_registry", "_name")
+
+    def __init__(self, registry: "ServiceRegistry", name: str):
+        object.__setattr__(self, "_registry", registry)
+        object.__setattr__(self, "_name", name)
+
+    def __getattr__(self, attr):
+        return getattr(self._registry.get(self._name), attr)
+
+    def __setattr__(self, attr, value):
+        setattr(self._registry.get(self._name), attr, value)
+
+    def __repr__(self):
+        return f"<LazyService {self._name}>"
+
+
+class ServiceRegistry:
+    def __init__(self):
+        self._entries: Dict[str, _Entry] = {}
+        self._startup: List[dict] = []
+        self._lock = threading.Lock()
+
+    def register(self, name: str, factory: Callable[[], Any], critical: bool = False):
+        with self._lock:
+            self._entries[name] = _Entry(name, factory, critical)
+
+    def lazy(self, name: str, factory: Callable[[], Any], critical: bool = False) -> LazyService:
+        self.register(name, factory, critical)
+        return LazyService(self, name)
+
+    def get(self, name: str):
+        entry = self._entries[name]
+        if entry.instance is not None:
+            return entry.instance
+        with entry.lock:
+            if entry.instance is None:
+                start = time.perf_counter()
+                try:
+                    entry.instance = entry.factory()
+                    entry.error = None
+                except Exception as e:
+                    if entry.error is None:
+                        # Only the first failure; warm_until_ready() retries quietly
+                        self.record_startup(f"service:{name}", time.perf_counter() - start, error=e)
+                        logger.error(f"Service {name} failed to initialise: {e}")
+                    entry.error = e
+                    raise ServiceUnavailable(name, e) from e
+                entry.init_seconds = time.perf_counter() - start
+                self.record_startup(f"service:{name}", entry.init_seconds)
+                logger.info(f"Service {name} initialised in {entry.init_seconds * 1000:.1f} ms")
+        return entry.instance
+
+    @property
+    def ready(self) -> bool:
+        return all(entry.instance is not None for entry in self._entries.values() if entry.critical)
+
+    def warm(self, critical_only: bool = True) -> bool:
+        """Build (critical) services now; returns whether all of them came up."""
+        ok = True
+        for entry in list(self._entries.values()):
+            if critical_only and not entry.critical:
+                continue
+            try:
+                self.get(entry.name)
+            except ServiceUnavailable:
+                ok = False
+        return ok
+
+    async def warm_until_ready(self, retry_seconds: float = 5.0):
+        """Keep warming critical services in a worker thread until they are all up."""
+        while not await asyncio.to_thread(self.warm):
+            await asyncio.sleep(retry_seconds)
+
+    def record_startup(self, name: str, seconds: float, error: Exception = None):
+        with self._lock:
+            self._startup.append({
+                "name": name,
+                "ms": round(seconds * 1000, 1),
+                "ok": error is None,
+                "error": str(error) if error else None,
+            })
+
+    def startup_report(self) -> List[dict]:
+        with self._lock:
+            return sorted(self._startup, key=lambda item: item["ms"], reverse=True)
+
+    def status(self) -> dict:
+        services = {}
+        for entry in self._entries.values():
+            services[entry.name] = {
+                "critical": entry.critical,
+                "initialised": entry.instance is not None,
+                "init_ms": round(entry.init_seconds * 1000, 1) if entry.init_seconds is not None else None,
+                "error": str(entry.error) if entry.error else None,
+            }
+        failed_routers = [item["name"] for item in self.startup_report() if item["name"].startswith("router:") and not item["ok"]]
+        return {"ready": self.ready, "services": services, "failed_routers": failed_routers}
+
+
+registry = ServiceRegistry()
@@ -14,6 +14,8 @@ from datetime import datetime
 import uuid
 from dotenv import load_dotenv
 
+from .registry import registry
+
 # Load environment variables
 load_dotenv()
 
@@ -864,5 +866,5 @@ class RetellAIService:
 
         return created_agents
 
-# Global instance
-retell_ai_service = RetellAIService()
+# Built on first use (see api/services/registry.py)
+retell_ai_service = registry.lazy("retell_ai", RetellAIService)
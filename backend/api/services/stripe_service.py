@@ -8,9 +8,11 @@ import os
 import logging
 from typing import Optional, Dict, List, Any
 from datetime import datetime
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from api.models import PaymentMethod, StripePayment, StripeSubscription, StripeSubscriptionPlan, Contact, Invoice
 
+from .registry import registry
+
 logger = logging.getLogger(__name__)
 
 class StripeService:
@@ -95,12 +97,15 @@ class StripeService:
             logger.error(f"Error creating payment intent: {str(e)}")
             return None
     
-    async def process_invoice_payment(self, invoice: Invoice, payment_method_id: str, 
-                                    db: Session) -> Optional[StripePayment]:
-        """Process payment for an invoice"""
+    async def process_invoice_payment(self, invoice: Invoice, contact: Contact, payment_method_id: str,
+                                    db: AsyncSession) -> Optional[StripePayment]:
+        """Process payment for an invoice.
+
+        The payment is added to the session but not committed; the caller owns
+        the transaction.
+        """
         try:
             # Get customer's Stripe customer ID
-            contact = invoice.contact
             customer_id = await self.get_or_create_customer(contact, db)
             
             if not customer_id:
@@ -150,7 +155,6 @@ class StripeService:
                 payment.failure_reason = intent.last_payment_error.message if intent.last_payment_error else 'Unknown error'
             
             db.add(payment)
-            db.commit()
             
             logger.info(f"Processed invoice payment: {intent_id}")
             return payment
@@ -183,7 +187,7 @@ class StripeService:
             logger.error(f"Error creating subscription: {str(e)}")
             return None
     
-    async def get_or_create_customer(self, contact: Contact, db: Session) -> Optional[str]:
+    async def get_or_create_customer(self, contact: Contact, db: AsyncSession) -> Optional[str]:
         """Get existing Stripe customer ID or create new one"""
         try:
             # Check if contact already has a Stripe customer ID stored
@@ -291,5 +295,5 @@ class StripeService:
             logger.error(f"Error deleting payment method: {str(e)}")
             return False
 
-# Initialize service
-stripe_service = StripeService()
+# Built on first use (see api/services/registry.py)
+stripe_service = registry.lazy("stripe", StripeService)
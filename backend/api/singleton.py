@@ -0,0 +1,26 @@
+"""
+Helpers for modules that hold process-wide state.
+
+The backend is imported under two roots: ``backend.api`` (app.py, root main.py)
+and ``api`` (most routers, alembic, backend/main.py). Without care a module
+with state (engine, caches, metrics registries, event listeners) is executed
+once per root and ends up with two independent copies of that state.
+"""
+import sys
+
+_ROOTS = ("backend.api.", "api.")
+
+
+def share_module(module_name: str) -> None:
+    """Register the module under both import roots so it is only executed once.
+
+    Must be called at the top of the module body, before any state is created.
+    """
+    module = sys.modules[module_name]
+    for root in _ROOTS:
+        if module_name.startswith(root):
+            suffix = module_name[len(root):]
+            for other in _ROOTS:
+                if other != root:
+                    sys.modules.setdefault(other + suffix, module)
+            return
@@ -0,0 +1,177 @@
+"""
+In-memory manifest of the built frontend (frontend_dist).
+
+Built once at startup: every file is read into memory together with its
+content type, an ETag and, for compressible files, brotli and gzip variants.
+Variants the build already emitted (``app.js.br``, ``app.js.gz``) are used
+as is; missing ones are compressed here. Requests are then a dict lookup
+(no ``os.path`` checks or file reads) and the best variant for the client's
+Accept-Encoding is sent with its Content-Encoding, so the compression
+middleware passes it through untouched.
+
+Vite names bundled files ``name-<hash>.ext`` under assets/; those never
+change and get ``Cache-Control: public, max-age=31536000, immutable``.
+Everything else, index.html included, is revalidated (``no-cache``) and
+answers If-None-Match with 304.
+
+    FRONTEND_DIST    directory of the built SPA (default frontend_dist)
+"""
+import hashlib
+import logging
+import mimetypes
+import os
+import re
+import time
+from typing import Dict, Optional
+
+from starlette.responses import Response
+
+from .compression import brotli, choose_encoding, compress_bytes, is_compressible
+
+logger = logging.getLogger(__name__)
+
+FRONTEND_DIST = os.getenv("FRONTEND_DIST", "frontend_dist")
+
+IMMUTABLE_CACHE = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE = "no-cache"
+
+# Vite output: assets/index-4f3a9c1b.js, assets/logo-Dk2x_9aQ.svg
+_HASHED_NAME = re.compile(r"[-.][A-Za-z0-9_-]{8,}\.[A-Za-z0-9]+$")
+
+# Compressing tiny files only adds the encoding header
+_MIN_COMPRESS_SIZE = 256
+
+NOT_BUILT_HTML = b"<h1>NeuraCRM</h1><p>Frontend not built yet. Please run build process.</p>"
+
+
+class StaticAsset:
+    __slots__ = ("path", "content_type", "etag", "cache_control", "variants")
+
+    def __init__(self, path: str, content_type: str, etag: str, cache_control: str, variants: Dict[str, bytes]):
+        self.path = path
+        self.content_type = content_type
+        self.etag = etag
+        self.cache_control = cache_control
+        # Keyed by content coding; "identity" is always present
+        self.variants = variants
+
+    def response(self, scope) -> Response:
+        request_headers = dict(scope.get("headers", []))
+        headers = {"etag": self.etag, "cache-control": self.cache_control, "vary": "Accept-Encoding"}
+
+        if_none_match = request_headers.get(b"if-none-match", b"").decode("latin-1")
+        if if_none_match and (if_none_match == "*" or self.etag in if_none_match):
+            return Response(status_code=304, headers=headers)
+
+        encoding = choose_encoding(request_headers.get(b"accept-encoding", b"").decode("latin-1"))
+        if encoding == "br" and "br" not in self.variants:
+            encoding = "gzip" if "gzip" in self.variants else None
+        body = self.variants.get(encoding) if encoding else None
+        if body is None:
+            body = self.variants["identity"]
+        else:
+            headers["content-encoding"] = encoding
+
+        if scope.get("method") == "HEAD":
+            headers["content-length"] = str(len(body))
+            return Response(status_code=200, headers=headers, media_type=self.content_type)
+        return Response(content=body, headers=headers, media_type=self.content_type)
+
+
+def _load_variant(path: str) -> Optional[bytes]:
+    try:
+        with open(path, "rb") as f:
+            return f.read()
+    except OSError:
+        return None
+
+
+def build_asset(root: str, relative_path: str) -> StaticAsset:
+    full_path = os.path.join(root, relative_path)
+    with open(full_path, "rb") as f:
+        data = f.read()
+
+    content_type = mimetypes.guess_type(relative_path)[0] or "application/octet-stream"
+    if content_type.startswith("text/") or content_type in ("application/javascript", "image/svg+xml"):
+        content_type += "; charset=utf-8"
+
+    variants = {"identity": data}
+    if len(data) >= _MIN_COMPRESS_SIZE and is_compressible(content_type):
+        for encoding, suffix in (("br", ".br"), ("gzip", ".gz")):
+            if encoding == "br" and brotli is None:
+                continue
+            compressed = _load_variant(full_path + suffix) or compress_bytes(data, encoding)
+            # Keep a variant only when it is actually smaller
+            if len(compressed) < len(data):
+                variants[encoding] = compressed
+
+    hashed = relative_path.startswith("assets/") and bool(_HASHED_NAME.search(relative_path))
+    return StaticAsset(
+        path=relative_path,
+        content_type=content_type,
+        etag=f'"{hashlib.md5(data).hexdigest()}"',
+        cache_control=IMMUTABLE_CACHE if hashed else REVALIDATE_CACHE,
+        variants=variants,
+    )
+
+
+class StaticManifest:
+    """Path -> StaticAsset for everything under the frontend build directory."""
+
+    def __init__(self, root: str = FRONTEND_DIST):
+        self.root = root
+        self.assets: Dict[str, StaticAsset] = {}
+        self.index: Optional[StaticAsset] = None
+        self.build_seconds = 0.0
+
+    def build(self) -> "StaticManifest":
+        start = time.perf_counter()
+        assets = {}
+        if os.path.isdir(self.root):
+            for directory, _, files in os.walk(self.root):
+                for name in files:
+                    if name.endswith((".br", ".gz")):
+                        continue
+                    relative_path = os.path.relpath(os.path.join(directory, name), self.root).replace(os.sep, "/")
+                    assets[relative_path] = build_asset(self.root, relative_path)
+        self.assets = assets
+        self.index = assets.get("index.html")
+        self.build_seconds = time.perf_counter() - start
+        return self
+
+    def get(self, path: str) -> Optional[StaticAsset]:
+        return self.assets.get(path.lstrip("/"))
+
+    def index_response(self, scope) -> Response:
+        if self.index is None:
+            return Response(content=NOT_BUILT_HTML, media_type="text/html")
+        return self.index.response(scope)
+
+    def stats(self) -> dict:
+        return {
+            "root": self.root,
+            "files": len(self.assets),
+            "identity_bytes": sum(len(a.variants["identity"]) for a in self.assets.values()),
+            "br_bytes": sum(len(a.variants.get("br", a.variants["identity"])) for a in self.assets.values()),
+            "gzip_bytes": sum(len(a.variants.get("gzip", a.variants["identity"])) for a in self.assets.values()),
+            "build_ms": round(self.build_seconds * 1000, 1),
+        }
+
+
+class StaticAssetsApp:
+    """ASGI app for a mounted asset directory, served from the manifest."""
+
+    def __init__(self, manifest: StaticManifest):
+        self.manifest = manifest
+
+    async def __call__(self, scope, receive, send):
+        # Mounts keep the full path in scope["path"]
+        asset = self.manifest.get(scope["path"]) if scope.get("method") in ("GET", "HEAD") else None
+        if asset is None:
+            response = Response(status_code=404, content=b"Not Found", media_type="text/plain")
+        else:
+            response = asset.response(scope)
+        await response(scope, receive, send)
+
+
+static_manifest = StaticManifest()
@@ -0,0 +1,102 @@
+"""
+Short-lived cache of authenticated users.
+
+Every authenticated request resolves its JWT to a user row. The cache keeps an
+immutable snapshot of the fields request handlers actually read, keyed by user
+id, so the lookup is a dict hit instead of a database round trip. Entries
+expire after ``USER_CACHE_TTL_SECONDS`` and the cache is bounded to
+``USER_CACHE_SIZE`` users (least recently used evicted first). Code that
+changes or deletes a user must call ``user_cache.invalidate(user_id)``.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional
+
+from .singleton import share_module
+
+share_module(__name__)
+
+USER_CACHE_TTL_SECONDS = float(os.getenv("USER_CACHE_TTL_SECONDS", "30"))
+USER_CACHE_SIZE = int(os.getenv("USER_CACHE_SIZE", "1024"))
+
+
+@dataclass(frozen=True)
+class UserSnapshot:
+    """Read-only view of a user, safe to share between requests and threads."""
+
+    id: int
+    name: str
+    email: str
+    role: Optional[str]
+    organization_id: int
+    avatar_url: Optional[str] = None
+
+    @classmethod
+    def from_user(cls, user) -> "UserSnapshot":
+        return cls(
+            id=user.id,
+            name=user.name,
+            email=user.email,
+            role=user.role,
+            organization_id=user.organization_id,
+            avatar_url=getattr(user, "avatar_url", None),
+        )
+
+
+class UserCache:
+    """Bounded LRU of UserSnapshot with a per-entry TTL."""
+
+    def __init__(self, maxsize: int = USER_CACHE_SIZE, ttl: float = USER_CACHE_TTL_SECONDS):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: "OrderedDict[int, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, user_id: int) -> Optional[UserSnapshot]:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None or entry[0] < now:
+                if entry is not None:
+                    del self._entries[user_id]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(user_id)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, snapshot: UserSnapshot) -> UserSnapshot:
+        if self.ttl <= 0 or self.maxsize <= 0:
+            return snapshot
+        with self._lock:
+            self._entries[snapshot.id] = (time.monotonic() + self.ttl, snapshot)
+            self._entries.move_to_end(snapshot.id)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return snapshot
+
+    def invalidate(self, user_id: int):
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+user_cache = UserCache()
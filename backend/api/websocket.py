@@ -1,13 +1,18 @@
 from fastapi import WebSocket, WebSocketDisconnect, Depends, HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy import select
 from typing import Dict, List, Optional
 import json
 import asyncio
 from datetime import datetime
 
-from .db import get_db
+from .db import get_async_session_local
 from .models import User, ChatRoom, ChatMessage, ChatParticipant
 from .dependencies import get_current_user
+from .metrics import websocket_boards, websocket_connections, websocket_rooms
+from .user_cache import UserSnapshot, user_cache
+from .singleton import share_module
+
+share_module(__name__)
 
 class ConnectionManager:
     def __init__(self):
@@ -15,9 +20,15 @@ class ConnectionManager:
         self.active_connections: Dict[int, List[WebSocket]] = {}
         # Store room connections by room_id
         self.room_connections: Dict[int, List[WebSocket]] = {}
+        # Kanban board viewers by organization_id, and the last delta sequence sent to each board
+        self.board_connections: Dict[int, List[WebSocket]] = {}
+        self.board_sequences: Dict[int, int] = {}
+        self._board_locks: Dict[int, asyncio.Lock] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
 
     async def connect(self, websocket: WebSocket, user_id: int, room_id: Optional[int] = None):
         await websocket.accept()
+        self._loop = asyncio.get_running_loop()
         
         # Add to user connections
         if user_id not in self.active_connections:
@@ -84,8 +95,70 @@ class ConnectionManager:
                     if connection in connections:
                         connections.remove(connection)
 
+    # --- Kanban board deltas ---------------------------------------------------
+    #
+    # Each board (one per organization) numbers its deltas 1, 2, 3, ... A
+    # client that sees a sequence other than last + 1 has missed a delta and
+    # refetches the board. Sequences are per process: writes handled by other
+    # workers are not broadcast here, and clients still revalidate the board
+    # with its ETag.
+
+    def join_board(self, websocket: WebSocket, organization_id: int) -> int:
+        """Subscribe to the org's board deltas; returns the board's current sequence."""
+        connections = self.board_connections.setdefault(organization_id, [])
+        if websocket not in connections:
+            connections.append(websocket)
+        return self.board_sequences.get(organization_id, 0)
+
+    def leave_board(self, websocket: WebSocket, organization_id: int):
+        connections = self.board_connections.get(organization_id)
+        if connections and websocket in connections:
+            connections.remove(websocket)
+        if not connections:
+            self.board_connections.pop(organization_id, None)
+
+    def publish_board_deltas(self, organization_id: int, deals: List[dict]):
+        """Broadcast deal deltas to the org's board; callable from any thread.
+
+        The sync Kanban endpoints run in a threadpool, so the send is handed
+        to the event loop. Call after the write has committed.
+        """
+        loop = self._loop
+        if not deals or loop is None or loop.is_closed() or organization_id not in self.board_connections:
+            return
+        loop.call_soon_threadsafe(self._start_board_broadcast, organization_id, deals)
+
+    def _start_board_broadcast(self, organization_id: int, deals: List[dict]):
+        # Numbered on the loop in publish order; the per-board lock keeps that order on the wire
+        sequence = self.board_sequences[organization_id] = self.board_sequences.get(organization_id, 0) + 1
+        message = {
+            "type": "board_delta",
+            "seq": sequence,
+            "deals": deals,
+            "timestamp": datetime.utcnow().isoformat()
+        }
+        self._loop.create_task(self.broadcast_to_board(organization_id, message))
+
+    async def broadcast_to_board(self, organization_id: int, message: dict):
+        lock = self._board_locks.setdefault(organization_id, asyncio.Lock())
+        text = json.dumps(message)
+        async with lock:
+            for connection in list(self.board_connections.get(organization_id, [])):
+                try:
+                    await connection.send_text(text)
+                except Exception:
+                    # Remove broken connections
+                    self.leave_board(connection, organization_id)
+
 manager = ConnectionManager()
 
+# Sampled at scrape time, nothing to update on connect/disconnect
+websocket_connections.set_function(
+    lambda: sum(len(connections) for connections in manager.active_connections.values())
+)
+websocket_rooms.set_function(lambda: len(manager.room_connections))
+websocket_boards.set_function(lambda: len(manager.board_connections))
+
 async def websocket_endpoint(websocket: WebSocket, room_id: Optional[int] = None, token: Optional[str] = None):
     user = None
     current_room_id = room_id
@@ -97,7 +170,7 @@ async def websocket_endpoint(websocket: WebSocket, room_id: Optional[int] = None
             return
             
         # Validate the JWT token and get the user
-        db = next(get_db())
+        db = get_async_session_local()()
         try:
             import jwt
             import os
@@ -117,11 +190,14 @@ async def websocket_endpoint(websocket: WebSocket, room_id: Optional[int] = None
                 await websocket.close(code=1008, reason="Invalid token")
                 return
             
-            # Get the user from database
-            user = db.query(User).filter(User.id == int(user_id)).first()
-            if not user:
-                await websocket.close(code=1008, reason="User not found")
-                return
+            # Get the user from the cache, falling back to the database
+            user = user_cache.get(int(user_id))
+            if user is None:
+                db_user = (await db.execute(select(User).filter(User.id == int(user_id)))).scalars().first()
+                if not db_user:
+                    await websocket.close(code=1008, reason="User not found")
+                    return
+                user = user_cache.put(UserSnapshot.from_user(db_user))
                 
         except jwt.PyJWTError:
             await websocket.close(code=1008, reason="Invalid token")
@@ -130,17 +206,17 @@ async def websocket_endpoint(websocket: WebSocket, room_id: Optional[int] = None
             await websocket.close(code=1008, reason="Authentication failed")
             return
         finally:
-            db.close()
+            await db.close()
         
         # Check if user has access to the room
         if current_room_id:
-            db = next(get_db())
+            db = get_async_session_local()()
             try:
-                participant = db.query(ChatParticipant).filter(
+                participant = (await db.execute(select(ChatParticipant).filter(
                     ChatParticipant.room_id == current_room_id,
                     ChatParticipant.user_id == user.id,
                     ChatParticipant.is_active == True
-                ).first()
+                ))).scalars().first()
                 if not participant:
                     await websocket.close(code=1008, reason="Access denied to room")
                     return
@@ -148,7 +224,7 @@ async def websocket_endpoint(websocket: WebSocket, room_id: Optional[int] = None
                 await websocket.close(code=1008, reason="Room access check failed")
                 return
             finally:
-                db.close()
+                await db.close()
         
         # Connect to the room
         await manager.connect(websocket, user.id, current_room_id)
@@ -175,6 +251,10 @@ async def websocket_endpoint(websocket: WebSocket, room_id: Optional[int] = None
                     await handle_join_room(websocket, user, message_data)
                 elif message_data.get("type") == "leave_room":
                     await handle_leave_room(websocket, user, message_data)
+                elif message_data.get("type") == "subscribe_board":
+                    await handle_subscribe_board(websocket, user)
+                elif message_data.get("type") == "unsubscribe_board":
+                    manager.leave_board(websocket, user.organization_id)
                     
             except WebSocketDisconnect:
                 break
@@ -194,6 +274,7 @@ async def websocket_endpoint(websocket: WebSocket, room_id: Optional[int] = None
     finally:
         if user:
             manager.disconnect(websocket, user.id, current_room_id)
+            manager.leave_board(websocket, user.organization_id)
 
 async def handle_message(websocket: WebSocket, user: User, room_id: int, message_data: dict):
     """Handle incoming chat messages"""
@@ -201,7 +282,7 @@ async def handle_message(websocket: WebSocket, user: User, room_id: int, message
     if not content:
         return
     
-    db = next(get_db())
+    db = get_async_session_local()()
     try:
         # Create the message
         message = ChatMessage(
@@ -211,17 +292,17 @@ async def handle_message(websocket: WebSocket, user: User, room_id: int, message
             message_type=message_data.get("message_type", "text")
         )
         db.add(message)
-        db.commit()
-        db.refresh(message)
+        await db.commit()
+        await db.refresh(message)
         
         # Update last read timestamp for sender
-        participant = db.query(ChatParticipant).filter(
+        participant = (await db.execute(select(ChatParticipant).filter(
             ChatParticipant.room_id == room_id,
             ChatParticipant.user_id == user.id
-        ).first()
+        ))).scalars().first()
         if participant:
             participant.last_read_at = datetime.utcnow()
-            db.commit()
+            await db.commit()
         
         # Broadcast message to room
         message_response = {
@@ -247,7 +328,7 @@ async def handle_message(websocket: WebSocket, user: User, room_id: int, message
             "message": "Failed to send message"
         }))
     finally:
-        db.close()
+        await db.close()
 
 async def handle_typing(websocket: WebSocket, user: User, room_id: int, message_data: dict):
     """Handle typing indicators"""
@@ -269,14 +350,14 @@ async def handle_join_room(websocket: WebSocket, user: User, message_data: dict)
     if not room_id:
         return
     
-    db = next(get_db())
+    db = get_async_session_local()()
     try:
         # Check if user has access to the room
-        participant = db.query(ChatParticipant).filter(
+        participant = (await db.execute(select(ChatParticipant).filter(
             ChatParticipant.room_id == room_id,
             ChatParticipant.user_id == user.id,
             ChatParticipant.is_active == True
-        ).first()
+        ))).scalars().first()
         
         if participant:
             # Disconnect from current room and connect to new room
@@ -300,7 +381,7 @@ async def handle_join_room(websocket: WebSocket, user: User, message_data: dict)
             "message": "Failed to join room"
         }))
     finally:
-        db.close()
+        await db.close()
 
 async def handle_leave_room(websocket: WebSocket, user: User, message_data: dict):
     """Handle leaving a room"""
@@ -314,3 +395,12 @@ async def handle_leave_room(websocket: WebSocket, user: User, message_data: dict
             "user_id": user.id,
             "timestamp": datetime.utcnow().isoformat()
         }, exclude_user=user.id)
+
+async def handle_subscribe_board(websocket: WebSocket, user: User):
+    """Start sending the user's Kanban board deltas on this connection"""
+    sequence = manager.join_board(websocket, user.organization_id)
+    await websocket.send_text(json.dumps({
+        "type": "board_subscribed",
+        "seq": sequence,
+        "timestamp": datetime.utcnow().isoformat()
+    }))
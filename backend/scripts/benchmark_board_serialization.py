@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Benchmark the Kanban board response: ORM + Pydantic + stdlib json vs the
+orjson row path (api/fast_json.py).
+
+Seeds an in-memory SQLite database with one board (default 10,000 deals across
+6 stages, a third of them watched), then times the full query + serialize path
+both ways and the serialization step on its own.
+
+    python scripts/benchmark_board_serialization.py --deals 10000 --repeat 5
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
+
+from api.crud.kanban import get_kanban_board
+from api.fast_json import dumps
+from api.models import Base, Contact, Deal, Organization, Stage, User, Watcher
+from api.schemas.kanban import KanbanBoard
+
+TABLES = ("organizations", "users", "contacts", "stages", "customer_accounts", "deals", "watcher")
+
+
+def seed(session: Session, deals: int):
+    rng = random.Random(42)
+    session.add(Organization(id=1, name="Bench Org"))
+    for user_id in range(1, 21):
+        session.add(User(id=user_id, name=f"User {user_id}", email=f"user{user_id}@example.com",
+                         password_hash="x", organization_id=1))
+    for stage_id, name in enumerate(["Lead", "Qualified", "Proposal", "Negotiation", "Won", "Lost"], start=1):
+        session.add(Stage(id=stage_id, name=name, order=stage_id))
+    for contact_id in range(1, 501):
+        session.add(Contact(id=contact_id, name=f"Contact {contact_id}", organization_id=1))
+    session.flush()
+
+    start = datetime(2024, 1, 1)
+    session.execute(Deal.__table__.insert(), [
+        {
+            "id": deal_id,
+            "title": f"Deal {deal_id}",
+            "description": "Renewal with expanded seat count",
+            "value": round(rng.uniform(500, 50000), 2),
+            "owner_id": rng.randint(1, 20),
+            "stage_id": rng.randint(1, 6),
+            "organization_id": 1,
+            "contact_id": rng.randint(1, 500),
+            "created_at": start + timedelta(minutes=deal_id),
+            "reminder_date": start + timedelta(days=rng.randint(1, 90)) if deal_id % 4 == 0 else None,
+        }
+        for deal_id in range(1, deals + 1)
+    ])
+    session.execute(Watcher.insert(), [
+        {"deal_id": deal_id, "user_id": rng.randint(1, 20)} for deal_id in range(1, deals + 1, 3)
+    ])
+    session.commit()
+
+
+def legacy_board(session: Session, organization_id: int):
+    """The board query as it was: ORM rows plus a lazy watcher load per deal."""
+    stages = session.query(Stage).order_by(Stage.order).all()
+    rows = (
+        session.query(Deal, Contact.name, User.name, Stage.name)
+        .join(Contact, Deal.contact_id == Contact.id, isouter=True)
+        .join(User, Deal.owner_id == User.id, isouter=True)
+        .join(Stage, Deal.stage_id == Stage.id, isouter=True)
+        .filter(Deal.organization_id == organization_id)
+        .all()
+    )
+    deals = []
+    for deal, contact_name, owner_name, stage_name in rows:
+        deals.append({
+            "id": deal.id, "title": deal.title, "description": deal.description, "value": deal.value,
+            "contact_id": deal.contact_id, "owner_id": deal.owner_id, "stage_id": deal.stage_id,
+            "reminder_date": deal.reminder_date, "created_at": deal.created_at,
+            "contact_name": contact_name, "owner_name": owner_name, "stage_name": stage_name,
+            "watchers": [user.name for user in deal.watchers],
+        })
+    return {"stages": stages, "deals": deals}
+
+
+def pydantic_encode(board) -> bytes:
+    # What FastAPI does for response_model=KanbanBoard followed by JSONResponse
+    validated = KanbanBoard.model_validate(board)
+    return json.dumps(jsonable_encoder(validated), ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def best_of(repeat: int, func):
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--deals", type=int, default=10000, help="deals on the board")
+    parser.add_argument("--repeat", type=int, default=5, help="runs per measurement (best is reported)")
+    args = parser.parse_args()
+
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    Base.metadata.create_all(engine, tables=[Base.metadata.tables[name] for name in TABLES])
+    with Session(engine) as session:
+        seed(session, args.deals)
+
+    def legacy_full():
+        with Session(engine) as session:
+            return pydantic_encode(legacy_board(session, 1))
+
+    def fast_full():
+        with Session(engine) as session:
+            return dumps(get_kanban_board(session, 1))
+
+    with Session(engine) as session:
+        fast_rows = get_kanban_board(session, 1)
+    legacy_seconds, legacy_body = best_of(args.repeat, legacy_full)
+    fast_seconds, fast_body = best_of(args.repeat, fast_full)
+    encode_legacy, _ = best_of(args.repeat, lambda: pydantic_encode(fast_rows))
+    encode_fast, _ = best_of(args.repeat, lambda: dumps(fast_rows))
+
+    assert json.loads(legacy_body) == json.loads(fast_body), "fast path changed the payload"
+
+    print(f"{args.deals} deals, {len(fast_body) / 1024:.0f} KiB response, best of {args.repeat}\n")
+    print(f"{'path':<34} {'ms':>9} {'rows/s':>12}")
+    for label, seconds in (
+        ("query + encode, ORM/Pydantic/json", legacy_seconds),
+        ("query + encode, rows/orjson", fast_seconds),
+        ("encode only, Pydantic/json", encode_legacy),
+        ("encode only, orjson", encode_fast),
+    ):
+        print(f"{label:<34} {seconds * 1000:>9.1f} {args.deals / seconds:>12,.0f}")
+    print(f"\nend-to-end speedup {legacy_seconds / fast_seconds:.1f}x, encode speedup {encode_legacy / encode_fast:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
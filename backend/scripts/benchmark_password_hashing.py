@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Benchmark login password checks: inline bcrypt vs the hashing worker pool.
+
+Simulates a burst of concurrent logins on one event loop and reports logins
+per second, logins per second per worker, and the worst event-loop lag seen
+while the burst runs (how long every other request would have been frozen).
+
+    python scripts/benchmark_password_hashing.py --logins 40 --rounds 12
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import bcrypt
+
+from api import passwords
+
+
+async def _measure_lag(stop: asyncio.Event, interval: float = 0.005) -> float:
+    worst = 0.0
+    while not stop.is_set():
+        before = time.perf_counter()
+        await asyncio.sleep(interval)
+        worst = max(worst, time.perf_counter() - before - interval)
+    return worst
+
+
+async def _inline_login(password: str, hashed: str) -> bool:
+    # What the login handlers used to do: bcrypt directly inside async def
+    return bcrypt.checkpw(password.encode("utf-8"), hashed.encode("utf-8"))
+
+
+async def _pooled_login(password: str, hashed: str) -> bool:
+    return await passwords.verify_password_async(password, hashed)
+
+
+async def _run(login, logins: int, password: str, hashed: str):
+    stop = asyncio.Event()
+    lag_task = asyncio.create_task(_measure_lag(stop))
+    await asyncio.sleep(0)
+    start = time.perf_counter()
+    results = await asyncio.gather(*(login(password, hashed) for _ in range(logins)))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    worst_lag = await lag_task
+    assert all(results), "password check failed"
+    return elapsed, worst_lag
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--logins", type=int, default=40, help="concurrent logins per run")
+    parser.add_argument("--rounds", type=int, default=passwords.BCRYPT_ROUNDS, help="bcrypt cost factor")
+    args = parser.parse_args()
+
+    password = "correct horse battery staple"
+    hashed = passwords.hash_password(password, rounds=args.rounds)
+    workers = passwords.PASSWORD_HASH_WORKERS
+
+    print(f"bcrypt cost {args.rounds}, {args.logins} concurrent logins, pool of {workers} worker(s)\n")
+    print(f"{'mode':<8} {'workers':>7} {'logins/s':>10} {'per worker':>11} {'max loop lag':>13}")
+    for label, login, used_workers in (
+        ("inline", _inline_login, 1),  # the event loop is the only "worker"
+        ("pool", _pooled_login, workers),
+    ):
+        elapsed, worst_lag = asyncio.run(_run(login, args.logins, password, hashed))
+        rate = args.logins / elapsed
+        print(f"{label:<8} {used_workers:>7} {rate:>10.1f} {rate / used_workers:>11.1f} {worst_lag * 1000:>10.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -10,7 +10,7 @@ import sys
 import time
 import logging
 import uvicorn
-from sqlalchemy import create_engine, text
+from sqlalchemy import text
 from sqlalchemy.exc import OperationalError
 
 # Set up logging
@@ -29,10 +29,13 @@ def wait_for_database(max_retries=30, retry_delay=2):
         database_url = database_url.replace("postgres://", "postgresql://", 1)
     
     logger.info(f"Waiting for database connection...")
-    
+
+    # Reuse the application's pooled engine instead of building a throwaway one
+    from backend.api.db import get_engine
+    engine = get_engine()
+
     for attempt in range(max_retries):
         try:
-            engine = create_engine(database_url)
             with engine.connect() as conn:
                 result = conn.execute(text("SELECT 1"))
                 logger.info("Database connection successful!")
@@ -53,9 +56,20 @@ def wait_for_database(max_retries=30, retry_delay=2):
 # Add the current directory to Python path
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
+def log_startup_breakdown(total_seconds):
+    """Log how long the app import took and the slowest routers/services"""
+    from backend.api.services.registry import registry
+
+    logger.info(f"App imported in {total_seconds * 1000:.0f} ms")
+    for item in registry.startup_report():
+        status = "ok" if item["ok"] else f"FAILED: {item['error']}"
+        logger.info(f"  {item['name']:<40} {item['ms']:>8.1f} ms  {status}")
+
+import_start = time.perf_counter()
 try:
     from backend.app import app
     logger.info("Successfully imported app from backend.app")
+    log_startup_breakdown(time.perf_counter() - import_start)
 except Exception as e:
     logger.error(f"Failed to import app: {e}")
     logger.info("Creating minimal app as fallback...")
@@ -0,0 +1,78 @@
+"""
+Shared fixtures: an in-memory SQLite session for the unit tests, and a
+migrated database for the tests that need a real Postgres (TEST_DATABASE_URL).
+"""
+import os
+from pathlib import Path
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+ALEMBIC_DIR = Path(__file__).resolve().parent.parent / "backend" / "alembic"
+
+
+def postgres_url():
+    """TEST_DATABASE_URL if it names a reachable Postgres server, else skip."""
+    url = os.getenv("TEST_DATABASE_URL")
+    if not url or not url.startswith("postgresql"):
+        pytest.skip("TEST_DATABASE_URL not set to a Postgres database")
+    engine = create_engine(url)
+    try:
+        engine.connect().close()
+    except Exception as exc:
+        pytest.skip(f"Postgres not reachable: {exc}")
+    finally:
+        engine.dispose()
+    return url
+
+
+@pytest.fixture()
+def sqlite_db():
+    """A session on a fresh in-memory SQLite database with every model table."""
+    from api.models import Base
+
+    # One connection for every thread: the live stream loads snapshots in a worker thread
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    try:
+        yield session
+    finally:
+        session.close()
+        engine.dispose()
+
+
+@pytest.fixture(scope="session")
+def migrated_database_url():
+    """A throwaway database built from empty by ``alembic upgrade head``."""
+    from alembic import command
+    from alembic.config import Config
+
+    server = create_engine(postgres_url(), isolation_level="AUTOCOMMIT")
+    name = f"migrated_{os.getpid()}"
+    with server.connect() as conn:
+        conn.execute(text(f'DROP DATABASE IF EXISTS "{name}"'))
+        conn.execute(text(f'CREATE DATABASE "{name}"'))
+    url = make_url(os.environ["TEST_DATABASE_URL"]).set(database=name).render_as_string(hide_password=False)
+
+    # No ini file: alembic/env.py would reconfigure logging for the whole test run
+    config = Config()
+    config.set_main_option("script_location", str(ALEMBIC_DIR))
+    previous = os.environ.get("DATABASE_URL")
+    os.environ["DATABASE_URL"] = url
+    try:
+        command.upgrade(config, "head")
+    finally:
+        if previous is None:
+            os.environ.pop("DATABASE_URL", None)
+        else:
+            os.environ["DATABASE_URL"] = previous
+    try:
+        yield url
+    finally:
+        with server.connect() as conn:
+            conn.execute(text(f'DROP DATABASE IF EXISTS "{name}" WITH (FORCE)'))
+        server.dispose()
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Bulk contact and lead import: duplicates within the file and against existing
+contacts by normalized email/phone, per-row validation errors, and one new
+contact per key shared by several lead rows. Runs against in-memory SQLite,
+which takes the executemany staging path instead of COPY.
+"""
+import io
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import select
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+from api.models import Contact, Lead, User  # noqa: E402
+from api.services.bulk_import import run_import  # noqa: E402
+
+ORG_ID = 1
+OTHER_ORG_ID = 2
+
+
+@pytest.fixture()
+def db(sqlite_db):
+    session = sqlite_db
+    session.add_all([
+        User(id=1, name="Ann", email="ann@example.com", password_hash="x", organization_id=ORG_ID),
+        User(id=2, name="Ben", email="ben@example.com", password_hash="x", organization_id=ORG_ID),
+        User(id=3, name="Oz", email="oz@example.com", password_hash="x", organization_id=OTHER_ORG_ID),
+    ])
+    session.commit()
+    return session
+
+
+@pytest.fixture()
+def user():
+    return SimpleNamespace(id=1, organization_id=ORG_ID)
+
+
+def upload(*lines: str) -> io.BytesIO:
+    return io.BytesIO("\n".join(lines).encode("utf-8"))
+
+
+def contacts(db, organization_id=ORG_ID):
+    return db.execute(
+        select(Contact).where(Contact.organization_id == organization_id).order_by(Contact.id)
+    ).scalars().all()
+
+
+def test_duplicates_within_the_file(db, user):
+    report = run_import(db, "contacts", upload(
+        "name,email,phone",
+        "Dana,DANA@Example.com,",
+        "Dana again, dana@example.com ,",
+        "Eli,,+1 (555) 010-2030",
+        "Eli again,,15550102030",
+        "Fay,,",
+        "Fay again,,",
+    ), "csv", user)
+    db.commit()
+
+    assert (report.rows, report.inserted, report.invalid) == (6, 4, 0)
+    assert report.duplicates_in_file == 2
+    assert report.duplicates == [{"row": 2, "duplicate_of": 1}, {"row": 4, "duplicate_of": 3}]
+    # The first row wins; rows without email or phone are never duplicates
+    assert [(c.name, c.email_normalized, c.phone_normalized) for c in contacts(db)] == [
+        ("Dana", "dana@example.com", None),
+        ("Eli", None, "15550102030"),
+        ("Fay", None, None),
+        ("Fay again", None, None),
+    ]
+
+
+@pytest.mark.parametrize("update_existing", [False, True])
+def test_rows_matching_an_existing_contact(db, user, update_existing):
+    db.add_all([
+        Contact(name="Gil", email="gil@example.com", phone="555-010-9999", company="Old Co", organization_id=ORG_ID),
+        Contact(name="Hal", phone="+44 20 7946 0000", organization_id=ORG_ID),
+        # Same email in another org is not a match
+        Contact(name="Gil elsewhere", email="gil@example.com", organization_id=OTHER_ORG_ID),
+    ])
+    db.commit()
+
+    report = run_import(db, "contacts", upload(
+        "name,email,phone,company",
+        "Gilbert,GIL@example.com,,New Co",
+        "Gil again,gil@example.com,,Other Co",
+        "Harold,,442079460000,",
+    ), "csv", user, update_existing=update_existing)
+    db.commit()
+    gil, hal = contacts(db)
+
+    assert (report.inserted, report.duplicates_in_file) == (0, 1)
+    assert len(contacts(db)) == 2
+    if update_existing:
+        assert (report.updated, report.skipped_existing) == (2, 0)
+        # Non-empty values from the file win, empty ones keep what is stored
+        assert (gil.name, gil.company, gil.phone) == ("Gilbert", "New Co", "555-010-9999")
+        assert hal.name == "Harold"
+    else:
+        assert (report.updated, report.skipped_existing) == (0, 2)
+        assert (gil.name, gil.company) == ("Gil", "Old Co")
+        assert hal.name == "Hal"
+    assert contacts(db, OTHER_ORG_ID)[0].name == "Gil elsewhere"
+
+
+def test_per_row_errors(db, user):
+    report = run_import(db, "contacts", upload(
+        '{"name": "Ivy", "email": "ivy@example.com", "owner_id": 2}',
+        '{"email": "nameless@example.com"}',
+        '{"name": "Jo", "email": "not-an-email"}',
+        '{"name": "Kim", "phone": "12345"}',
+        '{"name": "Lou", "owner_id": 3}',
+        '{"name": "Max", "owner_id": "two"}',
+        "",
+        "{not json",
+        '["Ned"]',
+    ), "ndjson", user)
+    db.commit()
+
+    assert (report.rows, report.inserted, report.invalid) == (8, 1, 7)
+    assert [error["row"] for error in report.errors] == [2, 3, 4, 5, 6, 8, 9]
+    assert report.errors[0]["error"] == "name is required"
+    assert report.errors[1]["error"] == "invalid email 'not-an-email'"
+    assert report.errors[3]["error"] == "owner_id 3 is not a user in this organization"
+    assert report.errors[4]["error"] == "owner_id must be an integer"
+    assert report.errors[6]["error"] == "expected a JSON object"
+    [ivy] = contacts(db)
+    assert (ivy.name, ivy.owner_id) == ("Ivy", 2)
+
+    report = run_import(db, "leads", upload(
+        "title,score,contact_email",
+        "Too many,1,a@example.com,extra",
+        "Bad score,101,",
+        ",5,",
+    ), "csv", user)
+    assert report.invalid == 3
+    assert [error["error"] for error in report.errors] == [
+        "more values than header columns", "score must be between 0 and 100", "title is required",
+    ]
+
+
+def test_leads_sharing_a_contact_key_create_one_contact(db, user):
+    db.add(Contact(name="Pat", phone="555 010 7777", organization_id=ORG_ID))
+    db.commit()
+
+    report = run_import(db, "leads", upload(
+        "title,status,contact_name,contact_email,contact_phone",
+        "Lead 1,,Quinn,QUINN@example.com,",
+        "Lead 2,qualified,Quinn Q,quinn@example.com,",
+        "Lead 3,, , quinn@example.com ,",
+        "Lead 4,,,,5550107777",
+        "Lead 5,,,,",
+    ), "csv", user)
+    db.commit()
+
+    assert (report.rows, report.inserted, report.contacts_created, report.invalid) == (5, 5, 1, 0)
+    pat, quinn = contacts(db)
+    assert (quinn.name, quinn.email_normalized) == ("Quinn", "quinn@example.com")
+    leads = db.execute(select(Lead).order_by(Lead.id)).scalars().all()
+    assert [lead.contact_id for lead in leads] == [quinn.id, quinn.id, quinn.id, pat.id, None]
+    assert [lead.status for lead in leads] == ["new", "qualified", "new", "new", "new"]
+    assert {lead.owner_id for lead in leads} == {user.id}
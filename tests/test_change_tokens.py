@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Change tokens (api/change_tokens.py): counters are bumped by the writer's
+own transaction just before COMMIT, so the write and its bump are atomic and
+concurrent writers to one org do not wait on each other's counter row until
+then. The SQLite test runs anywhere; the concurrency test needs
+TEST_DATABASE_URL.
+"""
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import QueuePool
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+from api import change_tokens  # noqa: E402
+from api.change_tokens import change_token, on_commit, read_versions  # noqa: E402
+from api.models import Base, Contact, Lead, OrgChangeVersion, OrgDailyMetric  # noqa: E402
+
+ORG_ID = 1
+
+
+def test_bumped_once_the_write_commits(tmp_path):
+    # One pooled connection: the bump must not need a second one
+    engine = create_engine(f"sqlite:///{tmp_path / 'tokens.db'}", poolclass=QueuePool,
+                           pool_size=1, max_overflow=0, pool_timeout=1)
+    # The daily rollup listener is registered once any test imports it
+    tables = [Lead.__table__, OrgChangeVersion.__table__, OrgDailyMetric.__table__]
+    Base.metadata.create_all(engine, tables=tables)
+    db = sessionmaker(bind=engine)()
+    seen = []
+    listener = on_commit(seen.append)
+    try:
+        before = change_token(db, ORG_ID, ("leads",))
+        db.commit()
+        db.add(Lead(title="L", organization_id=ORG_ID))
+        db.flush()
+        assert read_versions(db, ORG_ID, ("leads",)) == {}
+        db.rollback()
+        assert change_token(db, ORG_ID, ("leads",)) == before
+
+        db.add(Lead(title="L", organization_id=ORG_ID))
+        db.commit()
+        assert read_versions(db, ORG_ID, ("leads",)) == {(ORG_ID, "leads"): 1}
+        assert change_token(db, ORG_ID, ("leads",)) != before
+        assert seen == [{(ORG_ID, "leads"), (ORG_ID, "dashboard")}]
+    finally:
+        change_tokens._commit_listeners.remove(listener)
+        db.close()
+        engine.dispose()
+
+
+def test_writers_do_not_wait_on_the_counter_row(migrated_database_url):
+    engine = create_engine(migrated_database_url)
+    Session = sessionmaker(bind=engine)
+    first, second = Session(), Session()
+    try:
+        # An open transaction that has written a contact of the org (contacts,
+        # unlike leads, have no daily rollup row that writers would share)
+        first.add(Contact(name="Open", organization_id=ORG_ID))
+        first.flush()
+        with ThreadPoolExecutor(1) as pool:
+            def commit_contact():
+                second.add(Contact(name="Committed", organization_id=ORG_ID))
+                second.commit()
+            pending = pool.submit(commit_contact)
+            try:
+                pending.result(5)
+            finally:
+                first.commit()
+        assert read_versions(second, ORG_ID, ("contacts",)) == {(ORG_ID, "contacts"): 2}
+    finally:
+        first.close()
+        second.close()
+        with engine.begin() as conn:
+            conn.execute(text("TRUNCATE contacts, org_change_versions RESTART IDENTITY CASCADE"))
+        engine.dispose()
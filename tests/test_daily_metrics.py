@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+org_daily_metrics: the incrementally maintained rollup must always equal a
+rebuild from the raw tables, whatever sequence of ORM writes produced them.
+Runs against in-memory SQLite.
+"""
+import sys
+from datetime import date, datetime
+from pathlib import Path
+
+import pytest
+from sqlalchemy import select
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+from api import daily_metrics  # noqa: E402
+from api.models import Activity, Deal, Lead, OrgDailyMetric  # noqa: E402
+
+DAY_1 = datetime(2025, 3, 1, 9, 30)
+DAY_2 = datetime(2025, 3, 2, 23, 59)
+DAY_3 = datetime(2025, 3, 3, 0, 1)
+
+
+@pytest.fixture()
+def db(sqlite_db):
+    return sqlite_db
+
+
+def stored(db):
+    rows = db.execute(select(OrgDailyMetric)).scalars()
+    return {
+        (row.organization_id, row.day): {name: getattr(row, name) for name in daily_metrics.METRICS}
+        for row in rows
+        if any(getattr(row, name) for name in daily_metrics.METRICS)
+    }
+
+
+def rebuilt(db):
+    return {
+        key: {name: counts.get(name, 0) for name in daily_metrics.METRICS}
+        for key, counts in daily_metrics.compute_rollup(db).items()
+        if any(counts.values())
+    }
+
+
+def test_rollup_tracks_writes(db):
+    lead = Lead(title="L", organization_id=1, created_at=DAY_1)
+    won = Deal(title="Won", value=100.0, organization_id=1, created_at=DAY_1)
+    lost = Deal(title="Lost", value=50.0, organization_id=2, created_at=DAY_2)
+    db.add_all([lead, won, lost])
+    db.commit()
+    assert stored(db) == rebuilt(db)
+    assert stored(db)[(1, date(2025, 3, 1))]["deals_created"] == 1
+
+    # Close, re-value, add activity
+    won.closed_at = DAY_2
+    db.flush()
+    won.value = 175.0
+    db.add(Activity(deal_id=won.id, type="deal_closed", message="won", timestamp=DAY_2))
+    db.commit()
+    assert stored(db) == rebuilt(db)
+    assert stored(db)[(1, date(2025, 3, 2))] == {
+        "leads_created": 0, "deals_created": 0, "deals_closed": 1, "revenue_closed": 175.0, "activities": 1,
+    }
+
+    # Move dates and orgs, reopen, delete
+    lead.created_at = DAY_3
+    lost.organization_id = 1
+    won.closed_at = DAY_3
+    db.commit()
+    assert stored(db) == rebuilt(db)
+
+    won.closed_at = None
+    db.delete(lost)
+    db.commit()
+    assert stored(db) == rebuilt(db)
+
+
+def test_rebuild_replaces_drift(db):
+    db.add(Deal(title="D", value=10.0, organization_id=1, created_at=DAY_1, closed_at=DAY_1))
+    db.commit()
+    expected = stored(db)
+
+    # Simulate a write that bypassed the listener
+    db.execute(OrgDailyMetric.__table__.update().values(deals_closed=99))
+    db.commit()
+    assert stored(db) != expected
+
+    daily_metrics.rebuild(db)
+    db.commit()
+    assert stored(db) == expected == rebuilt(db)
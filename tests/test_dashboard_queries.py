@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+"""
+Dashboard aggregates: figures and query counts.
+
+The dashboard endpoints read each table once (one aggregate query for leads,
+one for deals, the monthly chart from the org_daily_metrics rollup) instead of
+one COUNT/SUM per figure and month. These tests pin
+both the numbers for a known data set and the number of statements each
+endpoint runs. The last tests go through app.py, where the router is mounted.
+Runs against in-memory SQLite; no server or Postgres needed.
+"""
+import asyncio
+import os
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+from types import SimpleNamespace
+
+import jwt
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+from sqlalchemy.orm import sessionmaker
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "backend"))
+
+from api.dashboard_cache import dashboard_cache  # noqa: E402
+from api.models import Activity, Deal, Lead  # noqa: E402
+from api.query_stats import collect_queries  # noqa: E402
+from api.routers import dashboard  # noqa: E402
+
+ORG_ID = 1
+OTHER_ORG_ID = 2
+
+
+@pytest.fixture()
+def db(sqlite_db):
+    session = sqlite_db
+    dashboard_cache.clear()
+    months = dashboard.performance_months()
+    # Mid-month timestamps inside the first and last chart months
+    first = months[0] + timedelta(days=14, hours=12)
+    last = months[-1] + timedelta(days=14, hours=12)
+
+    statuses = ["new", "New", "contacted", "Negotiation", "qualified", "Qualified", "Proposal Sent", "hot", "Won", "lost", None]
+    for i, status in enumerate(statuses):
+        session.add(Lead(title=f"Lead {i}", status=status, organization_id=ORG_ID, created_at=first if i < 4 else last))
+    session.add(Lead(title="Elsewhere", status="new", organization_id=OTHER_ORG_ID, created_at=first))
+
+    deals = [
+        Deal(title="Won A", value=250000.0, organization_id=ORG_ID, created_at=first, closed_at=first),
+        Deal(title="Won B", value=150000.0, organization_id=ORG_ID, created_at=first, closed_at=last),
+        Deal(title="Open C", value=99.0, organization_id=ORG_ID, created_at=last, reminder_date=last),
+        Deal(title="Open D", value=None, organization_id=ORG_ID, created_at=datetime(2001, 1, 1)),
+        Deal(title="Other org", value=1.0, organization_id=OTHER_ORG_ID, created_at=first, closed_at=first),
+    ]
+    session.add_all(deals)
+    session.flush()
+    session.add_all([
+        Activity(deal_id=deals[0].id, type="note_added", message="a", timestamp=first),
+        Activity(deal_id=deals[0].id, type="note_added", message="b", timestamp=last),
+        Activity(deal_id=deals[2].id, type="deal_moved", message="c", timestamp=last),
+    ])
+    session.commit()
+    return session
+
+
+@pytest.fixture()
+def user():
+    return SimpleNamespace(id=1, organization_id=ORG_ID)
+
+
+def test_metrics(db, user):
+    with collect_queries() as queries:
+        metrics = dashboard.get_dashboard_metrics(user, db)
+    assert queries.count == 2
+    # active: new, New, contacted, Negotiation, qualified, Qualified, Proposal Sent
+    assert metrics.active_leads == 7
+    assert metrics.closed_deals == 2
+    assert metrics.total_revenue == 400000
+    # 2/4 deals with activity * 40 + 1/4 with reminder * 30 + 0.4M/1M * 30
+    assert metrics.ai_score == int(20 + 7.5 + 12)
+    assert metrics.lead_quality_score == round(1 / 7 * 10, 1)
+    assert metrics.conversion_rate == round(2 / 9 * 100, 1)
+    assert metrics.target_achievement == 40.0
+
+
+def test_performance(db, user):
+    with collect_queries() as queries:
+        performance = dashboard.get_performance_data(user, db)
+    assert queries.count == 1
+    months = dashboard.performance_months()
+    assert [p.month for p in performance] == [m.strftime("%b") for m in months]
+    assert (performance[0].leads, performance[0].deals, performance[0].revenue) == (4, 2, 250000)
+    assert (performance[-1].leads, performance[-1].deals, performance[-1].revenue) == (7, 1, 150000)
+    assert all((p.leads, p.deals, p.revenue) == (0, 0, 0) for p in performance[1:-1])
+
+
+def test_lead_quality(db, user):
+    with collect_queries() as queries:
+        quality = dashboard.get_lead_quality_data(user, db)
+    assert queries.count == 1
+    # qualified 3, nurturing 2, cold 2, hot 2 (lost/None are in no bucket)
+    assert [(q.name, q.value) for q in quality] == [
+        ("Qualified", int(3 / 9 * 100)), ("Nurturing", int(2 / 9 * 100)),
+        ("Cold", int(2 / 9 * 100)), ("Hot", int(2 / 9 * 100)),
+    ]
+
+
+def test_combined_dashboard(db, user):
+    with collect_queries() as queries:
+        data = dashboard.get_dashboard_data(user, db)
+    # leads aggregate, deals aggregate, monthly rollup, activity feed
+    assert queries.count == 4
+    assert data.metrics == dashboard.get_dashboard_metrics(user, db)
+    assert data.performance == dashboard.get_performance_data(user, db)
+    assert data.lead_quality == dashboard.get_lead_quality_data(user, db)
+    assert len(data.activity_feed) == 3
+
+
+def test_cached_until_write_commits(db, user):
+    first = dashboard.get_dashboard_metrics(user, db)
+    with collect_queries() as queries:
+        assert dashboard.get_dashboard_metrics(user, db) == first
+    assert queries.count == 0
+
+    # Another org's write leaves org 1's entry fresh
+    db.add(Lead(title="Other", status="new", organization_id=OTHER_ORG_ID))
+    db.commit()
+    with collect_queries() as queries:
+        dashboard.get_dashboard_metrics(user, db)
+    assert queries.count == 0
+
+    db.add(Lead(title="New", status="new", organization_id=ORG_ID))
+    db.commit()
+    assert dashboard.get_dashboard_metrics(user, db).active_leads == first.active_leads + 1
+
+
+def test_live_stream_coalesces_commits(db, monkeypatch):
+    from api import dashboard_stream
+
+    # The stream opens its own sessions; point them at the fixture's database
+    monkeypatch.setattr(dashboard_stream, "get_session_local", lambda: sessionmaker(bind=db.get_bind()))
+    stream = dashboard_stream.DashboardStream(dashboard.load_live_snapshot, interval=0.2, poll_seconds=0)
+    loads = []
+    load = stream._load
+    monkeypatch.setattr(stream, "_load", lambda *args: loads.append(1) or load(*args))
+
+    async def run():
+        subscriber = stream.subscribe(ORG_ID)
+        event, snapshot = await asyncio.wait_for(subscriber.queue.get(), 5)
+        assert event == "snapshot"
+        assert snapshot["metrics"]["active_leads"] == 7
+        assert len(snapshot["activities"]) == 3
+
+        for i in range(5):
+            await asyncio.to_thread(commit_lead, db, i)
+        event, delta = await asyncio.wait_for(subscriber.queue.get(), 5)
+        assert event == "delta"
+        assert delta["metrics"]["active_leads"] == {"value": 12, "change": 5}
+        assert "activities" not in delta
+        await asyncio.sleep(0.3)
+        assert subscriber.queue.empty()
+        stream.unsubscribe(ORG_ID, subscriber)
+
+    asyncio.run(run())
+    # Initial snapshot plus one push for the five commits
+    assert len(loads) == 2
+
+
+def commit_lead(db, i):
+    db.add(Lead(title=f"Live {i}", status="new", organization_id=ORG_ID))
+    db.commit()
+
+
+def test_live_stream_reloads_after_stale_metrics(db, monkeypatch):
+    from api import dashboard_stream
+    from api.dashboard_cache import _Computation
+
+    monkeypatch.setattr(dashboard_stream, "get_session_local", lambda: sessionmaker(bind=db.get_bind()))
+    stream = dashboard_stream.DashboardStream(dashboard.load_live_snapshot, interval=0.1, poll_seconds=0)
+    key = (ORG_ID, "metrics")
+
+    async def run():
+        subscriber = stream.subscribe(ORG_ID)
+        await asyncio.wait_for(subscriber.queue.get(), 5)
+        # A request is recomputing the metrics: the stream's load gets the pre-write figures
+        recomputing = dashboard_cache._computing[key] = _Computation()
+        await asyncio.to_thread(commit_lead, db, 0)
+        await asyncio.sleep(0.3)
+        assert subscriber.queue.empty()
+
+        del dashboard_cache._computing[key]
+        recomputing.done.set()
+        event, delta = await asyncio.wait_for(subscriber.queue.get(), 5)
+        assert (event, delta["metrics"]["active_leads"]) == ("delta", {"value": 8, "change": 1})
+        stream.unsubscribe(ORG_ID, subscriber)
+
+    asyncio.run(run())
+
+
+# --- through the app ------------------------------------------------------------
+
+
+@pytest.fixture()
+def app(db, monkeypatch):
+    # app.py imports from the backend package, i.e. from the repository root
+    monkeypatch.syspath_prepend(str(ROOT))
+    from backend.app import app
+    from api import db as api_db
+    from api.user_cache import UserSnapshot, user_cache
+
+    monkeypatch.setattr(api_db, "SessionLocal", sessionmaker(bind=db.get_bind()))
+    user_cache.put(UserSnapshot(id=1, name="Ann", email="ann@example.com", role="admin", organization_id=ORG_ID))
+    try:
+        yield app
+    finally:
+        user_cache.clear()
+
+
+def auth_headers():
+    secret = os.getenv("SECRET_KEY", "your-secret-key-change-in-production")
+    return {"Authorization": f"Bearer {jwt.encode({'sub': '1'}, secret, algorithm='HS256')}"}
+
+
+def test_app_serves_the_router(app, db, user):
+    client = TestClient(app)
+    response = client.get("/api/dashboard/", headers=auth_headers())
+    assert response.status_code == 200
+    # change token, leads aggregate, deals aggregate, monthly rollup, activity feed
+    assert response.headers["x-db-queries"] == "5"
+    assert response.json() == dashboard.get_dashboard_data(user, db).model_dump(mode="json")
+
+    again = client.get("/api/dashboard/", headers={**auth_headers(), "If-None-Match": response.headers["etag"]})
+    assert again.status_code == 304
+
+    metrics = client.get("/api/dashboard/metrics", headers=auth_headers())
+    assert metrics.json()["active_leads"] == 7
+
+
+def test_cache_follows_the_change_token(app, db):
+    client = TestClient(app)
+    first = client.get("/api/dashboard/metrics", headers=auth_headers())
+    assert first.json()["active_leads"] == 7
+
+    # Another worker's write: the rows and the token change, but no commit
+    # hook runs in this process
+    db.execute(text("INSERT INTO leads (title, status, organization_id) VALUES ('Elsewhere', 'new', :org)"), {"org": ORG_ID})
+    db.execute(text("UPDATE org_change_versions SET version = version + 1 WHERE organization_id = :org AND scope = 'dashboard'"),
+               {"org": ORG_ID})
+    db.commit()
+    second = client.get("/api/dashboard/metrics", headers=auth_headers())
+    assert second.headers["etag"] != first.headers["etag"]
+    assert second.json()["active_leads"] == 8
+
+
+def test_app_streams_a_snapshot(app):
+    async def run():
+        first_event = asyncio.Event()
+        requested = False
+        body = b""
+
+        async def receive():
+            nonlocal requested
+            if not requested:
+                requested = True
+                return {"type": "http.request", "body": b"", "more_body": False}
+            await first_event.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            nonlocal body
+            if message["type"] == "http.response.start":
+                assert message["status"] == 200
+            elif message["type"] == "http.response.body":
+                body += message.get("body", b"")
+                if b"event: snapshot" in body:
+                    first_event.set()
+
+        scope = {
+            "type": "http", "asgi": {"version": "3.0", "spec_version": "2.3"}, "http_version": "1.1",
+            "method": "GET", "scheme": "http", "path": "/api/dashboard/stream", "raw_path": b"/api/dashboard/stream",
+            "root_path": "", "query_string": b"", "server": ("test", 80), "client": ("test", 1),
+            "headers": [(name.lower().encode(), value.encode()) for name, value in auth_headers().items()],
+        }
+        await asyncio.wait_for(app(scope, receive, send), 5)
+        return body
+
+    body = asyncio.run(run())
+    assert b'"active_leads":7' in body
@@ -0,0 +1,353 @@
+#!/usr/bin/env python3
+"""
+Lazy-loading Kanban board: per-stage totals and first cards in a fixed
+number of queries, further cards by cursor, filters applied server-side,
+manual card order through deal ranks, batch moves, board deltas over the
+WebSocket manager. Runs against in-memory SQLite; the batch's Postgres
+paths (VALUES update, WIP-limit locks) run when TEST_DATABASE_URL is set.
+"""
+import asyncio
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import jwt
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event, select, text, update
+from sqlalchemy.orm import sessionmaker
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "backend"))
+
+from ai.data_access import CRMDataAccess  # noqa: E402
+from api.crud.kanban import (  # noqa: E402
+    DealBatchError, DealFilters, apply_deal_batch, get_deal_card, get_kanban_board,
+    get_kanban_board_columns, get_stage_deals, move_deal, update_deal,
+)
+from api import deal_ranking  # noqa: E402
+from api.deal_ranking import lock_stage, needs_rebalance, rebalance_stage  # noqa: E402
+from api.models import Deal, Stage, Tag, User  # noqa: E402
+from api.schemas.kanban import DealBatchOperation, DealUpdate  # noqa: E402
+from api.user_cache import UserSnapshot, user_cache  # noqa: E402
+from api.websocket import ConnectionManager, manager as ws_manager  # noqa: E402
+from api.query_stats import collect_queries  # noqa: E402
+
+ORG_ID = 1
+START = datetime(2025, 1, 1)
+
+
+@pytest.fixture()
+def db(sqlite_db):
+    session = sqlite_db
+    owner = User(name="Owner", email="owner@example.com", password_hash="x", organization_id=ORG_ID)
+    watcher = User(name="Watcher", email="watcher@example.com", password_hash="x", organization_id=ORG_ID)
+    tag = Tag(label="Hot")
+    stages = [Stage(name=name, order=i) for i, name in enumerate(["Lead", "Proposal", "Won"])]
+    session.add_all([owner, watcher, tag, *stages])
+    session.flush()
+    for i in range(25):
+        deal = Deal(
+            title=f"Deal {i}", value=float(i), stage_id=stages[0].id if i < 23 else stages[1].id,
+            owner_id=owner.id if i % 2 else None, organization_id=ORG_ID,
+            created_at=START + timedelta(days=i),
+        )
+        if i % 5 == 0:
+            deal.tags.append(tag)
+        if i == 22:
+            deal.watchers.append(watcher)
+        session.add(deal)
+    session.add(Deal(title="Elsewhere", value=1000.0, stage_id=stages[0].id, organization_id=2, created_at=START))
+    session.flush()
+    # Ranked newest first, as the migration ranks existing deals
+    for organization_id, stage in [(ORG_ID, stages[0]), (ORG_ID, stages[1]), (2, stages[0])]:
+        rebalance_stage(session, organization_id, stage.id)
+    session.commit()
+    return session
+
+
+def test_first_paint(db):
+    with collect_queries() as queries:
+        board = get_kanban_board_columns(db, ORG_ID, per_stage=10)
+    # stages, totals, first cards of every stage, watchers, tags
+    assert queries.count == 5
+    lead, proposal, won = board["stages"]
+    assert (lead["deal_count"], lead["value_sum"]) == (23, float(sum(range(23))))
+    assert [deal["title"] for deal in lead["deals"]] == [f"Deal {i}" for i in range(22, 12, -1)]
+    assert lead["deals"][0]["watchers"] == ["Watcher"]
+    assert [deal["tags"] for deal in lead["deals"][:3]] == [[], [], [{"id": 1, "label": "Hot", "color": None}]]
+    assert lead["next_cursor"]
+    assert (proposal["deal_count"], len(proposal["deals"]), proposal["next_cursor"]) == (2, 2, None)
+    assert (won["deal_count"], won["deals"], won["next_cursor"]) == (0, [], None)
+
+
+def test_stage_pages_follow_the_board(db):
+    board = get_kanban_board_columns(db, ORG_ID, per_stage=10)
+    lead = board["stages"][0]
+    seen = [deal["id"] for deal in lead["deals"]]
+    cursor = lead["next_cursor"]
+    while cursor:
+        deals, cursor = get_stage_deals(db, ORG_ID, lead["id"], cursor=cursor, limit=10)
+        seen.extend(deal["id"] for deal in deals)
+    assert len(seen) == len(set(seen)) == 23
+
+
+def test_filters(db):
+    filters = DealFilters(tag_id=1, min_value=1, max_value=20, search="deal 1")
+    board = get_kanban_board_columns(db, ORG_ID, filters)
+    lead = board["stages"][0]
+    # Tagged every fifth deal; in range and matching "deal 1": 10 and 15
+    assert [deal["title"] for deal in lead["deals"]] == ["Deal 15", "Deal 10"]
+    assert (lead["deal_count"], lead["value_sum"]) == (2, 25.0)
+
+    owned = get_kanban_board_columns(db, ORG_ID, DealFilters(owner_id=1))
+    assert all(deal["owner_name"] == "Owner" for stage in owned["stages"] for deal in stage["deals"])
+
+
+def test_relations_load_in_constant_queries(db):
+    with collect_queries() as queries:
+        board = get_kanban_board(db, ORG_ID)
+    # stages, deals, watchers, tags
+    assert queries.count == 4
+    assert sum(len(deal["tags"]) for deal in board["deals"]) == 5
+
+    card = get_deal_card(db, 23)
+    assert (card["watchers"], card["tags"]) == (["Watcher"], [])
+
+    with collect_queries() as queries:
+        results = CRMDataAccess(db, 1, ORG_ID).search_entities("Deal 1", ["deals"])
+    # deals with their stages, tags
+    assert queries.count == 2
+    assert [deal["tags"] for deal in results["deals"]].count(["Hot"]) == 2
+
+
+def stage_titles(db, stage_id):
+    deals, _ = get_stage_deals(db, ORG_ID, stage_id, limit=100)
+    return [deal["title"] for deal in deals]
+
+
+def deal_rows_written(db):
+    """Rows of deals updated, counted as the statements run."""
+    written = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        if statement.startswith("UPDATE deals"):
+            written.append(cursor.rowcount)
+
+    event.listen(db.get_bind(), "after_cursor_execute", count)
+    return written
+
+
+def test_moves_keep_manual_order(db):
+    proposal_id = 2
+    assert stage_titles(db, proposal_id) == ["Deal 24", "Deal 23"]
+
+    # A move writes only the moved card, wherever it is dropped
+    written = deal_rows_written(db)
+    move_deal(db, 1, proposal_id, below_deal_id=24)
+    assert stage_titles(db, proposal_id) == ["Deal 24", "Deal 0", "Deal 23"]
+    assert written == [1]
+    move_deal(db, 2, proposal_id, above_deal_id=25)
+    move_deal(db, 3, proposal_id, new_position=3)
+    move_deal(db, 4, proposal_id)
+    assert stage_titles(db, proposal_id) == ["Deal 3", "Deal 24", "Deal 1", "Deal 0", "Deal 2", "Deal 23"]
+    assert written == [1, 1, 1, 1]
+
+    with pytest.raises(ValueError):
+        move_deal(db, 5, proposal_id, above_deal_id=6)
+
+
+def test_restaged_deals_go_on_top(db):
+    proposal_id = 2
+    update_deal(db, 5, DealUpdate(stage_id=proposal_id))
+    update_deal(db, 6, DealUpdate(stage_id=proposal_id))
+    assert stage_titles(db, proposal_id) == ["Deal 5", "Deal 4", "Deal 24", "Deal 23"]
+
+
+def test_rebalance_keeps_order(db, monkeypatch):
+    monkeypatch.setattr(deal_ranking, "DEAL_RANK_MAX_LENGTH", 3)
+    lead_id = 1
+    # Keep dropping cards into the same gap until the keys grow long
+    for deal_id in range(1, 21):
+        move_deal(db, deal_id, lead_id, above_deal_id=21)
+    before = stage_titles(db, lead_id)
+    assert needs_rebalance(max(db.execute(select(Deal.rank)).scalars(), key=lambda rank: len(rank or "")))
+
+    from api import db as api_db
+
+    monkeypatch.setattr(api_db, "get_session_local", lambda: sessionmaker(bind=db.get_bind()))
+    published = []
+    monkeypatch.setattr(ws_manager, "publish_board_deltas", lambda org, deals: published.append((org, deals)))
+    db.commit()
+    deal_ranking.rebalance_in_background(ORG_ID, lead_id)
+    assert stage_titles(db, lead_id) == before
+    ranks = dict(db.execute(select(Deal.id, Deal.rank).where(Deal.stage_id == lead_id)).all())
+    assert not any(needs_rebalance(rank) for rank in ranks.values())
+    # Board viewers get the rewritten ranks
+    [(org, deltas)] = published
+    assert org == ORG_ID and deltas
+    assert all(delta["stage_id"] == lead_id and ranks[delta["id"]] == delta["rank"] for delta in deltas)
+
+
+def test_batch_is_all_or_nothing(db):
+    proposal_id, won_id = 2, 3
+    db.get(Stage, won_id).wip_limit = 1
+    db.commit()
+    ops = [
+        DealBatchOperation(deal_id=1, to_stage_id=proposal_id, below_deal_id=24),
+        DealBatchOperation(deal_id=2, to_stage_id=proposal_id, below_deal_id=24, value=99.0),
+        DealBatchOperation(deal_id=3, title="Renamed"),
+    ]
+    with collect_queries() as queries:
+        result = apply_deal_batch(db, ORG_ID, ops)
+    assert (result["moved"], result["updated"]) == (2, 2)
+    assert stage_titles(db, proposal_id) == ["Deal 24", "Deal 0", "Deal 1", "Deal 23"]
+    assert db.get(Deal, 3).title == "Renamed"
+    # Independent of the number of deals: one UPDATE for the moves, one per patched field set
+    assert queries.count < 20
+
+    # Two deals into a stage limited to one: nothing is written
+    with pytest.raises(DealBatchError) as error:
+        apply_deal_batch(db, ORG_ID, [
+            DealBatchOperation(deal_id=4, to_stage_id=won_id, title="Moved"),
+            DealBatchOperation(deal_id=5, to_stage_id=won_id),
+        ])
+    db.rollback()
+    assert error.value.status_code == 409
+    assert error.value.detail["stages"] == [{"stage_id": won_id, "wip_limit": 1, "deal_count": 2}]
+    assert stage_titles(db, won_id) == []
+    assert db.get(Deal, 4).title == "Deal 3"
+
+
+class FakeSocket:
+    def __init__(self):
+        self.sent = []
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, text):
+        self.sent.append(json.loads(text))
+
+
+def test_board_deltas_are_sequenced_per_org():
+    async def scenario():
+        manager = ConnectionManager()
+        viewer, other_org = FakeSocket(), FakeSocket()
+        await manager.connect(viewer, user_id=1)
+        await manager.connect(other_org, user_id=2)
+        assert manager.join_board(viewer, ORG_ID) == 0
+        manager.join_board(other_org, ORG_ID + 1)
+        # Published from the threadpool, as the sync endpoints do
+        loop = asyncio.get_running_loop()
+        for deal_id in (1, 2, 3):
+            await loop.run_in_executor(None, manager.publish_board_deltas, ORG_ID, [{"id": deal_id}])
+        await asyncio.sleep(0.05)
+        return viewer.sent, other_org.sent
+
+    viewer, other_org = asyncio.run(scenario())
+    assert [(message["seq"], message["deals"][0]["id"]) for message in viewer] == [(1, 1), (2, 2), (3, 3)]
+    assert other_org == []
+
+
+def test_board_delta_reaches_a_subscriber_through_the_app(monkeypatch):
+    # app.py imports from the backend package, i.e. from the repository root
+    monkeypatch.syspath_prepend(str(ROOT))
+    from backend.app import app
+
+    user_cache.put(UserSnapshot(id=1, name="Ann", email="ann@example.com", role="admin", organization_id=ORG_ID))
+    secret = os.getenv("SECRET_KEY", "your-secret-key-change-in-production")
+    token = jwt.encode({"sub": "1"}, secret, algorithm="HS256")
+    try:
+        with TestClient(app).websocket_connect(f"/ws/chat/0?token={token}") as socket:
+            assert socket.receive_json()["type"] == "connection_established"
+            socket.send_json({"type": "subscribe_board"})
+            subscribed = socket.receive_json()
+            assert subscribed["type"] == "board_subscribed"
+            # From this thread, as the sync endpoints publish from the threadpool
+            ws_manager.publish_board_deltas(ORG_ID, [{"id": 7, "stage_id": 2}])
+            delta = socket.receive_json()
+        assert delta["type"] == "board_delta"
+        assert delta["seq"] == subscribed["seq"] + 1
+        assert delta["deals"] == [{"id": 7, "stage_id": 2}]
+    finally:
+        user_cache.clear()
+
+
+# --- Postgres -------------------------------------------------------------------
+
+
+def truncate_board(engine):
+    # RESTART IDENTITY: the deal and stage ids below are 1, 2, 3 whatever ran before
+    with engine.begin() as conn:
+        conn.execute(text(
+            "TRUNCATE deals, stages, users, org_change_versions, org_daily_metrics RESTART IDENTITY CASCADE"
+        ))
+
+
+@pytest.fixture()
+def pg_engine(migrated_database_url):
+    engine = create_engine(migrated_database_url)
+    truncate_board(engine)
+    # The migrations create organization 1
+    with sessionmaker(bind=engine)() as session:
+        owner = User(name="Owner", email="owner@example.com", password_hash="x", organization_id=ORG_ID)
+        stages = [Stage(name="Lead", order=0), Stage(name="Won", order=1, wip_limit=1)]
+        session.add_all([owner, *stages])
+        session.flush()
+        session.add_all([
+            Deal(title=f"Deal {i}", value=float(i), stage_id=stages[0].id, owner_id=owner.id,
+                 organization_id=ORG_ID, created_at=START + timedelta(days=i))
+            for i in range(3)
+        ])
+        session.commit()
+    try:
+        yield engine
+    finally:
+        truncate_board(engine)
+        engine.dispose()
+
+
+def test_batch_update_from_values(pg_engine):
+    db = sessionmaker(bind=pg_engine)()
+    try:
+        result = apply_deal_batch(db, ORG_ID, [
+            DealBatchOperation(deal_id=1, to_stage_id=2, title="Won one", value=10.5),
+            DealBatchOperation(deal_id=2, title="Renamed", value=20.0),
+            # A column that is NULL in every VALUES row still needs its type
+            DealBatchOperation(deal_id=3, owner_id=None, reminder_date=None),
+        ])
+        assert (result["moved"], result["updated"]) == (1, 3)
+        deals = {deal.id: deal for deal in db.execute(select(Deal)).scalars()}
+        assert (deals[1].stage_id, deals[1].title, deals[1].value) == (2, "Won one", 10.5)
+        assert deals[1].rank is not None
+        assert (deals[2].stage_id, deals[2].title, deals[2].value) == (1, "Renamed", 20.0)
+        assert (deals[3].owner_id, deals[3].reminder_date, deals[3].title) == (None, None, "Deal 2")
+    finally:
+        db.close()
+
+
+def test_batch_counts_after_a_concurrent_batch_into_the_stage(pg_engine):
+    Session = sessionmaker(bind=pg_engine)
+    first, second = Session(), Session()
+    won_id = 2
+    try:
+        # Another batch into the limited stage, past its count but not committed
+        lock_stage(first, ORG_ID, won_id, exclusive=True)
+        first.execute(update(Deal).where(Deal.id == 1).values(stage_id=won_id))
+        with ThreadPoolExecutor(1) as pool:
+            pending = pool.submit(apply_deal_batch, second, ORG_ID, [DealBatchOperation(deal_id=2, to_stage_id=won_id)])
+            time.sleep(0.5)
+            assert not pending.done()
+            first.commit()
+            with pytest.raises(DealBatchError) as error:
+                pending.result(10)
+        assert error.value.status_code == 409
+        assert error.value.detail["stages"] == [{"stage_id": won_id, "wip_limit": 1, "deal_count": 2}]
+    finally:
+        first.close()
+        second.close()